@@ -0,0 +1,402 @@
+"""
+Command-line batch converter for many statements at once.
+
+Converts every PDF given on the command line (files, directories or glob
+patterns) with extract_transactions_simple, spreading the files across a
+bounded process pool, and writes a JSON manifest with the status, row count
+and wall time of each file. A failing, hanging or crashing PDF (one that
+kills its worker process) is recorded in the manifest and the rest of the
+batch carries on.
+
+Usage:
+    python batch_extract.py statements/ -o converted/ --jobs 8
+    python batch_extract.py "2025-*/**/*.pdf" -o converted/ --timeout 300
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from extract_transactions_simple import extract_transactions_simple
+from utils.columnar_output import FORMAT_EXTENSIONS, OUTPUT_FORMATS, output_format_for
+from utils.extraction_stats import ExtractionStats
+from utils.page_cache import PageTableCache
+from utils.sqlite_sink import merge_database
+from utils.symbol_dictionary import SymbolDictionary
+
+# Set in each pool worker by _init_worker; used to report which process picked up a file
+_start_queue = None
+
+# Seconds a file's result gets to arrive after its worker has exited before the file counts as crashed
+CRASH_GRACE = 1.0
+
+
+def expand_inputs(inputs, recursive=False):
+    """
+    Expand files, directories and glob patterns into a sorted list of PDF paths.
+
+    Args:
+        inputs (list): Paths, directories or glob patterns
+        recursive (bool): Also search sub-directories of directory inputs
+
+    Returns:
+        list: Unique PDF paths in a stable order
+    """
+    pdf_paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif os.path.exists(item):
+            candidates = [item]
+        else:
+            candidates = glob.glob(item, recursive=True)
+
+        for path in sorted(candidates):
+            if os.path.isfile(path) and path.lower().endswith(".pdf"):
+                pdf_paths.append(os.path.abspath(path))
+
+    # Keep first occurrence only (a file can match several patterns)
+    return list(dict.fromkeys(pdf_paths))
+
+
+def plan_outputs(pdf_paths, output_dir, suffix="_extraction.xlsx"):
+    """
+    Pick one output path per input, de-duplicating files that share a name.
+
+    Args:
+        pdf_paths (list): Input PDF paths
+        output_dir (str): Directory for the outputs
+        suffix (str): Appended to each input's base name
+
+    Returns:
+        list: (pdf_path, output_path) tuples
+    """
+    used = set()
+    tasks = []
+    for pdf_path in pdf_paths:
+        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        candidate = base_name
+        counter = 2
+        while candidate.lower() in used:
+            candidate = f"{base_name}_{counter}"
+            counter += 1
+        used.add(candidate.lower())
+        tasks.append((pdf_path, os.path.join(output_dir, f"{candidate}{suffix}")))
+    return tasks
+
+
+def _init_worker(start_queue):
+    """Pool initializer: keep the start queue and let the parent handle Ctrl+C."""
+    global _start_queue
+    _start_queue = start_queue
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _convert_one(task, cache_dir=None, symbol_dictionary_path=None, template_path=None, engine="pdfplumber",
+                 collect_stats=False, incremental=False, prices_path=None, statement_template=None, page_filter=True):
+    """
+    Worker: convert a single PDF and describe the outcome.
+
+    Args:
+        task (tuple): (pdf_path, output_path)
+        cache_dir (str, optional): Page-table cache directory shared by all workers
+        symbol_dictionary_path (str, optional): SymbolDictionary database shared by all workers
+        template_path (str, optional): Column template JSON shared by all workers
+        engine (str): Table engine passed to extract_transactions_simple
+        collect_stats (bool): Add per-stage timings (ExtractionStats.to_dict()) to the entry
+        incremental (bool): Reuse unchanged pages of the previous run from the sidecar next to the output
+        prices_path (str, optional): Price snapshot shared by all workers (read once per worker)
+        statement_template (str, optional): Statement layout name or JSON path; None detects it per file
+        page_filter (bool): Skip table detection on pages without transactions (see utils.page_filter)
+
+    Returns:
+        dict: Manifest entry for this file
+    """
+    pdf_path, output_path = task
+    if _start_queue is not None:
+        _start_queue.put((pdf_path, os.getpid(), time.time()))
+
+    entry = {"input": pdf_path, "output": output_path, "status": None, "rows": 0, "xirr": None,
+             "wall_time_s": None, "error": None, "worker_pid": os.getpid()}
+
+    stats = ExtractionStats() if collect_stats else None
+    start = time.perf_counter()
+    captured = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(captured):
+            cache = PageTableCache(cache_dir) if cache_dir else None
+            symbol_dictionary = SymbolDictionary(symbol_dictionary_path) if symbol_dictionary_path else None
+            try:
+                df = extract_transactions_simple(pdf_path, output_path, cache=cache,
+                                                 symbol_dictionary=symbol_dictionary, template=template_path,
+                                                 engine=engine, stats=stats, incremental=incremental,
+                                                 prices=prices_path, statement_template=statement_template,
+                                                 page_filter=page_filter)
+            finally:
+                if symbol_dictionary is not None:
+                    symbol_dictionary.close()
+    except Exception as e:
+        df = None
+        entry["status"] = "error"
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["wall_time_s"] = round(time.perf_counter() - start, 3)
+
+    if entry["status"] is None:
+        if df is not None:
+            entry["status"] = "ok"
+            entry["rows"] = int(len(df))
+            entry["xirr"] = df.attrs.get("xirr", {}).get("portfolio")
+            if stats is not None:
+                entry["stats"] = stats.to_dict()
+        else:
+            # extract_transactions_simple reports failures on stdout and returns None
+            errors = [line for line in captured.getvalue().splitlines() if line.startswith("Error")]
+            if errors:
+                entry["status"] = "error"
+                entry["error"] = errors[-1]
+            else:
+                entry["status"] = "no_data"
+
+    if entry["status"] != "ok":
+        entry["output"] = None
+    return entry
+
+
+def _write_manifest(manifest, manifest_path):
+    """Write the manifest atomically so a crash never leaves a half-written file."""
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def _merge_into(entry, database_path):
+    """Merge a file's own SQLite database into the shared one and point its manifest entry there."""
+    try:
+        merge_database(entry["output"], database_path)
+    except sqlite3.Error as e:
+        entry.update(status="error", output=None, error=f"{type(e).__name__}: {e}")
+    else:
+        entry["output"] = database_path
+    return entry
+
+
+def run_batch(tasks, manifest_path, jobs=None, max_tasks_per_child=10, timeout=None, cache_dir=None,
+              symbol_dictionary_path=None, template_path=None, engine="pdfplumber", collect_stats=False,
+              incremental=False, prices_path=None, statement_template=None, page_filter=True, poll_interval=0.2):
+    """
+    Convert many PDFs concurrently and keep a manifest of the results.
+
+    Files are handed out to a pool of `jobs` processes; each worker is
+    recycled after `max_tasks_per_child` files to cap memory growth. A file
+    that runs longer than `timeout` seconds gets its worker killed (the pool
+    starts a replacement) and is recorded as "timeout". A file whose worker
+    dies without returning (a segfault, an OOM kill, os._exit) is recorded
+    as "crashed", so the batch ends even without a timeout.
+
+    Files whose output is a SQLite database are not written to it by the
+    workers: each worker writes its file to a database of its own, which
+    this process merges into the shared one (utils.sqlite_sink.merge_database)
+    as the file finishes. Only one process ever writes the shared database,
+    so large batches never wait for (or time out on) its write lock.
+
+    Args:
+        tasks (list): (pdf_path, output_path) tuples, e.g. from plan_outputs(); several files may share one
+            SQLite output
+        manifest_path (str): Where to write the JSON manifest (rewritten after every file)
+        jobs (int, optional): Number of worker processes. Defaults to the CPU count.
+        max_tasks_per_child (int, optional): Files per worker before it is replaced
+        timeout (float, optional): Per-file time limit in seconds
+        cache_dir (str, optional): Reuse raw page tables from this PageTableCache directory
+        symbol_dictionary_path (str, optional): Share normalized scrip symbols through this SymbolDictionary file
+        template_path (str, optional): Column template JSON; learned from the first file converted if missing
+        engine (str): Table engine, "pdfplumber" or "words"
+        collect_stats (bool): Record per-stage timings of each successful file in its manifest entry
+        incremental (bool): Keep a '<output>.state' sidecar per file and only re-read new or changed pages on re-runs
+        prices_path (str, optional): Fill portfolio prices (and open-position XIRR) from this CSV/Parquet price snapshot
+        statement_template (str, optional): Statement layout (registered name or JSON path) of every file;
+            None detects each file's layout from its first page
+        page_filter (bool): Skip table detection on pages whose text shows no transactions; with collect_stats
+            the skipped pages are listed in each entry's stats
+        poll_interval (float): Seconds between checks for finished or overdue files
+
+    Returns:
+        dict: The manifest
+    """
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+    manifest = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "finished_at": None,
+        "wall_time_s": None,
+        "jobs": jobs,
+        "summary": {},
+        "files": [],
+    }
+    batch_start = time.perf_counter()
+
+    # pdf_path -> the shared SQLite database its own database is merged into
+    databases = {}
+    parts_dir = None
+    worker_tasks = []
+    for pdf_path, output_path in tasks:
+        if output_format_for(output_path) == "sqlite":
+            if parts_dir is None:
+                parts_dir = tempfile.mkdtemp(prefix=".sqlite_parts_", dir=os.path.dirname(os.path.abspath(output_path)))
+            databases[pdf_path] = output_path
+            output_path = os.path.join(parts_dir, f"{len(databases)}.sqlite")
+        worker_tasks.append((pdf_path, output_path))
+
+    # A SimpleQueue writes each start notification before _convert_one goes on (a Queue's feeder thread
+    # could lose it if the worker then dies), so a crashed file is always known to have started
+    start_queue = multiprocessing.SimpleQueue()
+    pool = multiprocessing.Pool(processes=jobs, initializer=_init_worker, initargs=(start_queue,),
+                                maxtasksperchild=max_tasks_per_child)
+    try:
+        # The same options for every file
+        options = dict(cache_dir=cache_dir, symbol_dictionary_path=symbol_dictionary_path,
+                       template_path=template_path, engine=engine, collect_stats=collect_stats,
+                       incremental=incremental, prices_path=prices_path, statement_template=statement_template,
+                       page_filter=page_filter)
+        pending = {task[0]: (task, pool.apply_async(_convert_one, (task,), options)) for task in worker_tasks}
+        # pdf_path -> (worker process, start time); the Process object (not just its PID, which the OS
+        # may hand to a recycled worker) identifies the worker that picked the file up
+        started = {}
+
+        while pending:
+            # Collect start notifications so timeouts count from when a worker picked the file up
+            while not start_queue.empty():
+                pdf_path, pid, started_at = start_queue.get()
+                workers = {process.pid: process for process in multiprocessing.active_children()}
+                started[pdf_path] = (workers.get(pid), started_at)
+
+            now = time.time()
+            for pdf_path in list(pending):
+                task, result = pending[pdf_path]
+                worker, started_at = started.get(pdf_path, (None, None))
+                if (not result.ready() and started_at is not None
+                        and (worker is None or not worker.is_alive())):
+                    # The worker is gone; its result may still be on its way
+                    result.wait(CRASH_GRACE)
+                if result.ready():
+                    try:
+                        entry = result.get()
+                    except Exception as e:
+                        entry = {"input": pdf_path, "output": None, "status": "error", "rows": 0,
+                                 "wall_time_s": None, "error": f"{type(e).__name__}: {e}", "worker_pid": None}
+                elif started_at is not None and (worker is None or not worker.is_alive()):
+                    # The exit code is unknown when the worker was already gone at the start notification
+                    exitcode = f" with exit code {worker.exitcode}" if worker is not None else ""
+                    entry = {"input": pdf_path, "output": None, "status": "crashed", "rows": 0,
+                             "wall_time_s": round(now - started_at, 3),
+                             "error": f"Worker process exited unexpectedly{exitcode}",
+                             "worker_pid": worker.pid if worker is not None else None}
+                elif timeout and started_at is not None and now - started_at > timeout:
+                    # Only the worker that picked the file up is stopped; the pool starts a replacement
+                    worker.terminate()
+                    entry = {"input": pdf_path, "output": None, "status": "timeout", "rows": 0,
+                             "wall_time_s": round(now - started_at, 3),
+                             "error": f"Exceeded {timeout}s time limit", "worker_pid": worker.pid}
+                else:
+                    continue
+
+                del pending[pdf_path]
+                if entry["status"] == "ok" and pdf_path in databases:
+                    entry = _merge_into(entry, databases[pdf_path])
+                manifest["files"].append(entry)
+                print(f"[{len(manifest['files'])}/{len(tasks)}] {entry['status']:8} "
+                      f"{entry['rows']:>7} rows  {os.path.basename(pdf_path)}")
+                _write_manifest(manifest, manifest_path)
+
+            if pending:
+                time.sleep(poll_interval)
+    finally:
+        pool.terminate()
+        pool.join()
+        if parts_dir is not None:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+
+    summary = {}
+    for entry in manifest["files"]:
+        summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+    manifest["summary"] = summary
+    manifest["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    manifest["wall_time_s"] = round(time.perf_counter() - batch_start, 3)
+    # Report files in input order rather than completion order
+    order = {task[0]: i for i, task in enumerate(tasks)}
+    manifest["files"].sort(key=lambda entry: order[entry["input"]])
+    _write_manifest(manifest, manifest_path)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert many broker statement PDFs to Excel.")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory for the converted files (default: current directory)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    parser.add_argument("--max-tasks-per-child", type=int, default=10, help="Files per worker before it is recycled (default: 10)")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-file time limit in seconds")
+    parser.add_argument("--cache-dir", default=None, help="Page-table cache directory; re-runs on unchanged PDFs skip table detection")
+    parser.add_argument("--symbol-dictionary", default=None, help="SQLite file of normalized scrip symbols shared across runs")
+    parser.add_argument("--template", default=None, help="Column template JSON for statements with the same layout (learned and saved if missing)")
+    parser.add_argument("--statement-template", default=None,
+                        help="Statement layout: a registered template name or a template JSON file (default: detected per file)")
+    parser.add_argument("--engine", choices=["pdfplumber", "words"], default="pdfplumber",
+                        help="Table engine: pdfplumber's table finder (default) or the faster word/ruling row clustering")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx",
+                        help="Output format (default: xlsx); parquet, arrow and csv write the portfolio as a separate '_portfolio' file, "
+                             "sqlite upserts every file into OUTPUT_DIR/statements.sqlite")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-read new or changed pages of statements converted before into the same output directory")
+    parser.add_argument("--prices", default=None,
+                        help="Local CSV/Parquet price snapshot (NSE symbol and/or BOM_ID, price) used for portfolio values "
+                             "instead of GOOGLEFINANCE formulas")
+    parser.add_argument("--no-page-filter", action="store_true",
+                        help="Run table detection on every page, including pages whose text shows no transactions")
+    parser.add_argument("--stats", action="store_true", help="Record per-stage timings of each file in the manifest")
+    parser.add_argument("--manifest", default=None, help="Manifest path (default: OUTPUT_DIR/manifest.json)")
+    args = parser.parse_args(argv)
+    if args.incremental and args.format == "sqlite":
+        parser.error("--incremental needs one output file per statement and cannot be combined with --format sqlite")
+
+    pdf_paths = expand_inputs(args.inputs, recursive=args.recursive)
+    if not pdf_paths:
+        print("No PDF files found.")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(args.output_dir, "manifest.json")
+    if args.format == "sqlite":
+        # Every statement goes into one database (merged by run_batch); re-imports replace that statement's rows
+        database_path = os.path.join(args.output_dir, "statements.sqlite")
+        tasks = [(pdf_path, database_path) for pdf_path in pdf_paths]
+    else:
+        tasks = plan_outputs(pdf_paths, args.output_dir, suffix=f"_extraction{FORMAT_EXTENSIONS[args.format]}")
+
+    print(f"Converting {len(tasks)} PDF file(s)...")
+    manifest = run_batch(tasks, manifest_path, jobs=args.jobs,
+                         max_tasks_per_child=args.max_tasks_per_child, timeout=args.timeout,
+                         cache_dir=args.cache_dir, symbol_dictionary_path=args.symbol_dictionary,
+                         template_path=args.template, engine=args.engine, collect_stats=args.stats,
+                         incremental=args.incremental, prices_path=args.prices,
+                         statement_template=args.statement_template, page_filter=not args.no_page_filter)
+
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(manifest["summary"].items()))
+    print(f"\nDone in {manifest['wall_time_s']}s: {summary}. Manifest written to {manifest_path}")
+    return 0 if manifest["summary"].get("ok", 0) == len(tasks) else 1
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Benchmark the post-extraction cleaning stage on synthetic transaction rows.
+
+Compares the column-wise cleaning in extract_transactions_simple against the
+previous row-by-row implementation (kept below as `legacy_clean`, and used as
+the reference in tests/test_extraction.py) and checks that both produce the
+same DataFrame. The legacy implementation runs once per size, including 1M
+rows, where it takes a few minutes.
+
+Usage:
+    python benchmarks/bench_cleaning.py
+    python benchmarks/bench_cleaning.py --rows 10000 100000 --legacy-max-rows 10000 --json results.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extract_transactions_simple import _clean_transactions  # noqa: E402
+
+COLUMNS = ['Scrip_Symbol', 'Company', 'Date', 'Narration', 'B.Qty', 'B.Rate',
+           'S.Qty', 'S.Rate', 'N.Qty', 'N.Rate', 'N.Amt']
+
+
+def make_raw_transactions(n_rows, n_symbols=500, seed=0):
+    """
+    Build raw (uncleaned) transaction rows shaped like the output of the row classifier.
+
+    About 2% of rows are "Unknown" (to exercise the forward fill), 1% are
+    repeated header rows and 1% are short rows that the final filter drops.
+    """
+    rng = np.random.default_rng(seed)
+    symbols = [f"{500000 + i} SYM{i} - CLIENT NAME" for i in range(n_symbols)]
+    dates = pd.date_range("2020-01-01", periods=1500, freq="D").strftime("%Y-%m-%d").tolist()
+
+    def amounts(low, high):
+        values = rng.integers(low, high, n_rows)
+        return np.array([f"{v:,}" for v in values], dtype=object)
+
+    df = pd.DataFrame({
+        'Scrip_Symbol': np.array(symbols, dtype=object)[np.sort(rng.integers(0, n_symbols, n_rows))],
+        'Company': 'BSE_CASH',
+        'Date': np.array(dates, dtype=object)[rng.integers(0, len(dates), n_rows)],
+        'Narration': np.where(rng.random(n_rows) < 0.5, 'OPENING:CARRY FORWARD\nDATA FROM 2024', 'Setl : M-2025613'),
+        'B.Qty': amounts(0, 1000),
+        'B.Rate': amounts(0, 5000),
+        'S.Qty': amounts(0, 1000),
+        'S.Rate': amounts(0, 5000),
+        'N.Qty': amounts(0, 1000),
+        'N.Rate': amounts(0, 5000),
+        'N.Amt': amounts(-500000, 500000),
+    }, columns=COLUMNS)
+
+    special = rng.random(n_rows)
+    df.loc[special < 0.02, 'Scrip_Symbol'] = 'Unknown'
+    header = (special >= 0.02) & (special < 0.03)
+    df.loc[header, COLUMNS[1:]] = COLUMNS[1:]
+    df.loc[header, 'Scrip_Symbol'] = 'Unknown'
+    short = (special >= 0.03) & (special < 0.04)
+    df.loc[short, COLUMNS[4:]] = np.nan
+    return df
+
+
+def legacy_clean(df):
+    """The previous row-by-row cleaning stage, kept as the reference implementation."""
+    numeric_cols = ['B.Qty', 'B.Rate', 'S.Qty', 'S.Rate', 'N.Qty', 'N.Rate', 'N.Amt']
+    for col in numeric_cols:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+            df[col] = df[col].str.replace(',', '', regex=False)
+            df[col] = df[col].apply(
+                lambda x: re.sub(r'[^\d.-]', '', str(x)) if pd.notna(x) and str(x).strip() else '')
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    if 'Date' in df.columns:
+        def standardize_date(date_str):
+            if pd.isna(date_str) or not str(date_str).strip():
+                return None
+            date_str = str(date_str).strip()
+            formats = [
+                '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d',
+                '%d-%b-%Y', '%d %b %Y', '%b %d, %Y', '%B %d, %Y',
+                '%d-%m-%y', '%d/%m/%y', '%y-%m-%d', '%y/%m/%d'
+            ]
+            for fmt in formats:
+                try:
+                    return datetime.strptime(date_str, fmt).strftime('%Y-%m-%d')
+                except ValueError:
+                    continue
+            return date_str
+        df['Date'] = df['Date'].apply(standardize_date)
+
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].str.replace('\n', ' ', regex=False)
+
+    if 'Company' in df.columns and 'Date' in df.columns:
+        df = df[~((df['Company'] == 'Company') & (df['Date'] == 'Date'))].copy()
+
+    if 'Scrip_Symbol' in df.columns:
+        last_valid_symbol = None
+        for idx, row in df.iterrows():
+            current = row['Scrip_Symbol']
+            if current != 'Unknown' and pd.notna(current) and str(current).strip():
+                last_valid_symbol = current
+            elif last_valid_symbol is not None:
+                df.at[idx, 'Scrip_Symbol'] = last_valid_symbol
+
+    if 'Scrip_Symbol' in df.columns:
+        df['Scrip_Symbol'] = df['Scrip_Symbol'].astype(str)
+
+        def clean_scrip_symbol_and_extract_bom(symbol):
+            symbol = symbol.replace('Scrip_Symbol :', '').strip()
+            bom_id = None
+            bom_match = re.match(r'^(\d+)', symbol)
+            if bom_match:
+                bom_id = bom_match.group(1)
+                symbol = re.sub(r'^\d+\s*', '', symbol)
+            if ' - ' in symbol:
+                symbol = symbol.split(' - ')[0].strip()
+            words = symbol.split()
+            if len(words) == 2 and words[0] == words[1]:
+                symbol = words[0]
+            elif len(words) > 1:
+                symbol = ''.join(words) if all(word.isalpha() for word in words) else symbol
+            if symbol.startswith('BSE '):
+                symbol = 'BSE'
+            return symbol, bom_id
+
+        cleaned_data = df['Scrip_Symbol'].apply(clean_scrip_symbol_and_extract_bom)
+        df['Scrip_Symbol'] = [item[0] for item in cleaned_data]
+        df.insert(1, 'BOM_ID', [item[1] for item in cleaned_data])
+
+    if 'N.Qty' in df.columns:
+        df['filled_columns'] = df.apply(lambda row: sum(pd.notna(val) and str(val).strip() != '' for val in row), axis=1)
+        df = df[df['filled_columns'] >= 8]
+        df = df.drop('filled_columns', axis=1)
+
+    return df
+
+
+def current_clean(df):
+    return _clean_transactions(df, {'last_valid_symbol': None})
+
+
+def time_call(func, raw, repeat):
+    """Best wall time over `repeat` runs, each on a fresh copy of the input."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        data = raw.copy()
+        start = time.perf_counter()
+        result = func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(row_counts, legacy_max_rows, repeat):
+    results = []
+    for n_rows in row_counts:
+        raw = make_raw_transactions(n_rows)
+        current_s, current_df = time_call(current_clean, raw, repeat)
+        entry = {"rows": n_rows, "current_s": round(current_s, 4), "legacy_s": None,
+                 "speedup": None, "identical": None}
+
+        if legacy_max_rows is None or n_rows <= legacy_max_rows:
+            legacy_s, legacy_df = time_call(legacy_clean, raw, 1)
+            entry["legacy_s"] = round(legacy_s, 4)
+            entry["speedup"] = round(legacy_s / current_s, 1)
+            try:
+                pd.testing.assert_frame_equal(legacy_df, current_df, check_dtype=False)
+                entry["identical"] = True
+            except AssertionError:
+                entry["identical"] = False
+
+        results.append(entry)
+        print(f"{n_rows:>9} rows  current {entry['current_s']:>8}s  legacy {entry['legacy_s']}s  "
+              f"speedup {entry['speedup']}x  identical {entry['identical']}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the transaction cleaning stage.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max-rows", type=int, default=None,
+                        help="Skip the (slow) legacy implementation above this many rows (default: run it at every size)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size for the current implementation")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.legacy_max_rows, args.repeat)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "cleaning", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
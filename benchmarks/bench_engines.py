@@ -0,0 +1,91 @@
+"""
+Benchmark the table engines in pages per second.
+
+Times raw table extraction for every page of the given PDFs with each
+engine ("pdfplumber", "pdfplumber" with a learned column template, and
+"words") and checks that the engines agree page by page. Two rates are
+reported: end to end (including pdfminer's parsing of each page, which all
+engines pay) and for the table stage alone.
+
+Usage:
+    python benchmarks/bench_engines.py
+    python benchmarks/bench_engines.py statements/*.pdf --repeat 5 --json results.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import pdfplumber
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extract_transactions_simple import _extract_page_tables  # noqa: E402
+from utils.table_template import TableTemplate  # noqa: E402
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+ENGINES = ["pdfplumber", "pdfplumber+template", "words"]
+
+
+def extract_all(pdf_path, engine):
+    """
+    Raw tables of every page with one engine, opening the PDF fresh so no layout caches carry over.
+
+    Returns:
+        tuple: (pages, seconds spent in the table stage)
+    """
+    template = TableTemplate() if engine == "pdfplumber+template" else None
+    engine = "pdfplumber" if engine == "pdfplumber+template" else engine
+    pages = []
+    table_s = 0.0
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            # Parse the page first so only the engine itself is timed below
+            page.chars, page.edges
+            start = time.perf_counter()
+            tables, _ = _extract_page_tables(page, template, engine)
+            table_s += time.perf_counter() - start
+            pages.append(tables)
+    return pages, table_s
+
+
+def run(pdf_paths, repeat):
+    results = []
+    for pdf_path in pdf_paths:
+        reference = None
+        for engine in ENGINES:
+            best = best_tables = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                pages, table_s = extract_all(pdf_path, engine)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                best_tables = table_s if best_tables is None else min(best_tables, table_s)
+            if reference is None:
+                reference = pages
+            entry = {"pdf": os.path.basename(pdf_path), "engine": engine, "pages": len(pages),
+                     "best_s": round(best, 4), "pages_per_s": round(len(pages) / best, 1),
+                     "table_stage_s": round(best_tables, 4),
+                     "table_stage_pages_per_s": round(len(pages) / best_tables, 1),
+                     "identical": pages == reference}
+            results.append(entry)
+            print(f"{entry['pdf']:<30} {engine:<20} {entry['pages']:>6} pages  {entry['pages_per_s']:>8} pages/s  "
+                  f"table stage {entry['table_stage_pages_per_s']:>8} pages/s  identical {entry['identical']}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the table engines in pages per second.")
+    parser.add_argument("pdfs", nargs="*", default=[DEFAULT_PDF], help="PDF files to read (default: the sample statement)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per engine; the best is reported")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.pdfs, args.repeat)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "engines", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark extract_transactions_simple end to end on synthetic statements.
+
+Generates statements of the requested page counts with
+benchmarks/synthetic_statement.py (reused from --work-dir when present),
+converts each one in a fresh subprocess and reports, per size:
+
+- wall time, pages/sec and rows/sec,
+- time per stage, as recorded by the extractor's own ExtractionStats
+  (utils.extraction_stats): PDF open, page filter (which includes parsing
+  each page's characters), table finding, row classification, cleaning,
+  portfolio, XIRR, Excel writing, and everything else,
+- peak RSS of the converting process.
+
+The conversion runs serially, so every stage runs in the measured process.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --pages 10 100 1000 10000 --engine pdfplumber words --json results.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic_statement import generate_statement  # noqa: E402
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process in MiB (None where the resource module is unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def profile_conversion(pdf_path, output_path, engine="pdfplumber"):
+    """
+    Convert one PDF and report the stage timings of its ExtractionStats.
+
+    Returns:
+        dict: rows, wall time, per-stage wall seconds (plus "other" for time outside every stage),
+            counters and peak RSS
+    """
+    from extract_transactions_simple import extract_transactions_simple
+    from utils.extraction_stats import ExtractionStats
+
+    stats = ExtractionStats()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        df = extract_transactions_simple(pdf_path, output_path, engine=engine, stats=stats)
+    wall = time.perf_counter() - start
+    if df is None:
+        raise RuntimeError(f"Extraction failed for {pdf_path}")
+
+    data = stats.to_dict()
+    stages = {name: round(entry["wall_s"], 4) for name, entry in data["stages"].items()}
+    stages["other"] = round(max(0.0, wall - data["total_wall_s"]), 4)
+    return {"rows": len(df), "wall_s": round(wall, 4), "stages": stages, "counters": data["counters"],
+            "peak_rss_mib": peak_rss_mib()}
+
+
+def run(page_counts, engines, work_dir, seed=0):
+    results = []
+    for pages in page_counts:
+        pdf_path = os.path.join(work_dir, f"statement_{pages}_s{seed}.pdf")
+        generate_s = None
+        if not os.path.exists(pdf_path):
+            start = time.perf_counter()
+            generate_statement(pdf_path, pages, seed=seed)
+            generate_s = round(time.perf_counter() - start, 3)
+
+        for engine in engines:
+            # A fresh interpreter per conversion so peak RSS belongs to that conversion alone
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", pdf_path, "--engine", engine,
+                 "--work-dir", work_dir],
+                check=True, capture_output=True, text=True).stdout
+            entry = json.loads(output.strip().splitlines()[-1])
+            entry.update({
+                "pages": pages, "engine": engine, "pdf_bytes": os.path.getsize(pdf_path),
+                "generate_s": generate_s,
+                "pages_per_s": round(pages / entry["wall_s"], 1),
+                "rows_per_s": round(entry["rows"] / entry["wall_s"], 1),
+            })
+            results.append(entry)
+            stages = "  ".join(f"{stage} {seconds:.2f}s" for stage, seconds in entry["stages"].items())
+            print(f"{pages:>6} pages  {engine:<10} {entry['rows']:>8} rows  {entry['wall_s']:>8.2f}s  "
+                  f"{entry['pages_per_s']:>7} pages/s  {entry['rows_per_s']:>9} rows/s  "
+                  f"peak {entry['peak_rss_mib']} MiB  | {stages}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the extraction pipeline on synthetic statements.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--engine", nargs="+", default=["pdfplumber"], choices=["pdfplumber", "words"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=None, help="Where generated statements are kept between runs (default: a temporary directory)")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        output_path = os.path.join(args.work_dir, "bench_output.xlsx")
+        print(json.dumps(profile_conversion(args.child, output_path, args.engine[0])))
+        return
+
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(work_dir, exist_ok=True)
+        results = run(args.pages, args.engine, work_dir, seed=args.seed)
+
+    report = {"benchmark": "pipeline", "python": platform.python_version(), "platform": platform.platform(),
+              "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
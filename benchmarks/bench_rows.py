@@ -0,0 +1,143 @@
+"""
+Benchmark row classification and DataFrame construction on synthetic page tables.
+
+Compares the columnar row accumulation in extract_transactions_simple
+(_table_rows_to_transactions plus _TransactionColumns.to_frame) against the
+previous one-dict-per-row implementation (kept below as
+`legacy_rows_to_frame`): wall time, peak traced memory, and whether both
+produce the same DataFrame.
+
+Usage:
+    python benchmarks/bench_rows.py
+    python benchmarks/bench_rows.py --rows 100000 1000000 --json results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extract_transactions_simple import _table_rows_to_transactions  # noqa: E402
+
+HEADER = ['Company', 'Date', 'Narration', 'B.Qty', 'B.Rate', 'S.Qty', 'S.Rate', 'N.Qty', 'N.Rate', 'N.Amt']
+
+
+def make_tables(n_rows, rows_per_table=40, seed=0):
+    """
+    Build raw page tables shaped like pdfplumber's output: a header row on
+    the first table, "Scrip_Symbol :" rows and transaction rows with a
+    merged (None) cell, and about 2% short rows that only fill some columns.
+    """
+    rng = np.random.default_rng(seed)
+    tables = [[HEADER + [None]]]
+    row = 0
+    while row < n_rows:
+        table = tables[-1]
+        if len(table) >= rows_per_table:
+            table = []
+            tables.append(table)
+        symbol = int(rng.integers(0, 500))
+        table.append(['Scrip_Symbol :', None, f"{500000 + symbol} SYM{symbol} - CLIENT NAME", None])
+        for _ in range(int(rng.integers(1, 5))):
+            cells = ['BSE_CASH', '2024-06-28', 'Setl : M-2025613'] + [f"{v:,}" for v in rng.integers(0, 5000, 7)]
+            if rng.random() < 0.02:
+                cells = cells[:4]
+            table.append(cells[:3] + [None] + cells[3:])
+            row += 1
+    return tables
+
+
+def legacy_rows_to_frame(tables):
+    """The previous dict-per-row accumulation, kept as the reference implementation."""
+    column_names = None
+    transactions = []
+    for table_idx, table in enumerate(tables):
+        if table_idx == 0:
+            column_names = ["Scrip_Symbol"] + [col for col in table[0] if col is not None and col.strip()]
+            rows = table[1:]
+        else:
+            rows = table
+        current_scrip_symbol = None
+        for row in rows:
+            if row and len(row) > 2 and row[0] == 'Scrip_Symbol :' and row[2] is not None:
+                current_scrip_symbol = row[2]
+                continue
+            non_empty_cols = sum(1 for cell in row if cell is not None and str(cell).strip())
+            if non_empty_cols > 2:
+                transaction = {}
+                filled_cols_count = sum(1 for cell in row if cell is not None and str(cell).strip())
+                if current_scrip_symbol and filled_cols_count >= 8:
+                    transaction[column_names[0]] = current_scrip_symbol
+                else:
+                    transaction[column_names[0]] = "Unknown"
+                col_index = 1
+                for cell in row:
+                    if cell is not None and col_index < len(column_names):
+                        transaction[column_names[col_index]] = cell
+                        col_index += 1
+                transactions.append(transaction)
+    return pd.DataFrame(transactions, columns=column_names, index=range(len(transactions)))
+
+
+def current_rows_to_frame(tables):
+    state = {'column_names': None}
+    transactions = _table_rows_to_transactions(0, tables, state)
+    return transactions.to_frame(pd.RangeIndex(len(transactions)))
+
+
+def measure(func, tables):
+    """Wall time and peak traced memory (MiB) of one call."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(tables)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(tables)
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def run(row_counts):
+    results = []
+    for n_rows in row_counts:
+        tables = make_tables(n_rows)
+        current_s, current_mib, current_df = measure(current_rows_to_frame, tables)
+        legacy_s, legacy_mib, legacy_df = measure(legacy_rows_to_frame, tables)
+        try:
+            pd.testing.assert_frame_equal(legacy_df, current_df)
+            identical = True
+        except AssertionError:
+            identical = False
+        entry = {"rows": n_rows, "current_s": round(current_s, 4), "legacy_s": round(legacy_s, 4),
+                 "speedup": round(legacy_s / current_s, 2), "current_peak_mib": round(current_mib, 1),
+                 "legacy_peak_mib": round(legacy_mib, 1), "identical": identical}
+        results.append(entry)
+        print(f"{n_rows:>9} rows  current {entry['current_s']:>8}s {entry['current_peak_mib']:>7} MiB  "
+              f"legacy {entry['legacy_s']:>8}s {entry['legacy_peak_mib']:>7} MiB  "
+              f"speedup {entry['speedup']}x  identical {identical}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark row classification and DataFrame construction.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "rows", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
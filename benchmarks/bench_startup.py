@@ -0,0 +1,97 @@
+"""
+Benchmark GUI startup imports with `python -X importtime`.
+
+Imports a module (pdf_to_excel_app by default) in fresh interpreters and
+reports the best total import time over a few runs, the slowest modules
+by cumulative time, and whether any of the heavy modules that the GUI
+loads in the background (pandas, pdfplumber, openpyxl, numpy) were
+imported before the window could appear. For comparison it also times
+importing the extractor itself, which is the cost the GUI defers.
+
+Exits with status 1 when a heavy module is imported at startup or the
+total exceeds --max-ms, so it can guard against regressions in CI.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --max-ms 150 --json results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the GUI must not import before its window appears
+HEAVY_MODULES = ("pandas", "pdfplumber", "pdfminer", "openpyxl", "numpy")
+
+
+def import_times(module, python=sys.executable):
+    """
+    Import a module in a fresh interpreter under -X importtime.
+
+    Returns:
+        dict: {module name: (self_us, cumulative_us)} for every module imported
+    """
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # The column header
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def measure(module, repeat=5, top=10):
+    """Best of `repeat` cold imports of a module, with its slowest dependencies."""
+    runs = [import_times(module) for _ in range(repeat)]
+    best = min(runs, key=lambda times: times[module][1])
+    slowest = sorted(best.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(best[module][1] / 1000, 1),
+        "modules": len(best),
+        "heavy_modules": sorted(name for name in best if name.split(".")[0] in HEAVY_MODULES
+                                and "." not in name),
+        "slowest": [{"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(own / 1000, 1)}
+                    for name, (own, cumulative) in slowest],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GUI startup imports.")
+    parser.add_argument("--module", default="pdf_to_excel_app", help="Module to import (default: pdf_to_excel_app)")
+    parser.add_argument("--repeat", type=int, default=5, help="Cold imports per module; the best is reported")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail when the startup import takes longer")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    startup = measure(args.module, args.repeat)
+    deferred = measure("extract_transactions_simple", args.repeat)
+    print(f"{args.module}: {startup['total_ms']} ms for {startup['modules']} modules")
+    for entry in startup["slowest"]:
+        print(f"  {entry['cumulative_ms']:>8} ms  {entry['module']}")
+    print(f"extract_transactions_simple (imported in the background): {deferred['total_ms']} ms")
+
+    failures = []
+    if startup["heavy_modules"]:
+        failures.append(f"heavy modules imported at startup: {', '.join(startup['heavy_modules'])}")
+    if args.max_ms is not None and startup["total_ms"] > args.max_ms:
+        failures.append(f"startup import took {startup['total_ms']} ms (limit {args.max_ms} ms)")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "startup", "startup": startup, "deferred": deferred,
+                       "failures": failures}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Benchmark the batched XIRR solver against one call per portfolio.
+
+Builds synthetic portfolios (monthly-ish purchases over ten years and a
+final value) and solves them all with one utils.xirr.xirr call and with a
+loop of single-group calls, checking that both give the same rates.
+
+Usage:
+    python benchmarks/bench_xirr.py
+    python benchmarks/bench_xirr.py --portfolios 1000 10000 --flows 120 --json results.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.xirr import xirr  # noqa: E402
+
+
+def make_portfolios(n_portfolios, flows, seed=0):
+    """Cash flows of n portfolios: purchases on random dates and a final value on 2025-06-30."""
+    rng = np.random.default_rng(seed)
+    groups = np.repeat(np.arange(n_portfolios), flows)
+    dates = np.datetime64("2015-01-01") + rng.integers(0, 3650, len(groups)).astype("timedelta64[D]")
+    amounts = -rng.uniform(100, 1000, len(groups))
+    last = np.arange(n_portfolios) * flows
+    dates[last] = np.datetime64("2025-06-30")
+    amounts[last] = 0
+    # Final values between a 70% loss and a tripling
+    amounts[last] = rng.uniform(0.3, 3, n_portfolios) * -np.bincount(groups, amounts)
+    return amounts, dates, groups
+
+
+def run(portfolio_counts, flows, loop_max):
+    results = []
+    for n_portfolios in portfolio_counts:
+        amounts, dates, groups = make_portfolios(n_portfolios, flows)
+        start = time.perf_counter()
+        rates = xirr(amounts, dates, groups)
+        batched_s = time.perf_counter() - start
+
+        # The loop is timed on at most loop_max portfolios and scaled up
+        n_loop = min(n_portfolios, loop_max)
+        starts = np.searchsorted(groups, np.arange(n_loop + 1))
+        start = time.perf_counter()
+        looped = np.array([xirr(amounts[starts[i]:starts[i + 1]], dates[starts[i]:starts[i + 1]])
+                           for i in range(n_loop)])
+        loop_s = (time.perf_counter() - start) * n_portfolios / n_loop
+
+        entry = {"portfolios": n_portfolios, "flows": n_portfolios * flows, "batched_s": round(batched_s, 4),
+                 "loop_s": round(loop_s, 4), "speedup": round(loop_s / batched_s, 1),
+                 "unsolved": int(np.isnan(rates).sum()),
+                 "identical": bool(np.allclose(rates[:n_loop], looped, rtol=1e-9, atol=1e-12, equal_nan=True))}
+        results.append(entry)
+        print(f"{n_portfolios:>7} portfolios  batched {entry['batched_s']:>8}s  loop {entry['loop_s']:>8}s  "
+              f"speedup {entry['speedup']}x  unsolved {entry['unsolved']}  identical {entry['identical']}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the batched XIRR solver.")
+    parser.add_argument("--portfolios", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--flows", type=int, default=60, help="Cash flows per portfolio")
+    parser.add_argument("--loop-max", type=int, default=1000,
+                        help="Time the one-call-per-portfolio loop on at most this many portfolios")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.portfolios, args.flows, args.loop_max)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "xirr", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
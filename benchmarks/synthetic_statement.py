@@ -0,0 +1,308 @@
+"""
+Synthetic broker statements in the layout of Sample_Data/Main.PDF.
+
+Writes PDFs of any length (10 to 10,000+ pages) with no dependencies beyond
+the standard library: landscape pages with a ruled header row, one table per
+scrip with a 'Scrip_Symbol :' marker row and its transaction rows (some with
+a two-line Narration cell), a bold subtotal line under each table and an
+"i of N" page footer. Every cell is drawn as a ruled rectangle so pdfplumber's
+line-based table detection sees the same structure as in real statements.
+Optionally a text-only cover page comes first and summary pages (a ruled
+table of totals and a disclaimer, with no transactions) come last.
+
+Usage:
+    python benchmarks/synthetic_statement.py statement_1000.pdf --pages 1000
+"""
+import argparse
+import random
+import string
+import zlib
+from datetime import date, timedelta
+
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+FONT_SIZE = 10
+
+# Cell boundaries of the transaction/header rows and of the two kinds of marker rows
+DATA_COLUMNS = [14, 112, 210, 373, 438, 503, 568, 634, 700, 766, 832]
+SCRIP_COLUMNS = [12, 147, 832]
+CLIENT_COLUMNS = [10, 145, 832]
+HEADER = ["Company", "Date", "Narration", "B.Qty", "B.Rate", "S.Qty", "S.Rate", "N.Qty", "N.Rate", "N.Amt"]
+NUMERIC_FROM = 3  # Cells from this index on are right-aligned numbers
+
+HEADER_HEIGHT = 15
+ROW_HEIGHT = 16
+TWO_LINE_ROW_HEIGHT = 25
+SUBTOTAL_HEIGHT = 15
+LINE_SPACING = 12.58
+FIRST_PAGE_TOP = 80
+PAGE_TOP = 24
+PAGE_BOTTOM = 560
+
+CLIENT_NAME = "SYNTHETIC CLIENT"
+CLIENT = f"N1M0178 - {CLIENT_NAME}"
+
+# Helvetica advance widths (1/1000 em) for the characters used in right-aligned numbers
+_NUMBER_WIDTHS = dict.fromkeys("0123456789", 556)
+_NUMBER_WIDTHS.update({",": 278, ".": 278, "-": 333})
+
+
+def _number_width(text):
+    return sum(_NUMBER_WIDTHS[char] for char in text) * FONT_SIZE / 1000
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _PageCanvas:
+    """Collects the drawing operators of one page (coordinates are top-down like pdfplumber's)."""
+
+    def __init__(self):
+        self.ops = ["0.5 w"]
+
+    def rect(self, x0, top, x1, bottom):
+        self.ops.append(f"{x0} {PAGE_HEIGHT - bottom} {x1 - x0} {bottom - top} re S")
+
+    def text(self, x, top, value, bold=False, size=FONT_SIZE):
+        baseline = PAGE_HEIGHT - (top + size * 0.8)
+        font = "F2" if bold else "F1"
+        self.ops.append(f"BT /{font} {size} Tf {x:.2f} {baseline:.2f} Td ({_escape(value)}) Tj ET")
+
+    def row(self, columns, top, height, cells, bold=False):
+        """Draw one ruled row; `cells` holds one str (or list of lines) per cell."""
+        for idx, (x0, x1) in enumerate(zip(columns, columns[1:])):
+            self.rect(x0, top, x1, top + height)
+            lines = cells[idx] if isinstance(cells[idx], list) else [cells[idx]]
+            for line_idx, line in enumerate(lines):
+                if not line:
+                    continue
+                line_top = top + 2.7 + line_idx * LINE_SPACING
+                if columns is DATA_COLUMNS and idx >= NUMERIC_FROM and not bold:
+                    self.text(x1 - 2 - _number_width(line), line_top, line)
+                else:
+                    self.text(x0 + 2, line_top, line, bold=bold)
+
+    def content(self):
+        return "\n".join(self.ops).encode("latin-1")
+
+
+class _PdfWriter:
+    """Minimal streaming PDF writer: objects are written as they come and indexed at the end."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def obj(self, number, body):
+        self.offsets[number] = self.f.tell()
+        self.f.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def stream(self, number, data):
+        compressed = zlib.compress(data, 6)
+        self.obj(number, f"<< /Length {len(compressed)} /Filter /FlateDecode >>\nstream\n".encode()
+                 + compressed + b"\nendstream")
+
+    def close(self, root):
+        xref_offset = self.f.tell()
+        size = max(self.offsets) + 1
+        self.f.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for number in range(1, size):
+            self.f.write(f"{self.offsets[number]:010d} 00000 n \n".encode())
+        self.f.write(f"trailer\n<< /Size {size} /Root {root} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+
+def _amount(value):
+    return f"{value:,}"
+
+
+def _scrip_groups(rng, n_symbols, max_rows):
+    """Endless stream of (scrip row text, [transaction rows]) groups."""
+    symbols = []
+    for i in range(n_symbols):
+        name = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 10)))
+        symbols.append(f"{500000 + i * 7} {name}")
+    start = date(2024, 4, 1)
+
+    while True:
+        symbol = rng.choice(symbols)
+        rows = []
+        for row_idx in range(rng.randint(1, max_rows)):
+            day = (start + timedelta(days=rng.randint(0, 400))).isoformat()
+            qty = rng.randint(1, 1000)
+            rate = rng.randint(1, 5000)
+            if row_idx == 0 and rng.random() < 0.5:
+                narration = ["OPENING:CARRY FORWARD", "DATA FROM 2024"]
+                buy_qty = buy_rate = 0
+            else:
+                narration = [f"Setl : M-{rng.randint(2025000, 2025999)}"]
+                buy_qty, buy_rate = qty, rate
+            rows.append(["BSE_CASH", day, narration, _amount(buy_qty), _amount(buy_rate), "0", "0",
+                         _amount(qty), _amount(rate), _amount(-qty * rate)])
+        yield f"{symbol} - {CLIENT_NAME}", rows
+
+
+def _write_document_start(writer, total_pages):
+    """Catalog, page tree and fonts; pages are objects 5, 7, 9, ... with their content streams after them."""
+    kids = " ".join(f"{5 + 2 * i} 0 R" for i in range(total_pages))
+    writer.obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    writer.obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {total_pages} >>".encode())
+    writer.obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    writer.obj(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+
+def write_pages(path, pages):
+    """
+    Write a PDF of hand-drawn pages (e.g. other statement layouts in tests).
+
+    Args:
+        path (str): Output PDF path
+        pages (list): One list of (columns, cells) ruled rows per page, drawn from the top down
+    """
+    with open(path, "wb") as f:
+        writer = _PdfWriter(f)
+        _write_document_start(writer, len(pages))
+        for page_idx, rows in enumerate(pages):
+            canvas = _PageCanvas()
+            top = PAGE_TOP
+            for columns, cells in rows:
+                canvas.row(columns, top, ROW_HEIGHT, cells)
+                top += ROW_HEIGHT
+            _write_page(writer, page_idx, canvas)
+        writer.close(root=1)
+
+
+def _write_page(writer, page_idx, canvas):
+    page_obj = 5 + 2 * page_idx
+    writer.obj(page_obj, (
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+        f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {page_obj + 1} 0 R >>").encode())
+    writer.stream(page_obj + 1, canvas.content())
+
+
+def _cover_page():
+    canvas = _PageCanvas()
+    canvas.text(299.32, 120, "SYNTHETIC SECURITIES LTD.", size=16)
+    canvas.text(334.95, 150, "Global Details As on 26/05/2025", size=12)
+    canvas.text(334.95, 180, f"Client: {CLIENT}")
+    canvas.text(334.95, 200, "Statement period: 01/04/2024 to 26/05/2025")
+    return canvas
+
+
+def _summary_page(rng, summary_idx):
+    """A ruled table of totals and a disclaimer: tables and numbers, but no transaction rows."""
+    canvas = _PageCanvas()
+    canvas.text(14, PAGE_TOP, f"Account summary ({summary_idx + 1})", bold=True, size=12)
+    top = PAGE_TOP + 30
+    for label in ("Total buy value", "Total sell value", "Brokerage", "Taxes and charges", "Net obligation"):
+        canvas.row([14, 300, 500], top, ROW_HEIGHT, [label, _amount(rng.randint(1000, 10 ** 7))])
+        top += ROW_HEIGHT
+    for line_idx in range(20):
+        canvas.text(14, top + 20 + line_idx * LINE_SPACING,
+                    "This statement is computer generated and does not require a signature. Please report "
+                    "any discrepancy within 7 days of receipt.")
+    return canvas
+
+
+def _group_height(rows):
+    return ROW_HEIGHT + sum(TWO_LINE_ROW_HEIGHT if len(row[2]) > 1 else ROW_HEIGHT for row in rows) + SUBTOTAL_HEIGHT
+
+
+def generate_statement(path, pages, seed=0, n_symbols=200, max_rows_per_scrip=4, cover_page=False,
+                       summary_pages=0):
+    """
+    Write a synthetic statement PDF.
+
+    Args:
+        path (str): Output PDF path
+        pages (int): Number of transaction pages
+        seed (int): Random seed; the same arguments always give the same file
+        n_symbols (int): Size of the scrip pool
+        max_rows_per_scrip (int): Upper bound on transaction rows per scrip table
+        cover_page (bool): Start with a text-only cover page
+        summary_pages (int): Pages of account totals and disclaimers after the transactions
+
+    Returns:
+        dict: {"pages", "transactions", "scrip_tables"} describing what was written
+    """
+    rng = random.Random(seed)
+    groups = _scrip_groups(rng, n_symbols, max_rows_per_scrip)
+    transactions = 0
+    scrip_tables = 0
+    first = 1 if cover_page else 0
+    total_pages = first + pages + summary_pages
+
+    with open(path, "wb") as f:
+        writer = _PdfWriter(f)
+        _write_document_start(writer, total_pages)
+
+        if cover_page:
+            _write_page(writer, 0, _cover_page())
+
+        pending = next(groups)
+        for page_idx in range(pages):
+            canvas = _PageCanvas()
+            top = FIRST_PAGE_TOP if page_idx == 0 else PAGE_TOP
+            if page_idx == 0:
+                canvas.text(299.32, 11.96, "SYNTHETIC SECURITIES LTD.", size=12)
+                canvas.text(334.95, 25.96, "Global Details As on 26/05/2025", size=12)
+
+            # The first table on every page starts with the header row (and the client row on page 1)
+            canvas.row(DATA_COLUMNS, top, HEADER_HEIGHT, HEADER, bold=True)
+            top += HEADER_HEIGHT
+            if page_idx == 0:
+                canvas.row(CLIENT_COLUMNS, top, ROW_HEIGHT, ["CLIENT_ID :", CLIENT])
+                top += ROW_HEIGHT
+
+            first_group = True
+            while first_group or top + _group_height(pending[1]) <= PAGE_BOTTOM:
+                # Each scrip is its own table, closed by a subtotal line
+                scrip_text, rows = pending
+                canvas.row(SCRIP_COLUMNS, top, ROW_HEIGHT, ["Scrip_Symbol :", scrip_text])
+                top += ROW_HEIGHT
+                for row in rows:
+                    height = TWO_LINE_ROW_HEIGHT if len(row[2]) > 1 else ROW_HEIGHT
+                    canvas.row(DATA_COLUMNS, top, height, row)
+                    top += height
+
+                # Subtotal line under the table, outside the ruled cells
+                n_qty = sum(int(row[7].replace(",", "")) for row in rows)
+                n_amt = sum(int(row[9].replace(",", "")) for row in rows)
+                b_qty = sum(int(row[3].replace(",", "")) for row in rows)
+                for column_idx, value in ((3, b_qty), (5, 0), (7, n_qty), (9, n_amt)):
+                    text = _amount(value)
+                    canvas.text(DATA_COLUMNS[column_idx + 1] - 2 - _number_width(text), top + 2.9, text, bold=True)
+                top += SUBTOTAL_HEIGHT
+
+                transactions += len(rows)
+                scrip_tables += 1
+                first_group = False
+                pending = next(groups)
+
+            canvas.text(400, PAGE_BOTTOM + 15, f"{first + page_idx + 1} of {total_pages}")
+            _write_page(writer, first + page_idx, canvas)
+
+        for summary_idx in range(summary_pages):
+            _write_page(writer, first + pages + summary_idx, _summary_page(rng, summary_idx))
+
+        writer.close(root=1)
+
+    return {"pages": total_pages, "transactions": transactions, "scrip_tables": scrip_tables}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic broker statement PDF.")
+    parser.add_argument("output", help="PDF path to write")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cover-page", action="store_true", help="Start with a text-only cover page")
+    parser.add_argument("--summary-pages", type=int, default=0, help="Pages of totals and disclaimers at the end")
+    args = parser.parse_args(argv)
+    info = generate_statement(args.output, args.pages, seed=args.seed, cover_page=args.cover_page,
+                              summary_pages=args.summary_pages)
+    print(f"Wrote {args.output}: {info['pages']} pages, {info['transactions']} transactions")
+
+
+if __name__ == "__main__":
+    main()
@@ -66,7 +66,7 @@ a = Analysis(['pdf_to_excel_app.py'],
              pathex=[],
              binaries=[],
              datas=added_files,
-             hiddenimports=['pandas', 'openpyxl', 'pdfplumber', 'PIL', 'numpy'],
+             hiddenimports=['extract_transactions_simple', 'pandas', 'openpyxl', 'pdfplumber', 'PIL', 'numpy'],
              hookspath=[],
              hooksconfig={},
              runtime_hooks=[],
@@ -5,11 +5,22 @@ Helps examine tables, text, and other elements to help with customizing extracti
 import pdfplumber
 import sys
 import os
+from utils.page_cache import PageTableCache
+from utils.page_filter import PageFilter
+from utils.statement_templates import resolve_statement_template
 
-def explore_pdf(pdf_path):
+def explore_pdf(pdf_path, cache=None):
     """
     Explore the structure of a PDF file to help with extraction.
     Prints tables, their dimensions, and other useful information.
+
+    If a PageTableCache is given, tables found by a previous run (of this
+    script, or of extract_transactions_simple with page_filter=False) are
+    reused instead of being detected again. Filtered runs are cached under
+    their own key, so a page they skipped still shows its tables here.
+
+    Each page also shows the page filter's verdict (why the extractor reads
+    it, or that it skips it), to check a page that was skipped by mistake.
     """
     if not os.path.exists(pdf_path):
         print(f"Error: File not found: {pdf_path}")
@@ -19,6 +30,11 @@ def explore_pdf(pdf_path):
         print(f"\nExploring PDF: {pdf_path}\n")
         print("=" * 80)
         
+        cache_key = cache.key(pdf_path) if cache is not None else None
+        cached_pages = cache.get(cache_key) if cache is not None else None
+        found_pages = []
+        page_filter = PageFilter.for_template(resolve_statement_template(None, pdf_path)[0])
+        
         with pdfplumber.open(pdf_path) as pdf:
             # Get basic PDF information
             print(f"Number of pages: {len(pdf.pages)}")
@@ -28,8 +44,12 @@ def explore_pdf(pdf_path):
                 print(f"\nPAGE {page_num + 1}:")
                 print("-" * 40)
                 
-                # Extract tables
-                tables = page.extract_tables()
+                # Extract tables (or reuse the cached ones)
+                if cached_pages is not None:
+                    tables = cached_pages[page_num]
+                else:
+                    tables = page.extract_tables()
+                    found_pages.append(tables)
                 if tables:
                     print(f"Found {len(tables)} tables on page {page_num + 1}")
                     
@@ -60,10 +80,16 @@ def explore_pdf(pdf_path):
                 else:
                     print("No tables found on this page")
                     
+                reason = page_filter.check(page)
+                print(f"\n  Page filter: {'read (' + reason + ')' if reason else 'skipped'}")
+                
                 # Get page text for troubleshooting
                 text = page.extract_text()
                 text_preview = text[:200] + "..." if text and len(text) > 200 else text
                 print(f"\n  Text preview:\n  {text_preview}")
+        
+        if cache is not None and cached_pages is None:
+            cache.put(cache_key, found_pages)
 
     except Exception as e:
         print(f"Error exploring PDF: {str(e)}")
@@ -73,5 +99,8 @@ if __name__ == "__main__":
         pdf_path = sys.argv[1]
     else:
         pdf_path = input("Enter path to PDF file to explore: ")
+    
+    # Pass --cache to reuse (and store) detected tables in the shared page-table cache
+    cache = PageTableCache() if "--cache" in sys.argv[2:] else None
         
-    explore_pdf(pdf_path)
+    explore_pdf(pdf_path, cache)
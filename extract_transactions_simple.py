@@ -1,317 +1,993 @@
+import numpy as np
 import pandas as pd
 import pdfplumber
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
 import os
 import re
 from datetime import datetime
 import sys
+import time
+import multiprocessing
 
-def extract_transactions_simple(pdf_path, output_excel_path=None):
+from utils import words_engine
+from utils.columnar_output import FORMAT_EXTENSIONS, TableWriter, output_format_for, portfolio_path, write_table
+from utils.extraction_stats import NULL_STATS, ExtractionStats, resolve_stats
+from utils.incremental_state import IncrementalState, decode_batch
+from utils.logger import setup_logger
+from utils.page_filter import page_filter_settings, resolve_page_filter
+from utils.pdf_source import describe_source, is_path, open_pdf, source_name, worker_source
+from utils.progress import NEVER_CANCELLED, POLL_INTERVAL, ExtractionCancelled, ExtractionProgress, resolve_cancel_token
+from utils.sqlite_sink import SqliteSink
+from utils.statement_templates import GLOBAL_DETAILS, resolve_statement_template
+from utils.table_template import TableTemplate
+from utils.price_provider import fill_portfolio_prices, open_price_provider, price_date
+from utils.xirr import portfolio_xirr
+
+# Table engines: pdfplumber's general table finder, or the word/ruling row clustering in utils.words_engine
+TABLE_ENGINES = ("pdfplumber", "words")
+
+
+def _release_page(page):
+    """Drop a page's cached layout objects once its tables have been extracted."""
+    if hasattr(page, "close"):
+        page.close()
+    else:
+        # pdfplumber < 0.10
+        page.flush_cache()
+
+
+def _extract_page_tables(page, template=None, engine="pdfplumber", table_settings=None):
     """
-    Extract transaction data from PDF tables using a simple approach:
-    - Keep rows that have data in more than 2 columns
-    - Skip rows that only have data in first 2 columns (like Scrip_Symbol rows)
+    Extract a page's tables with the chosen engine, against the column template
+    when it fits the page.
+
+    An empty template (no columns yet) is learned from this page's full detection.
+    Templates and table_settings (the statement layout's pdfplumber settings) only
+    apply to the pdfplumber engine.
+
+    Returns:
+        tuple: (tables, used_template)
+    """
+    if engine == "words":
+        return words_engine.extract_tables(page), False
     
+    if template is not None and template.columns:
+        try:
+            tables = template.extract_tables(page)
+        except Exception as e:
+            # A page the template cannot read still gets full detection
+            print(f"Column template failed on page {page.page_number}: {e}")
+            tables = None
+        if tables is not None:
+            return tables, True
+        return page.extract_tables(table_settings), False
+
+    if template is None:
+        return page.extract_tables(table_settings), False
+
+    found = page.find_tables(table_settings)
+    tables = [table.extract() for table in found]
+    template.learn(page, found, tables)
+    return tables, False
+
+
+def _read_page_tables(page, template=None, engine="pdfplumber", table_settings=None, page_filter=None,
+                      stats=NULL_STATS):
+    """
+    _extract_page_tables behind the page filter: a page whose text rules out
+    transactions gets no tables without running table detection.
+
+    The filter's check is timed as the "page_filter" stage. It includes
+    parsing the page's characters, which table detection then reuses.
+
+    Returns:
+        tuple: (tables, used_template, skipped)
+    """
+    if page_filter is not None:
+        with stats.stage("page_filter"):
+            keep = page_filter.keep(page)
+        if not keep:
+            return [], False, True
+    tables, used_template = _extract_page_tables(page, template, engine, table_settings)
+    return tables, used_template, False
+
+
+# Set in each pool worker by _init_page_worker when the PDF is in memory rather than a file
+_worker_pdf = None
+
+
+def _init_page_worker(pdf_bytes):
+    """Pool initializer: keep the in-memory PDF, sent once per worker instead of with every task."""
+    global _worker_pdf
+    _worker_pdf = pdf_bytes
+
+
+def _extract_tables_for_pages(task):
+    """
+    Worker entry point: open the PDF independently and extract the tables
+    of a run of pages.
+
     Args:
-        pdf_path (str): Path to the PDF file
-        output_excel_path (str, optional): Path to save Excel file. If None, uses PDF name + '_extraction.xlsx'
-    
+        task (tuple): (pdf_path, page_numbers, template, engine, table_settings, page_filter); pdf_path is None
+            for the worker's in-memory PDF
+
     Returns:
-        pd.DataFrame: DataFrame containing all extracted transaction data
+        list: (page_num, tables, used_template, skipped, seconds) tuples in page order
     """
-    print(f"Processing PDF: {pdf_path}")
-    
-    # Set default output path if not provided
-    if output_excel_path is None:
-        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-        output_excel_path = f"{base_name}_extraction.xlsx"
+    pdf_path, page_numbers, template, engine, table_settings, page_filter = task
+    results = []
+    with open_pdf(pdf_path if pdf_path is not None else _worker_pdf) as pdf:
+        for page_num in page_numbers:
+            page = pdf.pages[page_num]
+            start = time.perf_counter()
+            tables, used_template, skipped = _read_page_tables(page, template, engine, table_settings, page_filter)
+            results.append((page_num, tables, used_template, skipped, time.perf_counter() - start))
+            _release_page(page)
+    return results
+
+
+def _next_chunk(chunks, cancel_token):
+    """The pool's next result (None when there are no more), checking for cancellation while waiting."""
+    if cancel_token is NEVER_CANCELLED:
+        return next(chunks, None)
+    while True:
+        cancel_token.raise_if_cancelled()
+        try:
+            return chunks.next(timeout=POLL_INTERVAL)
+        except multiprocessing.TimeoutError:
+            continue
+        except StopIteration:
+            return None
+
+
+def _iter_page_tables(pdf_path, workers=None, template=None, engine="pdfplumber", stats=NULL_STATS, pages=None,
+                      cancel_token=NEVER_CANCELLED, table_settings=None, page_filter=None):
+    """
+    Yield the raw tables of every page (or of the given pages) in page order.
+
+    With workers > 1 the pages are split into contiguous chunks that are
+    extracted by a process pool (each worker opens the PDF itself); results
+    are still yielded strictly in page order so callers see the same stream
+    as the serial path.
+
+    Args:
+        pdf_path (str | bytes | file-like | mmap): Path to the PDF file, or the PDF in memory (see utils.pdf_source)
+        workers (int, optional): Number of worker processes. None or 1 runs serially.
+        template (TableTemplate, optional): Column template to read pages against. An empty
+            template is learned from the first page with tables.
+        engine (str): Table engine, one of TABLE_ENGINES
+        stats (ExtractionStats, optional): Receives the open and tables stages and per-page table times
+        pages (list, optional): Ascending zero-based page numbers to read instead of all pages
+        cancel_token (CancellationToken, optional): Checked before each page and while waiting for the pool
+        table_settings (dict, optional): pdfplumber table settings of the statement layout
+        page_filter (PageFilter, optional): Text-layer check run before table detection; pages it rules out
+            are yielded with no tables and recorded with stats.skip_page()
+
+    Yields:
+        tuple: (page_num, page_count, tables)
+    """
+    template_pages = 0
+    skipped_pages = []
+    parallel = workers is not None and workers > 1
+    with stats.stage("open"):
+        pdf = open_pdf(pdf_path)
+        page_count = len(pdf.pages)
+    page_numbers = range(page_count) if pages is None else pages
+    with pdf:
+        position = 0
+        # Serially every page is read here; with a pool, only the pages needed to learn
+        # the template, since the workers need it
+        while position < len(page_numbers) and (not parallel or (template is not None and not template.columns)):
+            page_num = page_numbers[position]
+            cancel_token.raise_if_cancelled()
+            with stats.stage("tables"):
+                start = time.perf_counter()
+                page = pdf.pages[page_num]
+                tables, used_template, skipped = _read_page_tables(page, template, engine, table_settings,
+                                                                   page_filter, stats)
+                _release_page(page)
+                stats.record_page(page_num, time.perf_counter() - start)
+            if skipped:
+                skipped_pages.append(page_num)
+                stats.skip_page(page_num)
+            template_pages += used_template
+            yield page_num, page_count, tables
+            position += 1
     
-    all_transactions = []
-    column_names = None
+    if position < len(page_numbers):
+        # A few chunks per worker keeps the pool balanced without reopening the PDF for every page
+        remaining = page_numbers[position:]
+        chunk_size = max(1, -(-len(remaining) // (workers * 4)))
+        # Workers open a file themselves; an in-memory PDF is sent to each worker once, as bytes
+        source = worker_source(pdf_path)
+        in_memory = not is_path(source)
+        tasks = [(None if in_memory else source, remaining[start:start + chunk_size], template, engine, table_settings,
+                  page_filter) for start in range(0, len(remaining), chunk_size)]
+
+        with multiprocessing.Pool(processes=min(workers, len(tasks)),
+                                  initializer=_init_page_worker if in_memory else None,
+                                  initargs=(source,) if in_memory else ()) as pool:
+            chunks = pool.imap(_extract_tables_for_pages, tasks)
+            while True:
+                # In this process the tables stage is the time spent waiting for the workers.
+                # Leaving the loop early (e.g. on cancellation) terminates the pool.
+                with stats.stage("tables"):
+                    results = _next_chunk(chunks, cancel_token)
+                if results is None:
+                    break
+                for page_num, tables, used_template, skipped, seconds in results:
+                    stats.record_page(page_num, seconds)
+                    if skipped:
+                        skipped_pages.append(page_num)
+                        stats.skip_page(page_num)
+                    template_pages += used_template
+                    yield page_num, page_count, tables
     
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            # Process each page
-            for page_num, page in enumerate(pdf.pages):
-                print(f"Processing page {page_num+1} of {len(pdf.pages)}")
-                
-                # Extract tables from the page
-                tables = page.extract_tables()
-                
-                for table_idx, table in enumerate(tables):
-                    if not table or len(table) < 1:
-                        continue
-                    
-                    print(f"Found table {table_idx+1} on page {page_num+1} with {len(table)} rows")
-                    
-                    # Get column names from the first table's first row
-                    if column_names is None and page_num == 0 and table_idx == 0:
-                        # Get the column names and filter out None values
-                        column_names = []
-                        for i, col in enumerate(table[0]):
-                            if col is not None and col.strip():  # Only add non-empty columns
-                                column_names.append(col)
-                        
-                        # Add "Scrip_Symbol" as the first column name (KEEP ORIGINAL LOGIC)
-                        column_names.insert(0, "Scrip_Symbol")
-                        
-                        print(f"Using column names: {column_names}")
-
-                        # Skip the header row for the first table
-                        start_row = 1
-                    else:
-                        # For subsequent tables, process all rows
-                        start_row = 0
-                    
-                    # Process rows
-                    current_scrip_symbol = None  # To track the current script symbol
-                    current_bom_id = None  # To track the current BOM ID
-                    
-                    for row_idx, row in enumerate(table[start_row:], start_row):
-                        # Check if this is a Scrip_Symbol row
-                        if row and len(row) > 2 and row[0] == 'Scrip_Symbol :' and row[2] is not None:
-                            # Extract the scrip symbol and BOM ID (e.g., "500116 IDBI - MITHIL DEEPAK KOTWAL")
-                            full_symbol = row[2]
-                            
-                            # Extract BOM ID (first set of digits)
-                            bom_match = re.match(r'^(\d+)', full_symbol.strip())
-                            if bom_match:
-                                current_bom_id = bom_match.group(1)
-                            else:
-                                current_bom_id = None
-                            
-                            current_scrip_symbol = full_symbol
-                            continue  # Skip this row from the final output
-                        
-                        # Check if this is a row with more than 2 columns of data (transaction row)
-                        non_empty_cols = sum(1 for cell in row if cell is not None and str(cell).strip())
-                        
-                        # Only process rows with sufficient data (more than 2 columns)
-                        if non_empty_cols > 2:
-                            # This is a transaction row
-                            transaction = {}
-                            
-                            # Only add the current scrip symbol if the row has substantial data (8+ columns)
-                            # This prevents filling scrip symbol for empty/near-empty rows
-                            filled_cols_count = sum(1 for cell in row if cell is not None and str(cell).strip())
-                            
-                            if current_scrip_symbol and filled_cols_count >= 8:
-                                transaction[column_names[0]] = current_scrip_symbol
-                                # REMOVE BOM_ID handling here - keep original logic
-                            else:
-                                transaction[column_names[0]] = "Unknown"
-
-                            # Map the rest of the columns (KEEP ORIGINAL LOGIC)
-                            col_index = 1  # Start from 1 since we've already added Scrip_Symbol
-                            for cell in row:
-                                if cell is not None and col_index < len(column_names):
-                                    transaction[column_names[col_index]] = cell
-                                    col_index += 1
-                            
-                            all_transactions.append(transaction)
+    if template is not None:
+        stats.count("template_pages", template_pages)
+        print(f"Column template matched {template_pages} of {len(page_numbers)} pages")
+    if page_filter is not None:
+        # Listed by number so a page skipped by mistake can be looked at (explore_pdf.py shows the verdict)
+        listed = f": {', '.join(str(page_num + 1) for page_num in skipped_pages)}" if skipped_pages else ""
+        print(f"Page filter skipped {len(skipped_pages)} of {len(page_numbers)} pages{listed}")
+
+
+def _iter_cached_page_tables(pdf_path, workers=None, cache=None, template=None, engine="pdfplumber",
+                             stats=NULL_STATS, cancel_token=NEVER_CANCELLED, table_settings=None, page_filter=None):
+    """
+    Like _iter_page_tables, but served from (and stored into) a PageTableCache.
+
+    On a hit pdfplumber is never called (and an empty template stays empty).
+    On a miss every page's tables are collected while they are yielded and
+    stored once the whole document has been read, so an interrupted run never
+    leaves a partial entry. Template reads give the same tables as full
+    detection, so they share cache entries.
+
+    Args:
+        pdf_path (str | bytes | file-like | mmap): Path to the PDF file, or the PDF in memory (see utils.pdf_source)
+        workers (int, optional): Number of worker processes. None or 1 runs serially.
+        cache (PageTableCache, optional): Cache to use. None disables caching.
+        template (TableTemplate, optional): Column template passed on to _iter_page_tables
+        engine (str): Table engine, one of TABLE_ENGINES (part of the cache key)
+        stats (ExtractionStats, optional): Receives the cache stage, and _iter_page_tables' stages on a miss
+        cancel_token (CancellationToken, optional): Passed on to _iter_page_tables
+        table_settings (dict, optional): pdfplumber table settings (part of the cache key)
+        page_filter (PageFilter, optional): Passed on to _iter_page_tables (part of the cache key)
+
+    Yields:
+        tuple: (page_num, page_count, tables)
+    """
+    if cache is None:
+        yield from _iter_page_tables(pdf_path, workers, template, engine, stats, cancel_token=cancel_token,
+                                     table_settings=table_settings, page_filter=page_filter)
+        return
+
+    with stats.stage("cache"):
+        # The default engine reading every page keeps the original key (the one explore_pdf.py reads), so
+        # existing cache entries stay valid; a page filter gets its own key since skipped pages have no tables
+        settings = dict(table_settings or {}, **page_filter_settings(page_filter))
+        if engine != "pdfplumber":
+            settings["engine"] = engine
+        key = cache.key(pdf_path, settings or None)
+        pages = cache.get(key)
+    if pages is not None:
+        stats.count("cached_pages", len(pages))
+        print(f"Using cached tables for {len(pages)} pages")
+        for page_num, tables in enumerate(pages):
+            yield page_num, len(pages), tables
+        return
+
+    pages = []
+    for page_num, page_count, tables in _iter_page_tables(pdf_path, workers, template, engine, stats,
+                                                          cancel_token=cancel_token, table_settings=table_settings,
+                                                          page_filter=page_filter):
+        pages.append(tables)
+        yield page_num, page_count, tables
+    with stats.stage("cache"):
+        cache.put(key, pages)
+
+
+def _iter_incremental_page_tables(pdf_path, incremental, workers=None, template=None, engine="pdfplumber",
+                                  stats=NULL_STATS, cancel_token=NEVER_CANCELLED, table_settings=None,
+                                  page_filter=None):
+    """
+    Like _iter_page_tables, but pages whose fingerprint matches the previous
+    run are served from the IncrementalState instead of being read again.
+
+    Args:
+        pdf_path (str | bytes | file-like | mmap): Path to the PDF file, or the PDF in memory (see utils.pdf_source)
+        incremental (IncrementalState): Previous run's pages; receives this run's fingerprints
+        workers (int, optional): Number of worker processes for the changed pages. None or 1 runs serially.
+        template (TableTemplate, optional): Column template passed on to _iter_page_tables
+        engine (str): Table engine, one of TABLE_ENGINES
+        stats (ExtractionStats, optional): Receives the fingerprint stage, and _iter_page_tables' stages
+        cancel_token (CancellationToken, optional): Passed on to _iter_page_tables
+        table_settings (dict, optional): pdfplumber table settings passed on to _iter_page_tables
+        page_filter (PageFilter, optional): Passed on to _iter_page_tables
+
+    Yields:
+        tuple: (page_num, page_count, tables)
+    """
+    with stats.stage("fingerprint"):
+        with open_pdf(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+            changed = incremental.fingerprint(pdf)
+    print(f"{page_count - len(changed)} of {page_count} pages unchanged since the last run")
+    stats.count("unchanged_pages", page_count - len(changed))
     
-    except Exception as e:
-        print(f"Error processing PDF: {str(e)}")
-        return None
+    # Nothing is opened when every page is unchanged
+    extracted = _iter_page_tables(pdf_path, workers, template, engine, stats, pages=changed,
+                                  cancel_token=cancel_token, table_settings=table_settings, page_filter=page_filter)
+    for page_num in range(page_count):
+        tables = incremental.stored_tables(page_num)
+        if tables is None:
+            _, _, tables = next(extracted)
+        yield page_num, page_count, tables
+    # Let the extraction finish (closing the PDF and any worker pool)
+    next(extracted, None)
+
+
+class _TransactionColumns:
+    """
+    Transaction rows of one page, accumulated column by column.
+
+    A row fills the first few columns of the header (the Scrip_Symbol and
+    then its non-empty cells in order); the remaining columns get NaN, as
+    they would in a DataFrame built from one dict per row.
+    """
+
+    __slots__ = ("column_names", "columns", "width")
+
+    def __init__(self, column_names):
+        self.column_names = column_names
+        self.columns = [[] for _ in column_names]
+        # Widest row so far (number of leading columns filled)
+        self.width = 0
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def append(self, values):
+        """Add a row given its leading column values (at most one per column)."""
+        columns = self.columns
+        for column, value in zip(columns, values):
+            column.append(value)
+        for column in columns[len(values):]:
+            column.append(np.nan)
+        self.width = max(self.width, len(values))
+
+    def to_frame(self, index):
+        """The rows as a DataFrame over the full header, built from the columns directly."""
+        df = pd.DataFrame(dict(enumerate(self.columns)), index=index)
+        df.columns = self.column_names
+        return df
+
+
+def _table_rows_to_transactions(page_num, tables, state):
+    """
+    Turn the raw tables of one page into transaction records:
+    - Keep rows that have data in more than 2 columns
+    - Skip rows that only have data in first 2 columns (like Scrip_Symbol rows)
+
+    Args:
+        page_num (int): Zero-based page number
+        tables (list): Output of page.extract_tables() for this page
+        state (dict): Extraction state shared across pages ('column_names' is set from the document's first table;
+            'statement_template' is the layout's StatementTemplate, GLOBAL_DETAILS if not set)
+
+    Returns:
+        _TransactionColumns: The page's transaction rows (None if the page has no tables)
+    """
+    transactions = None
+    statement_template = state.get('statement_template') or GLOBAL_DETAILS
+    min_filled_cells = statement_template.min_filled_cells
     
-    # Convert to DataFrame
-    if all_transactions:
-        df = pd.DataFrame(all_transactions)
+    for table_idx, table in enumerate(tables):
+        if not table or len(table) < 1:
+            continue
         
-        # Clean data
-        # 1. Clean numeric columns - remove commas and convert to numbers
-        numeric_cols = ['B.Qty', 'B.Rate', 'S.Qty', 'S.Rate', 'N.Qty', 'N.Rate', 'N.Amt']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str)
-                df[col] = df[col].str.replace(',', '', regex=False)
-                df[col] = df[col].apply(
-                    lambda x: re.sub(r'[^\d.-]', '', str(x)) if pd.notna(x) and str(x).strip() else '')
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        print(f"Found table {table_idx+1} on page {page_num+1} with {len(table)} rows")
         
-        # 2. Clean and standardize dates
-        if 'Date' in df.columns:
-            def standardize_date(date_str):
-                if pd.isna(date_str) or not str(date_str).strip():
-                    return None
-                
-                date_str = str(date_str).strip()
-                try:
-                    # Try parsing with different formats
-                    formats = [
-                        '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d',
-                        '%d-%b-%Y', '%d %b %Y', '%b %d, %Y', '%B %d, %Y',
-                        '%d-%m-%y', '%d/%m/%y', '%y-%m-%d', '%y/%m/%d'
-                    ]
-                    
-                    for fmt in formats:
-                        try:
-                            return datetime.strptime(date_str, fmt).strftime('%Y-%m-%d')
-                        except ValueError:
-                            continue
-                            
-                    return date_str  # Return original if no format matches
-                except Exception:
-                    return date_str
-                    
-            df['Date'] = df['Date'].apply(standardize_date)
-        
-        # 3. Clean up multi-line text in cells
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].str.replace('\n', ' ', regex=False)
+        # Get column names from the first table's first row (on the first page with tables, after any cover pages)
+        if state['column_names'] is None:
+            # "Scrip_Symbol" followed by the non-empty header cells, renamed by the statement template
+            column_names = statement_template.column_names(table[0])
+            state['column_names'] = column_names
+            
+            print(f"Using column names: {column_names}")
+
+            # Skip the header row for the first table
+            start_row = 1
+        else:
+            # For subsequent tables, process all rows
+            start_row = 0
+        column_names = state['column_names']
+        if transactions is None:
+            transactions = _TransactionColumns(column_names)
+        max_cells = len(column_names) - 1
         
-        # 4. Remove duplicate header rows that might have been extracted as data
-        if 'Company' in df.columns and 'Date' in df.columns:
-            df = df[~((df['Company'] == 'Company') & (df['Date'] == 'Date'))]
+        # Process rows
+        current_scrip_symbol = None  # To track the current script symbol
+        current_bom_id = None  # To track the current BOM ID
         
-        # REMOVE dynamic BOM_ID column creation
-        # if 'BOM_ID' not in df.columns:
-        #     df.insert(1, 'BOM_ID', None)
-
-        # REMOVE dynamic column_names update
-        # if 'BOM_ID' not in column_names:
-        #     column_names.insert(1, 'BOM_ID')
-
-        # Before creating portfolio summary, fix Unknown scrip symbols by propagating the last valid symbol
-        if 'Scrip_Symbol' in df.columns:
-            last_valid_symbol = None
-            for idx, row in df.iterrows():
-                current = row['Scrip_Symbol']
-                if current != 'Unknown' and pd.notna(current) and str(current).strip():
-                    last_valid_symbol = current
-                elif last_valid_symbol is not None:
-                    df.at[idx, 'Scrip_Symbol'] = last_valid_symbol
-
-        # 5. Clean up the Scrip_Symbol column and extract BOM IDs (ENHANCED LOGIC)
-        if 'Scrip_Symbol' in df.columns:
-            df['Scrip_Symbol'] = df['Scrip_Symbol'].astype(str)
-            
-            def clean_scrip_symbol_and_extract_bom(symbol):
-                # First remove any "Scrip_Symbol :" prefix
-                symbol = symbol.replace('Scrip_Symbol :', '').strip()
+        for row_idx, row in enumerate(table[start_row:], start_row):
+            # Check if this is a Scrip_Symbol row (marker and symbol cells come from the statement template)
+            full_symbol = statement_template.symbol_of(row) if row else None
+            if full_symbol is not None:
+                # Extract the scrip symbol and BOM ID (e.g., "500116 IDBI - MITHIL DEEPAK KOTWAL")
                 
-                # Extract BOM ID if present (first set of digits before space)
-                bom_id = None
-                bom_match = re.match(r'^(\d+)', symbol)
+                # Extract BOM ID (first set of digits)
+                bom_match = re.match(r'^(\d+)', full_symbol.strip())
                 if bom_match:
-                    bom_id = bom_match.group(1)  # Extract "544325"
-                    # Remove the BOM ID from symbol
-                    symbol = re.sub(r'^\d+\s*', '', symbol)  # Remove "544325 "
-                
-                # If there's a dash, take only the part before it
-                if ' - ' in symbol:
-                    symbol = symbol.split(' - ')[0].strip()  # "ITCHOTELS - NAME" -> "ITCHOTELS"
-                
-                # Handle duplicate symbols (e.g., "CDSL CDSL" -> "CDSL")
-                words = symbol.split()
-                if len(words) == 2 and words[0] == words[1]:
-                    symbol = words[0]
-                elif len(words) > 1:
-                    # Remove spaces for single-word symbols
-                    symbol = ''.join(words) if all(word.isalpha() for word in words) else symbol
+                    current_bom_id = bom_match.group(1)
+                else:
+                    current_bom_id = None
                 
-                # Handle special cases
-                if symbol.startswith('BSE '):
-                    symbol = 'BSE'
-                
-                return symbol, bom_id
+                current_scrip_symbol = full_symbol
+                continue  # Skip this row from the final output
             
-            # Apply cleaning and BOM extraction
-            cleaned_data = df['Scrip_Symbol'].apply(clean_scrip_symbol_and_extract_bom)
-            df['Scrip_Symbol'] = [item[0] for item in cleaned_data]
+            # Check if this is a row with more than 2 columns of data (transaction row)
+            non_empty_cols = sum(1 for cell in row if cell is not None and str(cell).strip())
             
-            # ADD BOM_ID column with extracted values
-            df.insert(1, 'BOM_ID', [item[1] for item in cleaned_data])
-
-        # Remove rows with very few filled columns - this will prevent empty lines after the transaction table
-        if 'N.Qty' in df.columns:
-            # Count non-empty cells in each row
-            df['filled_columns'] = df.apply(lambda row: sum(pd.notna(val) and str(val).strip() != '' for val in row), axis=1)
-            # Keep only rows with sufficient data (8+ filled columns)
-            df = df[df['filled_columns'] >= 8]
-            # Drop the helper column
-            df = df.drop('filled_columns', axis=1)
+            # Only process rows with sufficient data (more than 2 columns)
+            if non_empty_cols > 2:
+                # This is a transaction row
+                # Only add the current scrip symbol if the row has substantial data (8+ columns by default)
+                # This prevents filling scrip symbol for empty/near-empty rows
+                if current_scrip_symbol and non_empty_cols >= min_filled_cells:
+                    values = [current_scrip_symbol]
+                    # REMOVE BOM_ID handling here - keep original logic
+                else:
+                    values = ["Unknown"]
+
+                # Map the rest of the columns (KEEP ORIGINAL LOGIC): the non-empty cells fill the
+                # columns after Scrip_Symbol in order
+                values.extend([cell for cell in row if cell is not None][:max_cells])
+                
+                transactions.append(values)
+    
+    return transactions
+
+
+# Columns holding amounts/quantities with thousands separators
+NUMERIC_COLUMNS = ['B.Qty', 'B.Rate', 'S.Qty', 'S.Rate', 'N.Qty', 'N.Rate', 'N.Amt']
+# Portfolio summary columns filled by a price provider
+PRICE_COLUMNS = ['Current_Price', 'Value']
+
+# Date formats tried in order for every Date value
+DATE_FORMATS = [
+    '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d',
+    '%d-%b-%Y', '%d %b %Y', '%b %d, %Y', '%B %d, %Y',
+    '%d-%m-%y', '%d/%m/%y', '%y-%m-%d', '%y/%m/%d'
+]
+
+
+def standardize_date(date_str):
+    """Convert a date string in any of DATE_FORMATS to YYYY-MM-DD (unparseable values are returned unchanged)."""
+    if pd.isna(date_str) or not str(date_str).strip():
+        return None
+    
+    date_str = str(date_str).strip()
+    try:
+        # Try parsing with different formats
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(date_str, fmt).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+                
+        return date_str  # Return original if no format matches
+    except Exception:
+        return date_str
+
+
+def detect_date_format(values, sample_size=50):
+    """
+    Detect the date format used by a column from a sample of its values.
+
+    Each sampled value votes for the first format in DATE_FORMATS that
+    parses it (the same rule standardize_date applies), and the most common
+    winner is returned.
+
+    Args:
+        values (iterable): Stripped, non-empty date strings (ideally distinct)
+        sample_size (int): Maximum number of values to try
+
+    Returns:
+        str: The detected format, or None if no sampled value parses
+    """
+    votes = {}
+    for value in list(values)[:sample_size]:
+        for fmt in DATE_FORMATS:
+            try:
+                datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            votes[fmt] = votes.get(fmt, 0) + 1
+            break
+    return max(votes, key=votes.get) if votes else None
+
+
+def standardize_dates(dates, date_format=None):
+    """
+    Column-level equivalent of applying standardize_date to every value.
+
+    Each distinct value is parsed only once. The statement's format (given,
+    or detected from a sample) is applied to all distinct values in a single
+    vectorized to_datetime call. Only outliers go through standardize_date
+    one by one: values that format does not parse, and values an earlier
+    format in DATE_FORMATS would also parse.
+
+    Args:
+        dates (pd.Series): Raw Date column
+        date_format (str, optional): Known format from an earlier batch; detected when None
+
+    Returns:
+        tuple: (pd.Series of YYYY-MM-DD strings aligned with `dates`, format used)
+    """
+    codes, uniques = pd.factorize(dates)
+    stripped = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    results = pd.Series(None, index=stripped.index, dtype=object)
+    candidates = stripped[stripped != '']
+
+    if date_format is None:
+        date_format = detect_date_format(candidates)
+
+    outliers = candidates
+    if date_format is not None and len(candidates) > 0:
+        parsed = pd.to_datetime(candidates, format=date_format, errors='coerce')
+        fast = parsed.notna()
+        # standardize_date takes the first matching format, so values an earlier format also accepts are outliers
+        for earlier_format in DATE_FORMATS[:DATE_FORMATS.index(date_format)]:
+            fast &= pd.to_datetime(candidates, format=earlier_format, errors='coerce').isna()
+        results[fast[fast].index] = parsed[fast].dt.strftime('%Y-%m-%d')
+        outliers = candidates[~fast]
+
+    for idx, value in outliers.items():
+        results[idx] = standardize_date(value)
+
+    mapped = results.to_numpy()
+    if (codes == -1).any():
+        # Missing values get code -1, which picks the appended None
+        mapped = np.append(mapped, [None])
+    return pd.Series(mapped[codes], index=dates.index), date_format
+
+
+# Bump whenever clean_scrip_symbol_and_extract_bom changes so persisted results are not reused
+SYMBOL_NORMALIZER_VERSION = 1
+
+
+def clean_scrip_symbol_and_extract_bom(symbol):
+    """
+    Normalize a raw Scrip_Symbol value and split off its BOM ID.
+
+    e.g. "500116 IDBI - MITHIL DEEPAK KOTWAL" -> ("IDBI", "500116")
+
+    Returns:
+        tuple: (symbol, bom_id) where bom_id is None if the value has no leading digits
+    """
+    # First remove any "Scrip_Symbol :" prefix
+    symbol = symbol.replace('Scrip_Symbol :', '').strip()
+    
+    # Extract BOM ID if present (first set of digits before space)
+    bom_id = None
+    bom_match = re.match(r'^(\d+)', symbol)
+    if bom_match:
+        bom_id = bom_match.group(1)  # Extract "544325"
+        # Remove the BOM ID from symbol
+        symbol = re.sub(r'^\d+\s*', '', symbol)  # Remove "544325 "
+    
+    # If there's a dash, take only the part before it
+    if ' - ' in symbol:
+        symbol = symbol.split(' - ')[0].strip()  # "ITCHOTELS - NAME" -> "ITCHOTELS"
+    
+    # Handle duplicate symbols (e.g., "CDSL CDSL" -> "CDSL")
+    words = symbol.split()
+    if len(words) == 2 and words[0] == words[1]:
+        symbol = words[0]
+    elif len(words) > 1:
+        # Remove spaces for single-word symbols
+        symbol = ''.join(words) if all(word.isalpha() for word in words) else symbol
+    
+    # Handle special cases
+    if symbol.startswith('BSE '):
+        symbol = 'BSE'
+    
+    return symbol, bom_id
+
+
+def _map_distinct(values, func, na_value=np.nan):
+    """
+    Apply a column-wise function to the distinct non-null values of a Series
+    only, then broadcast the results back onto every row.
+
+    Statement columns repeat heavily (symbols, dates, rates), and pandas string
+    methods run per element, so this does far less work than calling func on
+    the whole column.
+
+    Args:
+        values (pd.Series): Column to transform
+        func (callable): Takes a Series of distinct values, returns an array-like of the same length
+        na_value: Result for null input values
+
+    Returns:
+        pd.Series: Transformed values aligned with `values`
+    """
+    codes, uniques = pd.factorize(values)
+    mapped = np.asarray(func(pd.Series(uniques, dtype=object)))
+    if (codes == -1).any():
+        # Missing values get code -1, which picks the appended na_value
+        mapped = np.append(mapped, [na_value])
+    return pd.Series(mapped[codes], index=values.index)
+
+
+def _to_number(values):
+    """Strip commas and any other non-numeric characters, then convert to numbers."""
+    cleaned = values.astype(str).str.replace(',', '', regex=False)
+    cleaned = cleaned.str.replace(r'[^\d.-]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce')
+
+
+def _is_blank(values):
+    """True for values that are empty once converted to text and stripped."""
+    return values.astype(str).str.strip() == ''
+
+
+def normalize_scrip_symbols(raw_symbols, state):
+    """
+    Normalize a Scrip_Symbol column through a mapping table of distinct raw values.
+
+    clean_scrip_symbol_and_extract_bom runs at most once per distinct raw
+    symbol per run. Results are kept in state['symbol_map'] across batches
+    and, if state['symbol_dictionary'] holds a SymbolDictionary, are looked
+    up in and saved to that persistent store.
+
+    Args:
+        raw_symbols (pd.Series): Raw (forward-filled) Scrip_Symbol values
+        state (dict): Extraction state shared across pages
+
+    Returns:
+        tuple: (symbols, bom_ids) as pd.Series aligned with raw_symbols
+    """
+    symbol_map = state.setdefault('symbol_map', {})
+    dictionary = state.get('symbol_dictionary')
+    
+    codes, uniques = pd.factorize(raw_symbols.astype(str))
+    missing = [raw for raw in uniques if raw not in symbol_map]
+    if missing and dictionary is not None:
+        symbol_map.update(dictionary.lookup(missing, SYMBOL_NORMALIZER_VERSION))
+        missing = [raw for raw in missing if raw not in symbol_map]
+    if missing:
+        normalized = {raw: clean_scrip_symbol_and_extract_bom(raw) for raw in missing}
+        symbol_map.update(normalized)
+        if dictionary is not None:
+            dictionary.add(normalized, SYMBOL_NORMALIZER_VERSION)
+    
+    table = [symbol_map[raw] for raw in uniques]
+    symbols = np.array([item[0] for item in table], dtype=object)
+    bom_ids = np.array([item[1] for item in table], dtype=object)
+    return (pd.Series(symbols[codes], index=raw_symbols.index),
+            pd.Series(bom_ids[codes], index=raw_symbols.index))
+
+
+def _clean_transactions(df, state):
+    """
+    Clean a batch of transaction rows. Every step works on whole columns;
+    the only state carried between batches is the last valid Scrip_Symbol
+    (state['last_valid_symbol']) used for the forward fill, so batches can be
+    cleaned one page at a time.
+
+    The numeric, date and repeated-header columns and the filled-cell threshold
+    come from state['statement_template'] (GLOBAL_DETAILS if not set).
+
+    Args:
+        df (pd.DataFrame): Raw transaction rows
+        state (dict): Extraction state shared across pages
+
+    Returns:
+        pd.DataFrame: Cleaned rows (with the BOM_ID column added)
+    """
+    statement_template = state.get('statement_template') or GLOBAL_DETAILS
+    
+    # Clean data
+    # 1. Clean numeric columns - remove commas and any other non-numeric characters, then convert to numbers
+    for col in statement_template.numeric_columns:
+        if col in df.columns:
+            df[col] = _map_distinct(df[col], _to_number)
+    
+    # 2. Clean and standardize dates (format detected once per document and column, each distinct value parsed once)
+    # ('Date' keeps its format in state['date_format'], other date columns in state['date_formats'])
+    for col in statement_template.date_columns:
+        if col == 'Date' and 'Date' in df.columns:
+            df['Date'], state['date_format'] = standardize_dates(df['Date'], state.get('date_format'))
+        elif col in df.columns:
+            date_formats = state.get('date_formats') or {}
+            df[col], date_format = standardize_dates(df[col], date_formats.get(col))
+            # Replaced rather than updated: incremental state keeps references to earlier pages' values
+            state['date_formats'] = {**date_formats, col: date_format}
+    
+    # 3. Clean up multi-line text in cells
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = _map_distinct(df[col], lambda values: values.str.replace('\n', ' ', regex=False))
+    
+    # 4. Remove duplicate header rows that might have been extracted as data
+    header_columns = statement_template.repeated_header_columns
+    if header_columns and all(col in df.columns for col in header_columns):
+        repeated_header = np.logical_and.reduce([df[col] == col for col in header_columns])
+        df = df[~repeated_header].copy()
+
+    # Before creating portfolio summary, fix Unknown scrip symbols by propagating the last valid symbol
+    if 'Scrip_Symbol' in df.columns:
+        symbols = df['Scrip_Symbol']
+        valid = symbols.notna() & (symbols != 'Unknown') & ~_map_distinct(symbols, _is_blank, na_value=True)
+        filled = symbols.where(valid).ffill()
+        if state['last_valid_symbol'] is not None:
+            filled = filled.fillna(state['last_valid_symbol'])
+        # Rows before any valid symbol keep their original value
+        df['Scrip_Symbol'] = filled.where(filled.notna(), symbols)
+        if valid.any():
+            state['last_valid_symbol'] = symbols[valid].iloc[-1]
+
+    # 5. Clean up the Scrip_Symbol column and extract BOM IDs (ENHANCED LOGIC)
+    if 'Scrip_Symbol' in df.columns:
+        symbols, bom_ids = normalize_scrip_symbols(df['Scrip_Symbol'], state)
+        df['Scrip_Symbol'] = symbols
         
-        # Instead of using multiple sheets, we'll place everything in one sheet
-        # Create a summary portfolio dataframe
-        portfolio_df = None
-        if 'Scrip_Symbol' in df.columns and 'N.Qty' in df.columns:
-            # Group by Scrip_Symbol and sum N.Qty, also get the first BOM_ID for each symbol
-            portfolio_df = df.groupby('Scrip_Symbol').agg({
-                'N.Qty': 'sum',
-                'BOM_ID': 'first'  # Take first BOM_ID for each symbol
-            }).reset_index()
-
-            # Add Current_Price column (will add formula later)
-            portfolio_df['Current_Price'] = ''
-            # Add Value column (will add formula later)
-            portfolio_df['Value'] = ''
-            print(f"Created Portfolio summary with {len(portfolio_df)} unique securities")
+        # ADD BOM_ID column with extracted values
+        df.insert(1, 'BOM_ID', bom_ids)
+
+    # Remove rows with very few filled columns - this will prevent empty lines after the transaction table
+    if 'N.Qty' in df.columns:
+        # Count non-empty cells in each row (numbers only need to be present, text must be non-blank)
+        filled_columns = pd.Series(0, index=df.index)
+        for col in df.columns:
+            values = df[col]
+            filled = values.notna()
+            if not pd.api.types.is_numeric_dtype(values):
+                filled &= ~_map_distinct(values, _is_blank, na_value=True)
+            filled_columns += filled
+        # Keep only rows with sufficient data (8+ filled columns by default)
+        df = df[filled_columns >= statement_template.min_filled_cells]
+    
+    # Optionally hand back real dates instead of YYYY-MM-DD strings (unparseable values become NaT)
+    if state.get('dates_as_datetime'):
+        for col in statement_template.date_columns:
+            if col in df.columns:
+                df = df.assign(**{col: pd.to_datetime(df[col], format='%Y-%m-%d', errors='coerce')})
+    
+    return df
+
+
+def _check_engine(engine):
+    """Raise ValueError for an engine not in TABLE_ENGINES."""
+    if engine not in TABLE_ENGINES:
+        raise ValueError(f"Unknown table engine {engine!r}; expected one of {', '.join(TABLE_ENGINES)}")
+
+
+def _batch_columns(column_names):
+    """Columns of a batch cleaned on the full header: _clean_transactions adds BOM_ID after Scrip_Symbol."""
+    return column_names[:1] + ['BOM_ID'] + column_names[1:]
+
+
+def _open_template(template):
+    """
+    Resolve the `template` argument of the extraction functions.
+
+    Returns:
+        tuple: (TableTemplate or None, path to save a newly learned template to or None)
+    """
+    if template is None or template is False:
+        return None, None
+    if template is True:
+        return TableTemplate(), None
+    if isinstance(template, TableTemplate):
+        return template, None
+    if os.path.exists(template):
+        return TableTemplate.load(template), None
+    return TableTemplate(), template
+
+
+def iter_transaction_batches(pdf_path, workers=None, cache=None, dates_as_datetime=False,
+                             symbol_dictionary=None, template=None, engine="pdfplumber", stats=None,
+                             incremental=None, progress=None, cancel_token=None, statement_template=None,
+                             page_filter=True, on_columns=None):
+    """
+    Extract and clean transactions one page at a time.
+
+    Each page's layout objects are released as soon as its tables have been
+    extracted, so memory stays flat regardless of the page count.
+
+    Args:
+        pdf_path (str | bytes | file-like | mmap): Path to the PDF file, or the PDF in memory (see utils.pdf_source)
+        workers (int, optional): Extract pages in parallel with this many processes. None or 1 runs serially.
+        cache (PageTableCache, optional): Reuse raw page tables from this cache; re-runs on an unchanged PDF skip pdfplumber.
+        dates_as_datetime (bool): Return the Date column as datetime64 instead of YYYY-MM-DD strings.
+        symbol_dictionary (SymbolDictionary, optional): Persistent store of normalized scrip symbols shared across runs.
+        template (TableTemplate | str | bool, optional): Read pages against a column template. True learns one
+            from the first page; a path loads the JSON template there, or learns one and saves it there if the file does not exist yet.
+        engine (str): "pdfplumber" (default) for pdfplumber's table finder, or "words" for the faster row clustering
+            on page words and rulings (utils.words_engine).
+        stats (ExtractionStats | bool, optional): Collect per-stage wall/CPU time, per-page table-finding times
+            (and, with ExtractionStats(trace_memory=True), peak memory) into this object; True creates one.
+        incremental (IncrementalState | str, optional): Sidecar file (or open IncrementalState) of a previous run
+            on an earlier version of this statement. Only new or changed pages go through table detection, rows
+            of unchanged leading pages are reused, and the sidecar is rewritten for the next run. Replaces cache.
+        progress (callable, optional): Called with an ExtractionProgress (stage "page") after every page.
+        cancel_token (CancellationToken, optional): Checked before every page; once cancelled, the iteration
+            raises ExtractionCancelled (utils.progress) without saving the template or incremental state.
+        statement_template (StatementTemplate | str, optional): Statement layout (utils.statement_templates):
+            a template, the name of a registered one or a JSON template path. None detects it from the first
+            page's header among the registered templates.
+        page_filter (PageFilter | bool): Skip table detection on pages whose text has no column header, scrip
+            marker or dated numeric rows (utils.page_filter). True uses the statement layout's filter; False
+            reads every page.
+        on_columns (callable, optional): Called once, before the first batch, with the columns of the document's
+            full header. Batches leave out trailing columns no row has reached yet, so a later batch can be
+            wider than the first; writers with a fixed schema (TableWriter.set_columns) take these instead.
+
+    Yields:
+        tuple: (page_num, pd.DataFrame) with the cleaned transactions of each page that has any
+    """
+    _check_engine(engine)
+    statement_template, detected = resolve_statement_template(statement_template, pdf_path)
+    if detected:
+        print(f"Detected statement template: {statement_template.name}")
+    table_settings = statement_template.table_settings if engine == "pdfplumber" else None
+    page_filter = resolve_page_filter(page_filter, statement_template)
+    
+    state = {'column_names': None, 'last_valid_symbol': None, 'row_count': 0, 'max_width': 0,
+             'date_format': None, 'date_formats': {}, 'dates_as_datetime': dates_as_datetime,
+             'symbol_map': {}, 'symbol_dictionary': symbol_dictionary, 'statement_template': statement_template}
+    
+    # Column templates are learned and read with pdfplumber's default table settings
+    use_template = engine == "pdfplumber" and table_settings is None
+    template, template_path = _open_template(template) if use_template else (None, None)
+    stats = resolve_stats(stats)
+    cancel_token = resolve_cancel_token(cancel_token)
+    rows_so_far = 0
+
+    def page_done(page_num, page_count, rows):
+        nonlocal rows_so_far
+        rows_so_far += rows
+        if progress is not None:
+            progress(ExtractionProgress("page", page_num + 1, page_count, rows_so_far))
+
+    def announce_columns():
+        nonlocal on_columns
+        if on_columns is not None:
+            on_columns(_batch_columns(state['column_names']))
+            on_columns = None
+
+    if isinstance(incremental, str):
+        # Stored rows are only valid for the same table engine, date type, statement layout and library versions
+        settings = {'engine': engine, 'dates_as_datetime': dates_as_datetime, 'pdfplumber': pdfplumber.__version__,
+                    'normalizer': SYMBOL_NORMALIZER_VERSION}
+        if statement_template is not GLOBAL_DETAILS:
+            # The default layout keeps the original settings so existing sidecars stay valid
+            settings['statement_template'] = statement_template.to_dict()
+        settings.update(page_filter_settings(page_filter))
+        incremental = IncrementalState(incremental, settings)
+    
+    # Process each page (tables arrive in page order, serially or from the worker pool)
+    if incremental is not None:
+        pages = _iter_incremental_page_tables(pdf_path, incremental, workers, template, engine, stats, cancel_token,
+                                              table_settings, page_filter)
+    else:
+        pages = _iter_cached_page_tables(pdf_path, workers, cache, template, engine, stats, cancel_token,
+                                         table_settings, page_filter)
+    # Pages are spliced in from the previous run until the first one whose tables changed
+    splicing = incremental is not None
+    
+    for page_num, page_count, tables in pages:
+        cancel_token.raise_if_cancelled()
+        print(f"Processing page {page_num+1} of {page_count}")
+        stats.count("pages")
         
-        # Save to Excel with transactions and portfolio in the same sheet
-        with pd.ExcelWriter(output_excel_path, engine='openpyxl') as writer:
-            # Write transactions to the first part of the sheet
-            df.to_excel(writer, sheet_name='Transactions', index=False)
-            
-            # Get worksheet reference
-            worksheet = writer.sheets['Transactions']
-            
-            # Find the actual last row with transaction data by examining the worksheet
-            last_transaction_row = 0
-            for row in range(len(df), 0, -1):
-                # Check if row has content in key columns
-                row_in_sheet = row + 1  # +1 for header
-                if worksheet.cell(row=row_in_sheet, column=1).value:  # Check Scrip_Symbol
-                    last_transaction_row = row_in_sheet
-                    break
-            
-            if last_transaction_row == 0:
-                # Fallback: use length + header
-                last_transaction_row = len(df) + 1
-            
-            # Add Portfolio_Value row after the last actual transaction row
-            portfolio_value_row = last_transaction_row + 1
+        if splicing:
+            previous = incremental.reusable_page(page_num, tables)
+            if previous is not None:
+                state.update(previous['state'])
+                incremental.record(page_num, tables, previous['batch'], state)
+                stats.count("reused_pages")
+                if previous['batch'] is not None:
+                    batch = decode_batch(previous['batch'])
+                    stats.count("rows", len(batch))
+                    page_done(page_num, page_count, len(batch))
+                    announce_columns()
+                    yield page_num, batch
+                else:
+                    page_done(page_num, page_count, 0)
+                continue
+            splicing = False
+        
+        with stats.stage("rows"):
+            transactions = _table_rows_to_transactions(page_num, tables, state)
+        if not transactions:
+            if incremental is not None:
+                incremental.record(page_num, tables, None, state)
+            page_done(page_num, page_count, 0)
+            continue
+        
+        with stats.stage("clean"):
+            # Build the batch on the full header so every page is cleaned the same way,
+            # and number rows as a single DataFrame over the whole document would
+            column_names = state['column_names']
+            first_row = state['row_count']
+            state['row_count'] += len(transactions)
+            state['max_width'] = max(state['max_width'], transactions.width)
+            df = transactions.to_frame(pd.RangeIndex(first_row, state['row_count']))
             
-            # Add Portfolio Value row with TODAY() in column 4 (Date column is now D)
-            worksheet.cell(row=portfolio_value_row, column=1, value="Portfolio_Value")
-            worksheet.cell(row=portfolio_value_row, column=4, value="=TODAY()")  # TODAY() in Date column (4)
+            df = _clean_transactions(df, state)
             
-            # If portfolio data exists, add it below with a 1-row gap
-            if portfolio_df is not None:
-                # Calculate the starting row for portfolio (Portfolio_Value row + 1 blank row)
-                portfolio_start_row = portfolio_value_row + 2
-                
-                # Write a header for the portfolio section
-                worksheet.cell(row=portfolio_start_row, column=1, value="PORTFOLIO SUMMARY")
-                
-                # Write column headers for the portfolio section
-                worksheet.cell(row=portfolio_start_row + 1, column=1, value="BOM_ID")
-                worksheet.cell(row=portfolio_start_row + 1, column=2, value="Scrip_Symbol")
-                worksheet.cell(row=portfolio_start_row + 1, column=3, value="Total_Quantity")
-                worksheet.cell(row=portfolio_start_row + 1, column=4, value="Current_Price")
-                worksheet.cell(row=portfolio_start_row + 1, column=5, value="Value")
-                
-                # Write portfolio data
-                for i, row in portfolio_df.iterrows():
-                    row_idx = portfolio_start_row + 2 + i  # +2 for portfolio header and column headers
-                    
-                    # Format BOM ID with BOM: prefix if available
-                    bom_formatted = f"BOM:{row['BOM_ID']}" if pd.notna(row['BOM_ID']) else ""
-                    worksheet.cell(row=row_idx, column=1, value=bom_formatted)
-                    
-                    # Format Scrip_Symbol with NSE: prefix
-                    nse_symbol = f"NSE:{row['Scrip_Symbol']}"
-                    worksheet.cell(row=row_idx, column=2, value=nse_symbol)
-                    
-                    # Write N.Qty
-                    worksheet.cell(row=row_idx, column=3, value=row['N.Qty'])
-                    
-                    # Enhanced GOOGLEFINANCE formula with time-based logic and NSE/BOM fallback
-                    nse_ref = worksheet.cell(row=row_idx, column=2).coordinate
-                    bom_ref = worksheet.cell(row=row_idx, column=1).coordinate
-                    
-                    # Time-based formula with NSE/BOM fallback
-                    price_formula = f'''=IFERROR(
+            # Drop columns no row has reached yet
+            unseen_columns = column_names[state['max_width']:]
+            if unseen_columns:
+                df = df.drop(columns=unseen_columns)
+        stats.count("rows", len(df))
+        if incremental is not None:
+            incremental.record(page_num, tables, df, state)
+        page_done(page_num, page_count, len(df))
+        
+        if len(df) > 0:
+            announce_columns()
+            yield page_num, df
+    
+    if template_path and template.columns:
+        template.save(template_path)
+        print(f"Saved column template to {template_path}")
+    if incremental is not None:
+        incremental.save()
+        print(f"Saved incremental state to {incremental.path}")
+
+
+def iter_transactions(pdf_path, workers=None, cache=None, dates_as_datetime=False,
+                      symbol_dictionary=None, template=None, engine="pdfplumber", stats=None,
+                      incremental=None, progress=None, cancel_token=None, statement_template=None,
+                      page_filter=True):
+    """
+    Stream cleaned transaction records page by page with bounded memory.
+
+    Args:
+        pdf_path (str | bytes | file-like | mmap): Path to the PDF file, or the PDF in memory (see utils.pdf_source)
+        workers (int, optional): Extract pages in parallel with this many processes. None or 1 runs serially.
+        cache (PageTableCache, optional): Reuse raw page tables from this cache; re-runs on an unchanged PDF skip pdfplumber.
+        dates_as_datetime (bool): Return the Date column as datetime64 instead of YYYY-MM-DD strings.
+        symbol_dictionary (SymbolDictionary, optional): Persistent store of normalized scrip symbols shared across runs.
+        template (TableTemplate | str | bool, optional): Read pages against a column template. True learns one
+            from the first page; a path loads the JSON template there, or learns one and saves it there if the file does not exist yet.
+        engine (str): "pdfplumber" (default) for pdfplumber's table finder, or "words" for the faster row clustering
+            on page words and rulings (utils.words_engine).
+        stats (ExtractionStats | bool, optional): Collect per-stage wall/CPU time, per-page table-finding times
+            (and, with ExtractionStats(trace_memory=True), peak memory) into this object; True creates one.
+        incremental (IncrementalState | str, optional): Sidecar file (or open IncrementalState) of a previous run
+            on an earlier version of this statement. Only new or changed pages go through table detection, rows
+            of unchanged leading pages are reused, and the sidecar is rewritten for the next run. Replaces cache.
+        progress (callable, optional): Called with an ExtractionProgress (stage "page") after every page.
+        cancel_token (CancellationToken, optional): Checked before every page; raises ExtractionCancelled once cancelled.
+        statement_template (StatementTemplate | str, optional): Statement layout; None detects it (see
+            iter_transaction_batches).
+        page_filter (PageFilter | bool): Text-layer page pre-filter (see iter_transaction_batches).
+
+    Returns:
+        iterator: One dict per cleaned transaction row, keyed by column name
+
+    Raises:
+        ValueError: If engine is not one of TABLE_ENGINES (raised here, not on the first next())
+    """
+    _check_engine(engine)
+    batches = iter_transaction_batches(pdf_path, workers, cache, dates_as_datetime, symbol_dictionary, template,
+                                       engine, stats, incremental, progress, cancel_token, statement_template,
+                                       page_filter)
+    return (record for page_num, batch in batches for record in batch.to_dict('records'))
+
+
+def _portfolio_price_formula(nse_ref, bom_ref):
+    """Enhanced GOOGLEFINANCE formula with time-based logic and NSE/BOM fallback."""
+    return f'''=IFERROR(
 IF(TIME(HOUR(NOW()),MINUTE(NOW()),0)>TIME(15,30,0),
 INDEX(GOOGLEFINANCE({nse_ref},"close",WORKDAY(TODAY(),0),WORKDAY(TODAY(),0)),2,2),
 INDEX(GOOGLEFINANCE({nse_ref},"close",WORKDAY(TODAY(),-1),WORKDAY(TODAY(),-1)),2,2)),
@@ -320,75 +996,447 @@ IF(TIME(HOUR(NOW()),MINUTE(NOW()),0)>TIME(15,30,0),
 INDEX(GOOGLEFINANCE({bom_ref},"close",WORKDAY(TODAY(),0),WORKDAY(TODAY(),0)),2,2),
 INDEX(GOOGLEFINANCE({bom_ref},"close",WORKDAY(TODAY(),-1),WORKDAY(TODAY(),-1)),2,2)),
 "Add manually"))'''
-                    
-                    worksheet.cell(row=row_idx, column=4, value=price_formula)
-                    
-                    # Add Value formula (quantity × price)
-                    qty_ref = worksheet.cell(row=row_idx, column=3).coordinate
-                    price_ref = worksheet.cell(row=row_idx, column=4).coordinate
-                    worksheet.cell(row=row_idx, column=5, value=f"={qty_ref}*{price_ref}")
-                
-                # Add TOTAL row
-                total_row = portfolio_start_row + 2 + len(portfolio_df)
-                worksheet.cell(row=total_row, column=2, value="TOTAL")
-                
-                # Add SUM formulas for the Total_Quantity and Value columns
-                first_qty_cell = worksheet.cell(row=portfolio_start_row+2, column=3).coordinate
-                last_qty_cell = worksheet.cell(row=total_row-1, column=3).coordinate
-                worksheet.cell(row=total_row, column=3, value=f"=SUM({first_qty_cell}:{last_qty_cell})")
-                
-                # Add SUM formula for the Value column
-                first_value_cell = worksheet.cell(row=portfolio_start_row+2, column=5).coordinate
-                last_value_cell = worksheet.cell(row=total_row-1, column=5).coordinate
-                total_value_cell = worksheet.cell(row=total_row, column=5, value=f"=SUM({first_value_cell}:{last_value_cell})")
-                
-                # Now update the Portfolio_Value row's N.Amt cell with reference to total portfolio value
-                total_value_ref = total_value_cell.coordinate
-                n_amt_col = None
-                for col_idx, col_name in enumerate(df.columns, 1):
-                    if col_name == "N.Amt":
-                        n_amt_col = col_idx
-                        break
-                
-                if n_amt_col:
-                    worksheet.cell(row=portfolio_value_row, column=n_amt_col, value=f"={total_value_ref}")
-                
-                # Add Portfolio XIRR row after a blank row
-                xirr_row = total_row + 2  # +2 for one blank row
-                worksheet.cell(row=xirr_row, column=1, value="Portfolio XIRR")
-                
-                # Add XIRR formula that uses transaction dates and amounts
-                # Find the N.Amt column (usually column 11)
-                n_amt_col = None
-                for col_idx, col_name in enumerate(df.columns, 1):
-                    if col_name == "N.Amt":
-                        n_amt_col = col_idx
-                        break
-                
-                if n_amt_col:
-                    # Create XIRR formula referencing dates (column 4) and N.Amt (column n_amt_col)
-                    # Transaction rows start from row 2 (after header) and go through the Portfolio_Value row
-                    date_range = f"D2:D{portfolio_value_row}"
-                    amount_range = f"{chr(64+n_amt_col)}2:{chr(64+n_amt_col)}{portfolio_value_row}"
-                    # Fix: correct parameter order - values first, then dates
-                    xirr_formula = f"=XIRR({amount_range},{date_range})"
-                    worksheet.cell(row=xirr_row, column=2, value=xirr_formula)
+
+
+def _sheet_footer(df, portfolio_df, priced=False):
+    """
+    Work out the cells written below the transactions: the Portfolio_Value row,
+    the portfolio summary with its TOTAL row and the Portfolio XIRR rows.
+
+    Row positions are computed from the DataFrame instead of being read back
+    from a worksheet, so the whole sheet can be written in one sequential pass.
+
+    Args:
+        df (pd.DataFrame): Cleaned transactions (written from row 2, under the header)
+        portfolio_df (pd.DataFrame): Portfolio summary, or None
+        priced (bool): Write portfolio_df's Current_Price and Value numbers (blank where unknown)
+            instead of GOOGLEFINANCE and value formulas
+
+    Returns:
+        tuple: ({row: {column: value}} of footer cells, layout dict) where the layout
+        gives the Portfolio_Value row, the portfolio security rows [first, last],
+        the TOTAL row and value cell, the N.Amt column letter and the XIRR cells
+    """
+    footer = {}
+    
+    def put(row, column, value):
+        footer.setdefault(row, {})[column] = value
+    
+    # The last transaction row is the last one with a Scrip_Symbol (first column) value
+    last_transaction_row = 0
+    if len(df.columns) > 0 and len(df) > 0:
+        first_column = df.iloc[:, 0].to_numpy(dtype=object)
+        has_value = np.fromiter((bool(value) and not pd.isna(value) for value in first_column),
+                                dtype=bool, count=len(first_column))
+        if has_value.any():
+            last_transaction_row = int(np.flatnonzero(has_value)[-1]) + 2  # +1 for header, +1 for 1-based rows
+    
+    if last_transaction_row == 0:
+        # Fallback: use length + header
+        last_transaction_row = len(df) + 1
+    
+    # Add Portfolio_Value row after the last actual transaction row
+    portfolio_value_row = last_transaction_row + 1
+    
+    # Add Portfolio Value row with TODAY() in column 4 (Date column is now D)
+    put(portfolio_value_row, 1, "Portfolio_Value")
+    put(portfolio_value_row, 4, "=TODAY()")  # TODAY() in Date column (4)
+    
+    layout = {'last_transaction_row': last_transaction_row, 'portfolio_value_row': portfolio_value_row}
+    
+    # If portfolio data exists, add it below with a 1-row gap
+    if portfolio_df is not None:
+        # Calculate the starting row for portfolio (Portfolio_Value row + 1 blank row)
+        portfolio_start_row = portfolio_value_row + 2
+        
+        # Write a header for the portfolio section
+        put(portfolio_start_row, 1, "PORTFOLIO SUMMARY")
+        
+        # Write column headers for the portfolio section
+        for column, header in enumerate(["BOM_ID", "Scrip_Symbol", "Total_Quantity", "Current_Price", "Value"], 1):
+            put(portfolio_start_row + 1, column, header)
+        
+        # Write portfolio data
+        first_security_row = portfolio_start_row + 2  # +2 for portfolio header and column headers
+        prices = portfolio_df['Current_Price'] if priced else [None] * len(portfolio_df)
+        values = portfolio_df['Value'] if priced else [None] * len(portfolio_df)
+        for i, (symbol, quantity, bom_id, price, value) in enumerate(zip(portfolio_df['Scrip_Symbol'],
+                                                                          portfolio_df['N.Qty'],
+                                                                          portfolio_df['BOM_ID'], prices, values)):
+            row_idx = first_security_row + i
+            
+            # Format BOM ID with BOM: prefix if available
+            put(row_idx, 1, f"BOM:{bom_id}" if pd.notna(bom_id) else "")
+            
+            # Format Scrip_Symbol with NSE: prefix
+            put(row_idx, 2, f"NSE:{symbol}")
+            
+            # Write N.Qty
+            put(row_idx, 3, quantity)
+            
+            if priced:
+                # Prices from the price provider; securities it has no price for are left blank
+                put(row_idx, 4, None if pd.isna(price) else float(price))
+                put(row_idx, 5, None if pd.isna(value) else float(value))
+            else:
+                # Price formula looks the NSE symbol up first, then the BOM ID
+                put(row_idx, 4, _portfolio_price_formula(f"B{row_idx}", f"A{row_idx}"))
                 
-                # Add Portfolio XIRR Percentage row
-                xirr_pct_row = xirr_row + 1
-                worksheet.cell(row=xirr_pct_row, column=1, value="Portfolio XIRR Percentage")
-                worksheet.cell(row=xirr_pct_row, column=2, value=f"={worksheet.cell(row=xirr_row, column=2).coordinate}*100")
+                # Add Value formula (quantity × price)
+                put(row_idx, 5, f"=C{row_idx}*D{row_idx}")
+        
+        # Add TOTAL row with SUM formulas for the Total_Quantity and Value columns
+        total_row = first_security_row + len(portfolio_df)
+        put(total_row, 2, "TOTAL")
+        put(total_row, 3, f"=SUM(C{first_security_row}:C{total_row - 1})")
+        put(total_row, 5, f"=SUM(E{first_security_row}:E{total_row - 1})")
+        
+        # Add Portfolio XIRR row after a blank row
+        xirr_row = total_row + 2  # +2 for one blank row
+        put(xirr_row, 1, "Portfolio XIRR")
+        
+        n_amt_col = df.columns.get_loc("N.Amt") + 1 if "N.Amt" in df.columns else None
+        if n_amt_col:
+            # Portfolio_Value row's N.Amt cell references the total portfolio value
+            put(portfolio_value_row, n_amt_col, f"=E{total_row}")
+            
+            # XIRR over dates (column 4) and N.Amt from row 2 (after header) through the Portfolio_Value row
+            n_amt_letter = get_column_letter(n_amt_col)
+            date_range = f"D2:D{portfolio_value_row}"
+            amount_range = f"{n_amt_letter}2:{n_amt_letter}{portfolio_value_row}"
+            # Values first, then dates
+            put(xirr_row, 2, f"=XIRR({amount_range},{date_range})")
+        
+        # Add Portfolio XIRR Percentage row
+        xirr_pct_row = xirr_row + 1
+        put(xirr_pct_row, 1, "Portfolio XIRR Percentage")
+        put(xirr_pct_row, 2, f"=B{xirr_row}*100")
+        
+        layout.update({
+            'portfolio_start_row': portfolio_start_row,
+            'portfolio_rows': [first_security_row, total_row - 1],
+            'total_row': total_row,
+            'total_value_cell': f"E{total_row}",
+            'n_amt_column': get_column_letter(n_amt_col) if n_amt_col else None,
+            'xirr_cell': f"B{xirr_row}",
+            'xirr_pct_cell': f"B{xirr_pct_row}",
+        })
+    
+    return footer, layout
+
+
+def _write_transactions_workbook(output_excel_path, df, footer_cells):
+    """
+    Write the Transactions sheet in a single sequential pass with openpyxl's
+    write-only mode, so rows are streamed to disk instead of being held in an
+    in-memory workbook.
+
+    Args:
+        output_excel_path (str): Path of the .xlsx file to write
+        df (pd.DataFrame): Cleaned transactions, written under a header row
+        footer_cells (dict): {row: {column: value}} from _sheet_footer; merged over any transaction cells they share
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Transactions')
+    
+    # Header row styled the way pandas' to_excel styles it
+    thin = Side(style='thin')
+    header = []
+    for name in df.columns:
+        cell = WriteOnlyCell(worksheet, value=str(name))
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        header.append(cell)
+    worksheet.append(header)
+    
+    # Column values as plain Python objects, with missing values as empty cells
+    columns = []
+    for name in df.columns:
+        values = df[name].to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = None
+        columns.append(values.tolist())
+    
+    row_num = 1
+    for row_values in zip(*columns):
+        row_num += 1
+        overlay = footer_cells.get(row_num)
+        if overlay:
+            row_values = list(row_values)
+            for column, value in overlay.items():
+                row_values.extend([None] * (column - len(row_values)))
+                row_values[column - 1] = value
+        worksheet.append(row_values)
+    
+    # Footer rows below the transactions (blank rows between sections are kept)
+    last_footer_row = max(footer_cells) if footer_cells else row_num
+    for row_num in range(row_num + 1, last_footer_row + 1):
+        cells = footer_cells.get(row_num, {})
+        row_values = [None] * (max(cells) if cells else 0)
+        for column, value in cells.items():
+            row_values[column - 1] = value
+        worksheet.append(row_values)
+    
+    workbook.save(output_excel_path)
+
+
+def extract_transactions_simple(pdf_path, output_excel_path=None, workers=None, cache=None, dates_as_datetime=False,
+                                symbol_dictionary=None, template=None, engine="pdfplumber", stats=None,
+                                incremental=None, output_format=None, on_batch=None, progress=None,
+                                cancel_token=None, prices=None, statement_template=None, portfolio_output=None,
+                                page_filter=True):
+    """
+    Extract transaction data from PDF tables using a simple approach:
+    - Keep rows that have data in more than 2 columns
+    - Skip rows that only have data in first 2 columns (like Scrip_Symbol rows)
+    
+    Args:
+        pdf_path (str | bytes | file-like | mmap): Path to the PDF file, or the PDF itself as bytes, a seekable
+            binary file object or an mmap (read in place, without a temporary file; see utils.pdf_source)
+        output_excel_path (str | file-like | bool, optional): Path to save the output to. If None, uses PDF name +
+            '_extraction.xlsx' (or the extension of output_format). A writable binary file object (e.g. io.BytesIO)
+            receives the output instead of a file (not for "sqlite"); False writes nothing and only returns the
+            DataFrame.
+        workers (int, optional): Extract pages in parallel with this many processes. None or 1 runs serially.
+        cache (PageTableCache, optional): Reuse raw page tables from this cache; re-runs on an unchanged PDF skip pdfplumber.
+        dates_as_datetime (bool): Return the Date column as datetime64 instead of YYYY-MM-DD strings.
+        symbol_dictionary (SymbolDictionary, optional): Persistent store of normalized scrip symbols shared across runs.
+        template (TableTemplate | str | bool, optional): Read pages against a column template. True learns one
+            from the first page; a path loads the JSON template there, or learns one and saves it there if the file does not exist yet.
+        engine (str): "pdfplumber" (default) for pdfplumber's table finder, or "words" for the faster row clustering
+            on page words and rulings (utils.words_engine).
+        stats (ExtractionStats | bool, optional): Collect per-stage wall/CPU time, per-page table-finding times
+            (and, with ExtractionStats(trace_memory=True), peak memory) into this object; True creates one.
+        incremental (bool | str, optional): Incremental re-extraction of a statement that grows between runs
+            (see iter_transaction_batches). True keeps the sidecar next to the output as '<output>.state';
+            a string is the sidecar path.
+        output_format (str, optional): "xlsx", "parquet", "arrow" (IPC file), "csv" or "sqlite". Defaults to the
+            output path's extension, else xlsx. The columnar formats are streamed in row groups while pages are
+            extracted, with the portfolio summary in a separate '<name>_portfolio' table (utils.columnar_output).
+            "sqlite" upserts the transactions and portfolio into a database shared by many statements
+            (utils.sqlite_sink).
+        on_batch (callable, optional): Called with (page_num, batch) as soon as each page's cleaned rows are ready,
+            e.g. to stream them to a client before the output file is written.
+        progress (callable, optional): Called with an ExtractionProgress (utils.progress) when the PDF is opened,
+            after every page, at each later stage, and finally with stage "done", "failed" (with a message) or
+            "cancelled". Runs on the converting thread.
+        cancel_token (CancellationToken, optional): Checked between pages and stages; once cancelled, partial
+            output is removed and ExtractionCancelled is raised.
+        prices (PriceProvider | str, optional): Fill the portfolio's Current_Price and Value from this price
+            provider, or from a local CSV/Parquet price snapshot at this path (utils.price_provider), and use
+            them as current values for XIRR. None writes GOOGLEFINANCE formulas instead (xlsx only).
+        statement_template (StatementTemplate | str, optional): Statement layout (utils.statement_templates): a
+            template, the name of a registered one or a JSON template path. None detects it from the first page's
+            header among the registered templates.
+        portfolio_output (file-like, optional): Writable binary file object for the portfolio table of a columnar
+            format when output_excel_path is a file object (it is not written otherwise).
+        page_filter (PageFilter | bool): Skip table detection on pages whose text has no column header, scrip
+            marker or dated numeric rows (utils.page_filter); the skipped pages are printed and counted as
+            "skipped_pages" in stats. True uses the statement layout's filter; False reads every page.
+    
+    Returns:
+        pd.DataFrame: DataFrame containing all extracted transaction data. df.attrs['layout']
+        describes where the portfolio block, N.Amt column and XIRR cells were written (for columnar
+        formats, where the portfolio table was written), df.attrs['xirr'] holds the per-scrip and
+        portfolio XIRR computed by utils.xirr.portfolio_xirr, and with stats enabled df.attrs['stats']
+        holds ExtractionStats.to_dict().
+    
+    Raises:
+        ExtractionCancelled: If cancel_token was cancelled before the output was complete
+        ValueError: If engine is not one of TABLE_ENGINES, the price snapshot has no price column or no
+            symbol/BOM_ID column, or the output is a file object (or False) with sqlite output or incremental=True
+    """
+    print(f"Processing PDF: {describe_source(pdf_path)}")
+    _check_engine(engine)
+    price_provider = open_price_provider(prices)
+    stats = resolve_stats(stats)
+    cancel_token = resolve_cancel_token(cancel_token)
+    # The output is a file (path), a caller's stream, or nothing at all
+    to_file = output_excel_path is None or is_path(output_excel_path)
+    to_stream = not to_file and output_excel_path is not False
+    output_format = output_format_for(output_excel_path if to_file else None, output_format)
+    if not to_file and (output_format == 'sqlite' or incremental is True):
+        raise ValueError("SQLite output and incremental=True need an output path")
+    portfolio_columns = ['Scrip_Symbol', 'BOM_ID', 'N.Qty'] + (PRICE_COLUMNS if price_provider is not None else [])
+    last_page = ExtractionProgress("open", 0, None, 0)
+    
+    def report(stage, message=None):
+        if progress is not None:
+            progress(last_page._replace(stage=stage, message=message))
+    
+    def page_progress(event):
+        nonlocal last_page
+        last_page = event
+        if progress is not None:
+            progress(event)
+    
+    def clean_up_cancelled():
+        # Nothing partial is left behind: the columnar file is dropped and the workbook not written yet
+        if writer is not None:
+            writer.abort()
+        stats.finish()
+        report("cancelled")
+    
+    def stop_if_cancelled():
+        if cancel_token.cancelled:
+            clean_up_cancelled()
+            cancel_token.raise_if_cancelled()
+    
+    # Set default output path if not provided
+    if output_excel_path is None:
+        name = source_name(pdf_path)
+        base_name = os.path.splitext(os.path.basename(name))[0] if name else "statement"
+        output_excel_path = f"{base_name}_extraction{FORMAT_EXTENSIONS[output_format]}"
+    if incremental is True:
+        incremental = f"{output_excel_path}.state"
+    elif incremental is False:
+        incremental = None
+    
+    batches = []
+    writer = None
+    report("open")
+    
+    try:
+        # The layout's numeric columns are typed in columnar and SQLite outputs. The layout is detected once,
+        # here: iter_transaction_batches gets the StatementTemplate itself and does not read the header again.
+        statement_template, detected = resolve_statement_template(statement_template, pdf_path)
+        if detected:
+            print(f"Detected statement template: {statement_template.name}")
+        numeric_columns = list(dict.fromkeys(NUMERIC_COLUMNS + statement_template.numeric_columns))
+        portfolio_numeric_columns = numeric_columns + PRICE_COLUMNS
+        if output_excel_path is False:
+            pass
+        elif output_format == 'sqlite':
+            writer = SqliteSink(output_excel_path, pdf_path, portfolio_numeric_columns)
+        elif output_format != 'xlsx':
+            writer = TableWriter(output_excel_path, output_format, numeric_columns, statement_template.date_columns)
+        for page_num, batch in iter_transaction_batches(pdf_path, workers, cache, dates_as_datetime,
+                                                        symbol_dictionary, template, engine, stats,
+                                                        incremental, page_progress, cancel_token,
+                                                        statement_template, page_filter,
+                                                        writer.set_columns if isinstance(writer, TableWriter) else None):
+            batches.append(batch)
+            if on_batch is not None:
+                on_batch(page_num, batch)
+            if writer is not None:
+                # Columnar outputs are written while later pages are still being extracted
+                with stats.stage("write"):
+                    writer.write(batch, page_num)
+    
+    except ExtractionCancelled:
+        clean_up_cancelled()
+        raise
+    except Exception as e:
+        if writer is not None:
+            writer.abort()
+        stats.finish()
+        print(f"Error processing PDF: {str(e)}")
+        report("failed", f"Error processing PDF: {str(e)}")
+        return None
+    
+    # Combine the cleaned page batches
+    if batches:
+        stop_if_cancelled()
+        report("combine")
+        with stats.stage("combine"):
+            df = pd.concat(batches) if len(batches) > 1 else batches[0]
+            
+            # Few distinct symbols over many rows: store them as a categorical column
+            if 'Scrip_Symbol' in df.columns:
+                df['Scrip_Symbol'] = df['Scrip_Symbol'].astype('category')
         
-        print(f"\nSuccessfully extracted {len(df)} rows and saved to {output_excel_path}")
+        # Instead of using multiple sheets, we'll place everything in one sheet
+        # Create a summary portfolio dataframe
+        portfolio_df = None
+        if 'Scrip_Symbol' in df.columns and 'N.Qty' in df.columns:
+            stop_if_cancelled()
+            report("portfolio")
+            with stats.stage("portfolio"):
+                # Group by Scrip_Symbol and sum N.Qty, also get the first BOM_ID for each symbol
+                portfolio_df = df.groupby('Scrip_Symbol', observed=True).agg({
+                    'N.Qty': 'sum',
+                    'BOM_ID': 'first'  # Take first BOM_ID for each symbol
+                }).reset_index()
+
+                if price_provider is not None:
+                    portfolio_df, priced = fill_portfolio_prices(portfolio_df, price_provider)
+                else:
+                    # Current_Price and Value are formulas in the workbook
+                    portfolio_df['Current_Price'] = ''
+                    portfolio_df['Value'] = ''
+            stats.count("securities", len(portfolio_df))
+            print(f"Created Portfolio summary with {len(portfolio_df)} unique securities")
+            if price_provider is not None:
+                stats.count("priced_securities", priced)
+                print(f"Prices found for {priced} of {len(portfolio_df)} securities")
+        
+        # XIRR per scrip and for the whole portfolio (only closed positions unless prices give current values)
+        xirr = None
+        if {'Scrip_Symbol', 'N.Qty', 'N.Amt', 'Date'} <= set(df.columns):
+            with stats.stage("xirr"):
+                if price_provider is not None and portfolio_df is not None:
+                    values = {symbol: value for symbol, value
+                              in zip(portfolio_df['Scrip_Symbol'], portfolio_df['Value']) if pd.notna(value)}
+                    xirr = portfolio_xirr(df, values, price_date(price_provider))
+                else:
+                    xirr = portfolio_xirr(df)
+        
+        stop_if_cancelled()
+        report("write")
+        if output_excel_path is False:
+            layout = {'output_path': None, 'format': None}
+        elif output_format == 'sqlite':
+            with stats.stage("write"):
+                if portfolio_df is not None:
+                    writer.write_portfolio(portfolio_df[portfolio_columns])
+                writer.close()
+            layout = {'output_path': output_excel_path, 'format': output_format, 'source_id': writer.source_id}
+        elif writer is not None:
+            # The portfolio summary is its own table next to the transactions
+            with stats.stage("write"):
+                writer.close()
+                layout = {'output_path': output_excel_path if to_file else None, 'format': output_format,
+                          'portfolio_path': None}
+                if portfolio_df is not None and to_file:
+                    layout['portfolio_path'] = portfolio_path(output_excel_path)
+                    write_table(layout['portfolio_path'], portfolio_df[portfolio_columns],
+                                output_format, portfolio_numeric_columns)
+                elif portfolio_df is not None and portfolio_output is not None:
+                    write_table(portfolio_output, portfolio_df[portfolio_columns], output_format,
+                                portfolio_numeric_columns)
+        else:
+            # Save to Excel with transactions and portfolio in the same sheet (rows are streamed in order)
+            with stats.stage("excel"):
+                footer_cells, layout = _sheet_footer(df, portfolio_df, priced=price_provider is not None)
+                _write_transactions_workbook(output_excel_path, df, footer_cells)
+            # Callers (e.g. the GUI) get the sheet layout without reopening the workbook
+            layout.update({'output_path': output_excel_path if to_file else None, 'format': 'xlsx',
+                           'sheet': 'Transactions'})
+        stats.finish()
+        df.attrs['layout'] = layout
+        if xirr is not None:
+            df.attrs['xirr'] = xirr
+        if stats.enabled:
+            df.attrs['stats'] = stats.to_dict()
+        
+        if to_file:
+            print(f"\nSuccessfully extracted {len(df)} rows and saved to {output_excel_path}")
+        else:
+            print(f"\nSuccessfully extracted {len(df)} rows" + (" into the output stream" if to_stream else ""))
         
         # Show sample of extracted data
         if len(df) > 0:
             print("\nSample of extracted data:")
             print(df.head().to_string())
         
+        report("done")
         return df
     else:
+        if writer is not None:
+            writer.abort()
+        stats.finish()
         print("No transaction data found in the PDF.")
+        report("failed", "No transaction data found in the PDF.")
         return None
 
 # if __name__ == "__main__":
@@ -415,12 +1463,43 @@ INDEX(GOOGLEFINANCE({bom_ref},"close",WORKDAY(TODAY(),-1),WORKDAY(TODAY(),-1)),2
 #         return None
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        pdf_path = sys.argv[1]
+    # Optional: --stats FILE writes per-stage timings as JSON and to the application log,
+    # --format FORMAT picks xlsx (default), parquet, arrow or csv output,
+    # --prices FILE fills portfolio prices from a local CSV/Parquet price snapshot,
+    # --no-page-filter runs table detection on every page
+    stats_path = None
+    output_format = None
+    prices = None
+    args = sys.argv[1:]
+    page_filter = "--no-page-filter" not in args
+    if not page_filter:
+        args.remove("--no-page-filter")
+    if "--stats" in args:
+        index = args.index("--stats")
+        stats_path = args[index + 1]
+        del args[index:index + 2]
+    if "--format" in args:
+        index = args.index("--format")
+        output_format = args[index + 1]
+        del args[index:index + 2]
+    if "--prices" in args:
+        index = args.index("--prices")
+        prices = args[index + 1]
+        del args[index:index + 2]
+    
+    if args:
+        pdf_path = args[0]
     else:
         pdf_path = input("Enter path to PDF file: ")
         
         if not pdf_path:
             pdf_path = "Data/Main.PDF"  # Default path
     
-    extract_transactions_simple(pdf_path)
\ No newline at end of file
+    if stats_path:
+        stats = ExtractionStats()
+        extract_transactions_simple(pdf_path, stats=stats, output_format=output_format, prices=prices,
+                                    page_filter=page_filter)
+        stats.save_json(stats_path)
+        stats.log(setup_logger())
+    else:
+        extract_transactions_simple(pdf_path, output_format=output_format, prices=prices, page_filter=page_filter)
\ No newline at end of file
@@ -0,0 +1,546 @@
+"""
+Local HTTP extraction service.
+
+A small asyncio HTTP/1.1 server (standard library only) around
+extract_transactions_simple. Uploaded PDFs are queued into a bounded pool
+of worker processes that stay alive between jobs, so pdfplumber and pandas
+are imported once per worker rather than once per request.
+
+Endpoints:
+    POST /jobs?format=xlsx&engine=pdfplumber  Upload a PDF (raw request body); returns 202 with a job id
+    GET  /jobs/<id>                           Job status
+    GET  /jobs/<id>/rows                      Transactions as NDJSON, streamed while pages finish
+    GET  /jobs/<id>/result                    The finished file (xlsx, parquet, arrow or csv)
+    GET  /jobs/<id>/portfolio                 The portfolio table of a columnar result
+    GET  /health                              Liveness
+    GET  /metrics                             Counters, queue depth and timings as JSON
+
+Uploads up to --spool-mb are kept in memory: the worker reads the PDF from
+the bytes it is sent and writes the result to a buffer, so small jobs never
+touch the disk. Larger uploads are spooled to a job directory in chunks.
+
+Backpressure: uploads larger than --max-upload-mb get 413, and once
+--max-pending jobs are queued or running new uploads get 503 with a
+Retry-After header. Streaming responses wait for the client to drain.
+The service binds to 127.0.0.1 by default and needs no external services.
+
+Usage:
+    python extraction_service.py --port 8765 --workers 2
+    curl --data-binary @statement.pdf "http://127.0.0.1:8765/jobs?format=parquet"
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+
+from extract_transactions_simple import TABLE_ENGINES, extract_transactions_simple
+from utils.columnar_output import FORMAT_EXTENSIONS
+
+SERVICE_FORMATS = ("xlsx", "parquet", "arrow", "csv")
+CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+    "csv": "text/csv; charset=utf-8",
+}
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 411: "Length Required", 413: "Payload Too Large", 415: "Unsupported Media Type",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+CHUNK_SIZE = 64 * 1024
+# Unread request body drained before an error response is closed, so the client sees the response
+# instead of a connection reset; clients sending more than this still get reset
+DISCARD_BYTES = 1024 * 1024
+
+# Set in each pool worker by _init_worker: where job events (started, rows, done, error) are sent
+_events = None
+
+
+def _init_worker(events):
+    """Pool initializer: keep the event queue, leave Ctrl+C to the server, and warm up the imports."""
+    global _events
+    _events = events
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import extract_transactions_simple  # noqa: F401 (loads pdfplumber, pandas and openpyxl once per worker)
+
+
+def _run_job(job_id, source, output_path, output_format, engine, prices_path=None):
+    """
+    Worker: convert one uploaded PDF, sending each page's rows as NDJSON while it goes.
+
+    The outcome is reported through the event queue ("done" or "error"), after
+    every "rows" event of the job, so the server sees the events in order.
+    A price snapshot is read once per worker and its prices cached for later jobs.
+    An upload kept in memory arrives as bytes with no output_path: its result
+    (and the portfolio table of a columnar format) is written to buffers and
+    sent back with "done".
+    """
+    _events.put((job_id, "started", None))
+
+    def on_batch(page_num, batch):
+        lines = batch.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+        _events.put((job_id, "rows", (page_num, len(batch), lines.rstrip("\n") + "\n")))
+
+    in_memory = output_path is None
+    output = io.BytesIO() if in_memory else output_path
+    portfolio = io.BytesIO() if in_memory and output_format != "xlsx" else None
+    captured = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(captured):
+            df = extract_transactions_simple(source, output, engine=engine, output_format=output_format,
+                                             on_batch=on_batch, prices=prices_path, portfolio_output=portfolio)
+    except Exception as e:
+        _events.put((job_id, "error", f"{type(e).__name__}: {e}"))
+        return
+    if df is None:
+        # extract_transactions_simple reports failures on stdout and returns None
+        errors = [line for line in captured.getvalue().splitlines() if line.startswith("Error")]
+        _events.put((job_id, "error", errors[-1] if errors else "No transaction data found in the PDF"))
+        return
+    done = {"rows": len(df), "layout": df.attrs.get("layout", {}), "xirr": df.attrs.get("xirr")}
+    if in_memory:
+        done["result"] = output.getvalue()
+        done["portfolio"] = portfolio.getvalue() if portfolio is not None and portfolio.tell() else None
+    _events.put((job_id, "done", done))
+
+
+class Job:
+    """State of one upload, kept in the server process."""
+
+    def __init__(self, job_id, job_dir, output_format, engine):
+        self.id = job_id
+        # None for a job kept in memory
+        self.dir = job_dir
+        self.output_format = output_format
+        self.engine = engine
+        self.input_path = os.path.join(job_dir, "input.pdf") if job_dir else None
+        self.output_path = os.path.join(job_dir, f"output{FORMAT_EXTENSIONS[output_format]}") if job_dir else None
+        # The result and portfolio files of an in-memory job
+        self.result = None
+        self.portfolio = None
+        self.status = "queued"
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.pages_done = 0
+        self.rows = 0
+        self.chunks = []
+        self.layout = {}
+        self.xirr = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished_ok(self):
+        return self.status == "done"
+
+    def notify(self):
+        """Wake every request waiting on this job."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self):
+        await self._changed.wait()
+
+    def describe(self):
+        links = {"self": f"/jobs/{self.id}", "rows": f"/jobs/{self.id}/rows", "result": f"/jobs/{self.id}/result"}
+        if self.output_format != "xlsx":
+            links["portfolio"] = f"/jobs/{self.id}/portfolio"
+        return {"job_id": self.id, "status": self.status, "format": self.output_format, "engine": self.engine,
+                "pages_done": self.pages_done, "rows": self.rows, "error": self.error, "xirr": self.xirr,
+                "created": self.created, "started": self.started, "finished": self.finished, "links": links}
+
+
+class ExtractionService:
+    """
+    The HTTP service: request handling in the event loop, conversions in a process pool.
+
+    Args:
+        workers (int): Worker processes
+        max_pending (int): Queued plus running jobs accepted before uploads get 503
+        max_upload_bytes (int): Largest accepted upload; larger ones get 413
+        spool_bytes (int): Largest upload kept in memory (input and result); larger ones are spooled to disk.
+            At most max_pending such jobs are held at a time.
+        work_dir (str, optional): Where uploads and results are kept. Defaults to a temporary directory.
+        max_finished_jobs (int): Finished jobs kept (with their files) before the oldest are dropped
+        header_timeout (float): Seconds a client gets to send the request line and headers
+        prices_path (str, optional): Local CSV/Parquet price snapshot for portfolio prices and open-position XIRR
+    """
+
+    def __init__(self, workers=2, max_pending=16, max_upload_bytes=100 * 1024 * 1024, work_dir=None,
+                 max_finished_jobs=100, header_timeout=30.0, prices_path=None, spool_bytes=16 * 1024 * 1024):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_upload_bytes = max_upload_bytes
+        self.spool_bytes = spool_bytes
+        self.max_finished_jobs = max_finished_jobs
+        self.header_timeout = header_timeout
+        self.prices_path = os.path.abspath(prices_path) if prices_path else None
+        self._own_work_dir = work_dir is None
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="extraction_service_")
+        os.makedirs(self.work_dir, exist_ok=True)
+
+        self.jobs = {}
+        self._finished = []
+        self.started_at = time.time()
+        self.counters = dict.fromkeys(["jobs_submitted", "jobs_in_memory", "jobs_done", "jobs_failed", "rejected_too_large",
+                                       "rejected_busy", "pages_extracted", "rows_extracted"], 0)
+        self.job_seconds = 0.0
+
+        self._context = multiprocessing.get_context("spawn")
+        self._events = self._context.Queue()
+        self._pool = None
+        self._server = None
+        self._loop = None
+        self._dispatcher = None
+
+    # ----- lifecycle -----
+
+    def _new_pool(self):
+        return concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context,
+                                                      initializer=_init_worker, initargs=(self._events,))
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Start the pool and listen; returns the bound (host, port)."""
+        self._loop = asyncio.get_running_loop()
+        self._pool = self._new_pool()
+        self._dispatcher = threading.Thread(target=self._dispatch_events, name="job-events", daemon=True)
+        self._dispatcher.start()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening, stop the workers and remove a temporary work directory."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        self._events.put(None)
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=5)
+        if self._own_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    # ----- job events -----
+
+    def _dispatch_events(self):
+        """Thread: move job events from the worker queue into the event loop."""
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            self._loop.call_soon_threadsafe(self._on_event, *event)
+
+    def _on_event(self, job_id, kind, payload):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if kind == "started":
+            job.status = "running"
+            job.started = time.time()
+        elif kind == "rows":
+            page_num, rows, lines = payload
+            job.chunks.append(lines.encode("utf-8"))
+            job.pages_done = page_num + 1
+            job.rows += rows
+        elif kind == "done":
+            job.layout = payload["layout"]
+            job.xirr = payload["xirr"]
+            job.result = payload.get("result")
+            job.portfolio = payload.get("portfolio")
+            self._finish(job, "done")
+        elif kind == "error":
+            self._finish(job, "error", payload)
+        job.notify()
+
+    def _job_returned(self, job, pool, future):
+        """Catch jobs whose worker died: they never send "done" or "error"."""
+        if future.cancelled() or job.status in ("done", "error"):
+            return
+        exc = future.exception()
+        if exc is not None:
+            # Every job queued on a broken pool fails; only the first of them replaces it
+            if isinstance(exc, BrokenProcessPool) and pool is self._pool:
+                self._pool = self._new_pool()
+                pool.shutdown(wait=False)
+            self._finish(job, "error", f"{type(exc).__name__}: {exc}")
+            job.notify()
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished = time.time()
+        if status == "done":
+            self.counters["jobs_done"] += 1
+            self.counters["pages_extracted"] += job.pages_done
+            self.counters["rows_extracted"] += job.rows
+        else:
+            self.counters["jobs_failed"] += 1
+        self.job_seconds += job.finished - (job.started or job.created)
+
+        # Keep a bounded number of finished jobs on disk (or in memory)
+        self._finished.append(job.id)
+        while len(self._finished) > self.max_finished_jobs:
+            old = self.jobs.pop(self._finished.pop(0), None)
+            if old is not None and old.dir is not None:
+                shutil.rmtree(old.dir, ignore_errors=True)
+
+    def pending(self):
+        """Jobs queued or running."""
+        return sum(1 for job in self.jobs.values() if job.status in ("queued", "running"))
+
+    def metrics(self):
+        finished = self.counters["jobs_done"] + self.counters["jobs_failed"]
+        return dict(self.counters, uptime_s=round(time.time() - self.started_at, 3), workers=self.workers,
+                    max_pending=self.max_pending,
+                    queued=sum(1 for job in self.jobs.values() if job.status == "queued"),
+                    running=sum(1 for job in self.jobs.values() if job.status == "running"),
+                    mean_job_s=round(self.job_seconds / finished, 3) if finished else None)
+
+    # ----- HTTP -----
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.header_timeout)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                return
+            request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+            try:
+                method, target, _ = request_line.split(" ", 2)
+            except ValueError:
+                await self._send_json(writer, 400, {"error": "Malformed request line"})
+                return
+            headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            url = urllib.parse.urlsplit(target)
+            query = {name: values[-1] for name, values in urllib.parse.parse_qs(url.query).items()}
+            await self._route(method, url.path.rstrip("/") or "/", query, headers, reader, writer)
+        except ConnectionError:
+            pass
+        finally:
+            with contextlib.suppress(ConnectionError):
+                writer.close()
+                await writer.wait_closed()
+
+    async def _route(self, method, path, query, headers, reader, writer):
+        parts = path.strip("/").split("/")
+        if path == "/health":
+            await self._send_json(writer, 200, {"status": "ok", "pending": self.pending()})
+        elif path == "/metrics":
+            await self._send_json(writer, 200, self.metrics())
+        elif path == "/jobs":
+            if method != "POST":
+                await self._send_json(writer, 405, {"error": "Use POST to upload a PDF"})
+                return
+            await self._submit(query, headers, reader, writer)
+        elif parts[0] == "jobs" and len(parts) in (2, 3):
+            job = self.jobs.get(parts[1])
+            if job is None:
+                await self._send_json(writer, 404, {"error": f"No job {parts[1]}"})
+            elif method != "GET":
+                await self._send_json(writer, 405, {"error": "Use GET"})
+            elif len(parts) == 2:
+                await self._send_json(writer, 200, job.describe())
+            elif parts[2] == "rows":
+                await self._stream_rows(job, writer)
+            elif parts[2] in ("result", "portfolio"):
+                await self._send_result(job, parts[2], writer)
+            else:
+                await self._send_json(writer, 404, {"error": f"Unknown resource {path}"})
+        else:
+            await self._send_json(writer, 404, {"error": f"Unknown resource {path}"})
+
+    async def _submit(self, query, headers, reader, writer):
+        output_format = query.get("format", "xlsx")
+        engine = query.get("engine", "pdfplumber")
+        if output_format not in SERVICE_FORMATS or engine not in TABLE_ENGINES:
+            await self._send_json(writer, 400, {"error": "Unsupported format or engine",
+                                                "formats": SERVICE_FORMATS, "engines": TABLE_ENGINES})
+            return
+        if "content-length" not in headers:
+            await self._send_json(writer, 411, {"error": "Content-Length is required"})
+            return
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            await self._send_json(writer, 400, {"error": "Invalid Content-Length"})
+            return
+        if length > self.max_upload_bytes:
+            self.counters["rejected_too_large"] += 1
+            await self._send_json(writer, 413, {"error": f"Uploads are limited to {self.max_upload_bytes} bytes"})
+            await self._discard_body(reader, length)
+            return
+        if self.pending() >= self.max_pending:
+            self.counters["rejected_busy"] += 1
+            await self._send_json(writer, 503, {"error": "Too many pending jobs, retry later"},
+                                  extra_headers={"Retry-After": "5"})
+            await self._discard_body(reader, length)
+            return
+
+        job_id = uuid.uuid4().hex
+        # Small uploads are read into memory; larger ones are spooled to disk in chunks and never held whole
+        in_memory = length <= self.spool_bytes
+        job = Job(job_id, None if in_memory else os.path.join(self.work_dir, job_id), output_format, engine)
+        if not in_memory:
+            os.makedirs(job.dir)
+        remaining = length
+        not_pdf = False
+        with io.BytesIO() if in_memory else open(job.input_path, "wb") as f:
+            while remaining:
+                chunk = await reader.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                if f.tell() == 0 and not chunk.startswith(b"%PDF"[:len(chunk)]):
+                    not_pdf = True
+                    break
+                f.write(chunk)
+            data = f.getvalue() if in_memory else None
+        if not_pdf or remaining:
+            if job.dir is not None:
+                shutil.rmtree(job.dir, ignore_errors=True)
+            if not_pdf:
+                await self._send_json(writer, 415, {"error": "The upload is not a PDF"})
+                await self._discard_body(reader, remaining)
+            else:
+                await self._send_json(writer, 400, {"error": "Incomplete upload"})
+            return
+
+        self.jobs[job_id] = job
+        self.counters["jobs_submitted"] += 1
+        if in_memory:
+            self.counters["jobs_in_memory"] += 1
+        pool = self._pool
+        future = self._loop.run_in_executor(pool, _run_job, job_id, data if in_memory else job.input_path,
+                                            job.output_path, output_format, engine, self.prices_path)
+        future.add_done_callback(lambda done: self._job_returned(job, pool, done))
+        await self._send_json(writer, 202, job.describe())
+
+    async def _stream_rows(self, job, writer):
+        """NDJSON rows of every page so far, then of each page as it finishes (chunked encoding)."""
+        await self._send_head(writer, 200, {"Content-Type": "application/x-ndjson", "Transfer-Encoding": "chunked"})
+        sent = 0
+        while True:
+            while sent < len(job.chunks):
+                chunk = job.chunks[sent]
+                writer.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                sent += 1
+                await writer.drain()
+            if job.status in ("done", "error"):
+                break
+            await job.wait()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _send_result(self, job, table, writer):
+        if job.status != "done":
+            status = 409 if job.status in ("queued", "running") else 500
+            await self._send_json(writer, status, {"error": f"Job is {job.status}", "job": job.describe()})
+            return
+        data = job.result if table == "result" else job.portfolio
+        path = job.output_path if table == "result" else job.layout.get("portfolio_path")
+        if data is None and (not path or not os.path.exists(path)):
+            await self._send_json(writer, 404, {"error": f"Job has no {table} file"})
+            return
+        name = f"{job.id}{'_portfolio' if table == 'portfolio' else ''}{FORMAT_EXTENSIONS[job.output_format]}"
+        size = len(data) if data is not None else os.path.getsize(path)
+        await self._send_head(writer, 200, {"Content-Type": CONTENT_TYPES[job.output_format],
+                                            "Content-Length": str(size),
+                                            "Content-Disposition": f'attachment; filename="{name}"'})
+        if data is not None:
+            view = memoryview(data)
+            for start in range(0, size, CHUNK_SIZE):
+                writer.write(view[start:start + CHUNK_SIZE])
+                await writer.drain()
+            return
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                writer.write(chunk)
+                await writer.drain()
+
+    async def _discard_body(self, reader, length):
+        """Read and drop up to DISCARD_BYTES of a rejected request's body."""
+        remaining = min(length, DISCARD_BYTES)
+        with contextlib.suppress(asyncio.TimeoutError, ConnectionError):
+            while remaining > 0:
+                chunk = await asyncio.wait_for(reader.read(min(CHUNK_SIZE, remaining)), 5)
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+
+    async def _send_head(self, writer, status, headers):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    async def _send_json(self, writer, status, payload, extra_headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body))}
+        headers.update(extra_headers or {})
+        await self._send_head(writer, status, headers)
+        writer.write(body)
+        await writer.drain()
+
+
+async def serve(host, port, **options):
+    service = ExtractionService(**options)
+    host, port = await service.start(host, port)
+    print(f"Extraction service listening on http://{host}:{port} with {service.workers} worker(s)")
+    serving = asyncio.ensure_future(service.serve_forever())
+    with contextlib.suppress(NotImplementedError):
+        # Stop cleanly on SIGTERM too (not available on Windows)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+    try:
+        await serving
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP service for PDF statement extraction.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1, local only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-j", "--workers", type=int, default=2, help="Worker processes (default: 2)")
+    parser.add_argument("--max-pending", type=int, default=16, help="Queued plus running jobs before uploads get 503")
+    parser.add_argument("--max-upload-mb", type=float, default=100, help="Largest accepted upload in MB (default: 100)")
+    parser.add_argument("--spool-mb", type=float, default=16,
+                        help="Largest upload converted in memory, in MB; larger ones go through --work-dir (default: 16)")
+    parser.add_argument("--work-dir", default=None, help="Where uploads and results are kept (default: a temporary directory)")
+    parser.add_argument("--prices", default=None,
+                        help="Local CSV/Parquet price snapshot for portfolio values (default: GOOGLEFINANCE formulas)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, max_pending=args.max_pending,
+                          max_upload_bytes=int(args.max_upload_mb * 1024 * 1024), work_dir=args.work_dir,
+                          prices_path=args.prices, spool_bytes=int(args.spool_mb * 1024 * 1024)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    raise SystemExit(main())
@@ -2,8 +2,22 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
 import threading
-import sys
-from extract_transactions_simple import extract_transactions_simple
+from utils.progress import CancellationToken, ExtractionCancelled
+
+# The extractor pulls in pandas, pdfplumber and openpyxl, which take far longer to import than the
+# window takes to appear. It is imported on a background thread once the window is up (see
+# prewarm_extractor) and again, from the import cache, when a conversion starts.
+
+
+def prewarm_extractor():
+    """Import the extractor in the background while the user picks a file."""
+    def load():
+        try:
+            import extract_transactions_simple  # noqa: F401
+        except Exception:
+            pass  # Reported by the import in run_conversion
+
+    threading.Thread(target=load, name="prewarm-imports", daemon=True).start()
 
 class PDFToExcelApp:
     def __init__(self, root):
@@ -49,8 +63,8 @@ class PDFToExcelApp:
         output_btn = ttk.Button(output_frame, text="Browse", command=self.browse_output)
         output_btn.pack(side=tk.RIGHT)
         
-        # Progress bar
-        self.progress = ttk.Progressbar(main_frame, orient=tk.HORIZONTAL, length=100, mode='indeterminate')
+        # Progress bar (pages processed out of the page count)
+        self.progress = ttk.Progressbar(main_frame, orient=tk.HORIZONTAL, length=100, mode='determinate')
         self.progress.pack(fill=tk.X, pady=10)
         
         # Status message
@@ -59,9 +73,16 @@ class PDFToExcelApp:
         status_label = ttk.Label(main_frame, textvariable=self.status_var, wraplength=500)
         status_label.pack(pady=5)
         
-        # Convert button
-        convert_btn = ttk.Button(main_frame, text="Convert to Excel", command=self.start_conversion)
-        convert_btn.pack(pady=10)
+        # Convert and Cancel buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=10)
+        self.convert_btn = ttk.Button(button_frame, text="Convert to Excel", command=self.start_conversion)
+        self.convert_btn.pack(side=tk.LEFT, padx=5)
+        self.cancel_btn = ttk.Button(button_frame, text="Cancel", command=self.cancel_conversion, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Token of the running conversion; None when idle
+        self.cancel_token = None
         
         # Credits
         credits = "Created for data extraction from financial transaction PDFs"
@@ -101,16 +122,30 @@ class PDFToExcelApp:
             messagebox.showerror("Error", f"PDF file not found: {pdf_path}")
             return
         
-        # Start progress bar
-        self.progress.start()
+        # Reset the progress bar and swap Convert for Cancel
+        self.progress.configure(value=0, maximum=1)
         self.status_var.set("Converting... Please wait.")
-        self.root.update()
+        self.convert_btn.configure(state=tk.DISABLED)
+        self.cancel_btn.configure(state=tk.NORMAL)
+        self.cancel_token = CancellationToken()
         
         # Run conversion in a separate thread to keep GUI responsive
-        thread = threading.Thread(target=self.run_conversion, args=(pdf_path, output_path))
+        thread = threading.Thread(target=self.run_conversion, args=(pdf_path, output_path, self.cancel_token))
         thread.daemon = True
         thread.start()
     
+    def cancel_conversion(self):
+        """Stop the running conversion; the GUI is ready again right away while the worker winds down."""
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+            self.finish_conversion()
+            self.status_var.set("Conversion cancelled")
+    
+    def finish_conversion(self):
+        self.cancel_token = None
+        self.convert_btn.configure(state=tk.NORMAL)
+        self.cancel_btn.configure(state=tk.DISABLED)
+    
     def open_excel_file(self, filepath):
         """Open the Excel file with the default application"""
         import platform
@@ -126,137 +161,48 @@ class PDFToExcelApp:
         except Exception as e:
             messagebox.showerror("Error", f"Could not open the file: {e}")
 
-    def fix_portfolio_formulas(self, output_path):
-        """Fix and add formulas to the portfolio summary section"""
-        try:
-            import openpyxl
-            
-            # Load the workbook
-            workbook = openpyxl.load_workbook(output_path)
-            sheet = workbook.active
-            
-            # Find Portfolio_Value and Portfolio Summary rows
-            portfolio_value_row = None
-            portfolio_summary_row = None
-            
-            for row in range(1, sheet.max_row + 1):
-                value = sheet.cell(row=row, column=1).value
-                if value == "Portfolio_Value":
-                    portfolio_value_row = row
-                elif value == "PORTFOLIO SUMMARY":
-                    portfolio_summary_row = row
-                    break
-            
-            # Process the Portfolio Summary section
-            if portfolio_summary_row:
-                # Find header row (should be portfolio_summary_row + 1)
-                header_row = portfolio_summary_row + 1
-                
-                # Verify the headers exist (updated for new column structure)
-                if (sheet.cell(row=header_row, column=1).value == "BOM_ID" and
-                    sheet.cell(row=header_row, column=2).value == "Scrip_Symbol"):
-                    
-                    # Process each security row
-                    last_row = header_row + 1
-                    while last_row <= sheet.max_row and sheet.cell(row=last_row, column=2).value not in (None, "TOTAL"):
-                        # The enhanced GOOGLEFINANCE formula is already set during extraction
-                        # Just ensure Value formula is correct
-                        qty_ref = sheet.cell(row=last_row, column=3).coordinate
-                        price_ref = sheet.cell(row=last_row, column=4).coordinate
-                        sheet.cell(row=last_row, column=5).value = f"={qty_ref}*{price_ref}"
-                        
-                        last_row += 1
-                    
-                    # Process TOTAL row if it exists
-                    total_row = last_row
-                    if total_row <= sheet.max_row and sheet.cell(row=total_row, column=2).value == "TOTAL":
-                        # Update SUM formulas for new column positions
-                        first_qty_cell = sheet.cell(row=header_row+1, column=3).coordinate
-                        last_qty_cell = sheet.cell(row=total_row-1, column=3).coordinate
-                        sheet.cell(row=total_row, column=3).value = f"=SUM({first_qty_cell}:{last_qty_cell})"
-                        
-                        first_value_cell = sheet.cell(row=header_row+1, column=5).coordinate
-                        last_value_cell = sheet.cell(row=total_row-1, column=5).coordinate
-                        sheet.cell(row=total_row, column=5).value = f"=SUM({first_value_cell}:{last_value_cell})"
-                        
-                        # Link Portfolio_Value to the total value (column 5 now)
-                        if portfolio_value_row:
-                            n_amt_col = None
-                            for col in range(1, sheet.max_column + 1):
-                                if sheet.cell(row=1, column=col).value == "N.Amt":
-                                    n_amt_col = col
-                                    break
-                            
-                            if n_amt_col:
-                                total_value_ref = sheet.cell(row=total_row, column=5).coordinate
-                                sheet.cell(row=portfolio_value_row, column=n_amt_col).value = f"={total_value_ref}"
-
-                        # Add Portfolio XIRR row after a blank row
-                        xirr_row = total_row + 2  # +2 for one blank row
-                        sheet.cell(row=xirr_row, column=1).value = "Portfolio XIRR"
-                        
-                        # Add XIRR formula that uses transaction dates and amounts
-                        # Find the date column (3) and N.Amt column
-                        n_amt_col = None
-                        for col in range(1, sheet.max_column + 1):
-                            if sheet.cell(row=1, column=col).value == "N.Amt":
-                                n_amt_col = col
-                                break
-                        
-                        if n_amt_col:
-                            # Create XIRR formula referencing dates (column 4) and N.Amt
-                            # Transaction rows start from row 2 (after header) and go through the Portfolio_Value row
-                            date_range = f"D2:D{portfolio_value_row}"
-                            amount_range = f"{chr(64+n_amt_col)}2:{chr(64+n_amt_col)}{portfolio_value_row}"
-                            # Fix: correct parameter order - values first, then dates
-                            xirr_formula = f"=XIRR({amount_range},{date_range})"
-                            sheet.cell(row=xirr_row, column=2, value=xirr_formula)
-                        
-                        # Add Portfolio XIRR Percentage row
-                        xirr_pct_row = xirr_row + 1
-                        sheet.cell(row=xirr_pct_row, column=1).value = "Portfolio XIRR Percentage"
-                        sheet.cell(row=xirr_pct_row, column=2).value = f"={sheet.cell(row=xirr_row, column=2).coordinate}*100"
-            
-            # Save the workbook
-            workbook.save(output_path)
-            print(f"Fixed portfolio formulas in {output_path}")
-        except Exception as e:
-            print(f"Error fixing portfolio formulas: {e}")
-    
-    def run_conversion(self, pdf_path, output_path):
+    def run_conversion(self, pdf_path, output_path, cancel_token):
+        failure = []
+        
+        def on_progress(event):
+            if event.stage == "failed":
+                failure.append(event.message)
+            # Tk is only touched from its own thread
+            self.root.after(0, self.show_progress, cancel_token, event)
+        
         try:
-            # Redirect stdout to capture console output
-            original_stdout = sys.stdout
-            from io import StringIO
-            captured_output = StringIO()
-            sys.stdout = captured_output
+            # Waits for the background import if it is still running
+            from extract_transactions_simple import extract_transactions_simple
+            result = extract_transactions_simple(pdf_path, output_path, progress=on_progress,
+                                                 cancel_token=cancel_token)
             
-            # Run the extraction
-            result = extract_transactions_simple(pdf_path, output_path)
-            
-            # Get back console output
-            sys.stdout = original_stdout
-            log_output = captured_output.getvalue()
-            
-            # Fix missing Scrip_Symbol values if extraction was successful
+            # The extractor writes the final portfolio and XIRR formulas itself and reports
+            # where it put them, so the workbook never needs to be reopened here
             if result is not None:
-                actual_output_path = output_path
-                if actual_output_path is None:
-                    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-                    actual_output_path = f"{base_name}_extraction.xlsx"
-                
-                # Skip fix_missing_scrip_symbols since it's now handled in extract_transactions_simple.py
-                # Just apply portfolio formulas to ensure GOOGLEFINANCE and other calculations work
-                self.fix_portfolio_formulas(actual_output_path)
+                output_path = result.attrs.get('layout', {}).get('output_path', output_path)
             
             # Update GUI with results
-            self.root.after(0, self.update_status, result, output_path, log_output)
+            self.root.after(0, self.update_status, cancel_token, result, output_path, "\n".join(failure))
             
+        except ExtractionCancelled:
+            pass
         except Exception as e:
-            self.root.after(0, self.handle_error, str(e))
+            self.root.after(0, self.handle_error, cancel_token, str(e))
     
-    def update_status(self, result, output_path, log_output):
-        self.progress.stop()
+    def show_progress(self, cancel_token, event):
+        if cancel_token is not self.cancel_token:
+            return  # A cancelled conversion still winding down
+        if event.page_count:
+            self.progress.configure(maximum=event.page_count, value=event.page)
+        if event.stage == "page":
+            self.status_var.set(f"Page {event.page} of {event.page_count}: {event.rows} rows so far")
+        elif event.stage in ("combine", "portfolio", "write"):
+            self.status_var.set(f"Writing {event.rows} rows...")
+    
+    def update_status(self, cancel_token, result, output_path, log_output):
+        if cancel_token is not self.cancel_token:
+            return
+        self.finish_conversion()
         
         if result is not None:
             row_count = len(result)
@@ -277,12 +223,16 @@ class PDFToExcelApp:
             self.status_var.set(error_msg)
             messagebox.showerror("Extraction Failed", f"{error_msg}\n\nDetails:\n{log_output}")
     
-    def handle_error(self, error_message):
-        self.progress.stop()
+    def handle_error(self, cancel_token, error_message):
+        if cancel_token is not self.cancel_token:
+            return
+        self.finish_conversion()
         self.status_var.set(f"Error: {error_message}")
         messagebox.showerror("Error", f"An error occurred during conversion:\n\n{error_message}")
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = PDFToExcelApp(root)
+    # Start the heavy imports once the window has been drawn
+    root.after_idle(prewarm_extractor)
     root.mainloop()
\ No newline at end of file
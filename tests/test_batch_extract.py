@@ -0,0 +1,99 @@
+import unittest
+import os
+import json
+import multiprocessing
+import shutil
+import sqlite3
+import tempfile
+from unittest import mock
+import batch_extract
+from batch_extract import expand_inputs, plan_outputs, run_batch
+from benchmarks.synthetic_statement import generate_statement
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+_extract = batch_extract.extract_transactions_simple
+
+def _crash_on_marked_files(pdf_path, *args, **kwargs):
+    """Stand-in for the extractor that kills its worker process on files named 'crash*'."""
+    if os.path.basename(pdf_path).startswith("crash"):
+        os._exit(3)
+    return _extract(pdf_path, *args, **kwargs)
+
+class TestBatchExtract(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.tmp_dir, "in")
+        os.makedirs(self.input_dir)
+        shutil.copy(SAMPLE_PDF, os.path.join(self.input_dir, "good.PDF"))
+        with open(os.path.join(self.input_dir, "broken.pdf"), "w") as f:
+            f.write("not a pdf")
+        with open(os.path.join(self.input_dir, "notes.txt"), "w") as f:
+            f.write("ignored")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_expand_and_plan(self):
+        """Test that directories expand to PDFs only and outputs get unique names."""
+        pdf_paths = expand_inputs([self.input_dir, os.path.join(self.input_dir, "*.pdf")])
+        self.assertEqual([os.path.basename(p) for p in pdf_paths], ["broken.pdf", "good.PDF"])
+        
+        tasks = plan_outputs(["/a/x.pdf", "/b/x.pdf"], "out")
+        self.assertEqual([t[1] for t in tasks], [os.path.join("out", "x_extraction.xlsx"), os.path.join("out", "x_2_extraction.xlsx")])
+    
+    def test_bad_file_does_not_stop_batch(self):
+        """Test that a broken PDF is recorded in the manifest while the rest converts."""
+        output_dir = os.path.join(self.tmp_dir, "out")
+        os.makedirs(output_dir)
+        manifest_path = os.path.join(output_dir, "manifest.json")
+        tasks = plan_outputs(expand_inputs([self.input_dir]), output_dir)
+        
+        run_batch(tasks, manifest_path, jobs=2)
+        
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        statuses = {os.path.basename(e["input"]): e["status"] for e in manifest["files"]}
+        self.assertEqual(statuses, {"broken.pdf": "error", "good.PDF": "ok"})
+        good = [e for e in manifest["files"] if e["status"] == "ok"][0]
+        self.assertGreater(good["rows"], 0)
+        self.assertTrue(os.path.exists(good["output"]))
+
+    def test_sqlite_batch_merged_by_parent(self):
+        """Test that parallel files land in one SQLite database, merged without leftovers, and re-runs upsert."""
+        generate_statement(os.path.join(self.input_dir, "synthetic.pdf"), 3, seed=1)
+        output_dir = os.path.join(self.tmp_dir, "out")
+        os.makedirs(output_dir)
+        database_path = os.path.join(output_dir, "statements.sqlite")
+        tasks = [(os.path.join(self.input_dir, name), database_path) for name in ("good.PDF", "synthetic.pdf")]
+
+        for _ in range(2):
+            manifest = run_batch(tasks, os.path.join(output_dir, "manifest.json"), jobs=2)
+            self.assertEqual([e["status"] for e in manifest["files"]], ["ok", "ok"])
+            self.assertEqual({e["output"] for e in manifest["files"]}, {database_path})
+            conn = sqlite3.connect(database_path)
+            try:
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM statements").fetchone()[0], 2)
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0],
+                                 sum(e["rows"] for e in manifest["files"]))
+            finally:
+                conn.close()
+        self.assertEqual(sorted(os.listdir(output_dir)), ["manifest.json", "statements.sqlite"])
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork", "workers must inherit the patched extractor")
+    def test_crashed_worker_does_not_hang_batch(self):
+        """Test that a file whose worker dies is recorded as crashed and the batch finishes without a timeout."""
+        shutil.copy(SAMPLE_PDF, os.path.join(self.input_dir, "crash.pdf"))
+        output_dir = os.path.join(self.tmp_dir, "out")
+        os.makedirs(output_dir)
+        manifest_path = os.path.join(output_dir, "manifest.json")
+        tasks = plan_outputs([os.path.join(self.input_dir, name) for name in ("crash.pdf", "good.PDF")], output_dir)
+
+        with mock.patch.object(batch_extract, "extract_transactions_simple", _crash_on_marked_files):
+            manifest = run_batch(tasks, manifest_path, jobs=1, max_tasks_per_child=1)
+        statuses = {os.path.basename(e["input"]): e["status"] for e in manifest["files"]}
+        self.assertEqual(statuses, {"crash.pdf": "crashed", "good.PDF": "ok"})
+        self.assertTrue(manifest["files"][0]["error"].startswith("Worker process exited unexpectedly"))
+
+if __name__ == '__main__':
+    unittest.main()
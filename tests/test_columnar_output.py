@@ -0,0 +1,66 @@
+import unittest
+import os
+import importlib.util
+import tempfile
+from unittest import mock
+import pandas as pd
+import extract_transactions_simple as ets
+from utils.columnar_output import TableWriter
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+class TestColumnarOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_csv_output(self):
+        """Test that CSV output holds every transaction and the portfolio goes to its own file."""
+        output_path = os.path.join(self.tmp_dir.name, "out.csv")
+        df = ets.extract_transactions_simple(SAMPLE_PDF, output_path)
+        self.assertEqual(df.attrs['layout']['format'], 'csv')
+        written = pd.read_csv(output_path, dtype={'BOM_ID': str})
+        self.assertEqual(list(written.columns), list(df.columns))
+        self.assertEqual(written['N.Amt'].tolist(), df['N.Amt'].tolist())
+        portfolio = pd.read_csv(df.attrs['layout']['portfolio_path'])
+        self.assertEqual(len(portfolio), df['Scrip_Symbol'].nunique())
+    
+    def test_later_page_with_wider_rows(self):
+        """Test that a page whose rows reach columns the first page's rows did not is still written."""
+        header = ["Company", "Date", None, "Narration", "B.Qty", "B.Rate", "S.Qty", "S.Rate", "N.Qty", "N.Rate", "N.Amt"]
+        symbol = ["Scrip_Symbol :", None, "500116 IDBI - CLIENT"] + [None] * 8
+        short = ["BSE_CASH", "2024-06-28", None, "Buy", "10", "100", "0", "0", "10", None, None]
+        full = ["BSE_CASH", "2024-07-01", None, "Sell", "0", "0", "5", "120", "5", "110", "-550"]
+        pages = [(0, 2, [[header, symbol, short]]), (1, 2, [[header, symbol, full]])]
+        output_path = os.path.join(self.tmp_dir.name, "out.csv")
+        with mock.patch.object(ets, "_iter_cached_page_tables", return_value=iter(pages)):
+            df = ets.extract_transactions_simple(SAMPLE_PDF, output_path, page_filter=False)
+        self.assertIsNotNone(df)
+        written = pd.read_csv(output_path, dtype={'BOM_ID': str})
+        self.assertEqual(list(written.columns), list(df.columns))
+        self.assertEqual(written['N.Amt'].tolist()[1], -550)
+        self.assertTrue(pd.isna(written['N.Amt'].tolist()[0]))
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet_row_groups(self):
+        """Test that Parquet output is written in row groups with numeric and date column types."""
+        import pyarrow.parquet as pq
+        df = ets.extract_transactions_simple(SAMPLE_PDF, os.path.join(self.tmp_dir.name, "unused.xlsx"))
+        output_path = os.path.join(self.tmp_dir.name, "out.parquet")
+        with TableWriter(output_path, "parquet", ets.NUMERIC_COLUMNS, ['Date'], row_group_rows=4) as writer:
+            for start in range(0, len(df), 3):
+                writer.write(df.iloc[start:start + 3])
+        
+        parquet = pq.ParquetFile(output_path)
+        self.assertEqual(parquet.metadata.num_rows, len(df))
+        self.assertGreater(parquet.metadata.num_row_groups, 1)
+        written = parquet.read().to_pandas()
+        self.assertEqual(str(parquet.schema_arrow.field('Date').type), 'date32[day]')
+        self.assertEqual(written['N.Qty'].tolist(), df['N.Qty'].astype(float).tolist())
+        self.assertEqual(written['Date'].astype(str).tolist(), df['Date'].tolist())
+
+if __name__ == '__main__':
+    unittest.main()
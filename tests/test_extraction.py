@@ -1,22 +1,207 @@
 import unittest
 import os
-from extract_transactions_simple import extract_transactions_simple
+import tempfile
+import numpy as np
+import pandas as pd
+from unittest import mock
+import extract_transactions_simple as ets
+from extract_transactions_simple import extract_transactions_simple, iter_transactions, standardize_date, standardize_dates
+from utils.symbol_dictionary import SymbolDictionary
+from benchmarks.bench_cleaning import COLUMNS, legacy_clean, make_raw_transactions
+from benchmarks.synthetic_statement import generate_statement
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
 
 class TestPDFExtraction(unittest.TestCase):
     def setUp(self):
-        self.sample_pdf = "tests/sample_data/test_file.pdf"
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.sample_pdf = os.path.join(self.tmp_dir.name, "test_file.pdf")
+        self.statement = generate_statement(self.sample_pdf, pages=3)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
     
     def test_basic_extraction(self):
         """Test basic PDF extraction functionality."""
-        if os.path.exists(self.sample_pdf):
-            result = extract_transactions_simple(self.sample_pdf)
-            self.assertIsNotNone(result)
-            self.assertGreater(len(result), 0)
+        result = extract_transactions_simple(self.sample_pdf, os.path.join(self.tmp_dir.name, "out.xlsx"))
+        self.assertIsNotNone(result)
+        self.assertEqual(len(result), self.statement["transactions"])
+        self.assertFalse((result["Scrip_Symbol"] == "Unknown").any())
+        self.assertEqual(set(result.attrs["xirr"]["scrips"]), set(result["Scrip_Symbol"]))
     
     def test_column_cleaning(self):
-        """Test that numeric columns are properly cleaned."""
-        # Add specific tests for data cleaning logic
-        pass
+        """Test that column-wise cleaning gives the row-by-row result on mixed dates, separators and multi-line cells."""
+        raw = make_raw_transactions(2000, n_symbols=40, seed=1)
+        rows = [
+            ["Unknown", "BSE_CASH", "28/06/2024", "Setl : M-1\nT+1", "1,000", "2,598.50", "0", "0",
+             "1,000", "(2,598)", "-25,98,500"],
+            ["500116 IDBI - CLIENT", "BSE_CASH", "08-Aug-2024", "OPENING:CARRY\nFORWARD", " 37 ", "401", "", None,
+             "37", "401", "-14,837"],
+            ["544223 CEIGALL - CLIENT", "NSE_CASH", "2024/13/45", "Bonus", "10", "0", "0", "0", "10", "0", "0"],
+            ["Unknown", "NSE_CASH", " 2025-01-27 ", "Line one\nline two\nline three", "80", "121", "0", "0",
+             "80", "121", "-9,688"],
+            ["Unknown", "NSE_CASH", "", "No date", "5", "1", "0", "0", "5", "1", "-5"],
+            ["BSE BSE - CLIENT", "BSE_CASH", "01.02.2024", "Rs. 1,234.50 Cr", "1,2,3", "-", "0", "0",
+             "12", "1", "abc"],
+        ]
+        raw = pd.concat([raw, pd.DataFrame(rows, columns=COLUMNS)], ignore_index=True)
+        # Dates in a second format scattered through the document
+        day_first = raw.index[::97]
+        raw.loc[day_first, 'Date'] = pd.to_datetime(raw.loc[day_first, 'Date']).dt.strftime('%d/%m/%Y')
+
+        expected = legacy_clean(raw.copy())
+        cleaned = ets._clean_transactions(raw.copy(), {'last_valid_symbol': None})
+        pd.testing.assert_frame_equal(expected, cleaned, check_dtype=False)
+
+    def test_map_distinct_matches_row_wise(self):
+        """Test that mapping distinct values gives the per-row result, including missing values."""
+        values = pd.Series(["1,000", None, "2\n3", "1,000", np.nan, "", "2\n3"], index=range(10, 17))
+        mapped = ets._map_distinct(values, lambda distinct: distinct.str.replace('\n', ' ', regex=False))
+        expected = values.apply(lambda value: value.replace('\n', ' ') if isinstance(value, str) else np.nan)
+        pd.testing.assert_series_equal(mapped, expected, check_dtype=False)
+        self.assertEqual(ets._map_distinct(values, ets._is_blank, na_value=True).tolist(),
+                         [False, True, False, False, True, True, False])
+
+class TestParallelExtraction(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_workers_match_serial(self):
+        """Test that page-parallel extraction yields exactly the serial rows."""
+        serial = extract_transactions_simple(SAMPLE_PDF, os.path.join(self.tmp_dir.name, "serial.xlsx"))
+        parallel = extract_transactions_simple(SAMPLE_PDF, os.path.join(self.tmp_dir.name, "parallel.xlsx"), workers=2)
+        self.assertIsNotNone(serial)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+class TestStreamingExtraction(unittest.TestCase):
+    def test_iter_transactions_matches_dataframe(self):
+        """Test that streamed records are the rows of the Excel path's DataFrame."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            df = extract_transactions_simple(SAMPLE_PDF, os.path.join(tmp_dir, "out.xlsx"))
+        streamed = pd.DataFrame(list(iter_transactions(SAMPLE_PDF)))
+        pd.testing.assert_frame_equal(df.reset_index(drop=True), streamed, check_dtype=False, check_categorical=False)
+
+class TestRowClassification(unittest.TestCase):
+    def test_columns_match_dict_rows(self):
+        """Test that columnar row accumulation builds the frame one dict per row would."""
+        header = ["Company", "Date", "Narration", "B.Qty", "B.Rate", "S.Qty", "S.Rate", "N.Qty", "N.Rate", "N.Amt"]
+        full = ["BSE_CASH", "28/06/2024", "Setl", None, "1", "2", "3", "4", "5", "6", "7"]
+        tables = [[header, ["Scrip_Symbol :", None, "500116 IDBI - CLIENT", None], full,
+                   ["BSE_CASH", "", "Setl", "9"], ["x", None], full + ["8", "9"]]]
+        state = {'column_names': None}
+        rows = ets._table_rows_to_transactions(0, tables, state)
+        self.assertEqual((len(rows), rows.width), (3, 11))
+        
+        column_names = state['column_names']
+        expected = [dict(zip(column_names, ["500116 IDBI - CLIENT"] + [c for c in full if c is not None])),
+                    dict(zip(column_names, ["Unknown", "BSE_CASH", "", "Setl", "9"])),
+                    dict(zip(column_names, ["500116 IDBI - CLIENT"] + [c for c in full if c is not None]))]
+        pd.testing.assert_frame_equal(rows.to_frame(pd.RangeIndex(3)),
+                                      pd.DataFrame(expected, columns=column_names, index=range(3)))
+
+class TestDateParsing(unittest.TestCase):
+    def test_column_parse_matches_per_value(self):
+        """Test that column-level parsing gives exactly what standardize_date gives per value."""
+        values = pd.Series(["28/06/2024", "01/07/2024", " 28/06/2024 ", "2024-07-05", "05-Jul-2024",
+                            "13/06/24", "not a date", "", None, "Date", "28/06/2024"] * 3)
+        parsed, date_format = standardize_dates(values)
+        self.assertEqual(date_format, "%d/%m/%Y")
+        self.assertEqual([None if pd.isna(v) else v for v in parsed], [standardize_date(v) for v in values])
+    
+    def test_earlier_format_takes_precedence(self):
+        """Test that values an earlier format also parses are not read with the detected format."""
+        values = pd.Series(["24-06-28", "25-01-31", "2024-06-28"])
+        parsed, date_format = standardize_dates(values, date_format="%y-%m-%d")
+        self.assertEqual(list(parsed), [standardize_date(v) for v in values])
+    
+    def test_dates_as_datetime(self):
+        """Test that the Date column can be returned as datetime64."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            df = extract_transactions_simple(SAMPLE_PDF, os.path.join(tmp_dir, "out.xlsx"), dates_as_datetime=True)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["Date"]))
+        self.assertEqual(df["Date"].iloc[0], pd.Timestamp("2024-06-28"))
+
+class TestSymbolNormalization(unittest.TestCase):
+    def test_each_raw_symbol_cleaned_once(self):
+        """Test that normalization runs once per distinct raw symbol and matches per-row cleaning."""
+        raw = pd.Series(["500116 IDBI - NAME", "BSE BSE - NAME", "500116 IDBI - NAME", "CDSL CDSL"] * 50)
+        state = {}
+        with mock.patch.object(ets, "clean_scrip_symbol_and_extract_bom",
+                               side_effect=ets.clean_scrip_symbol_and_extract_bom) as clean:
+            symbols, bom_ids = ets.normalize_scrip_symbols(raw, state)
+        self.assertEqual(clean.call_count, 3)
+        expected = [ets.clean_scrip_symbol_and_extract_bom(value) for value in raw]
+        self.assertEqual(list(symbols), [item[0] for item in expected])
+        self.assertEqual([None if pd.isna(b) else b for b in bom_ids], [item[1] for item in expected])
+    
+    def test_persistent_dictionary_is_reused(self):
+        """Test that a second run looks symbols up in the dictionary instead of recomputing them."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with SymbolDictionary(os.path.join(tmp_dir, "symbols.db")) as dictionary:
+                first = extract_transactions_simple(SAMPLE_PDF, os.path.join(tmp_dir, "a.xlsx"), symbol_dictionary=dictionary)
+                self.assertGreater(len(dictionary), 0)
+                with mock.patch.object(ets, "clean_scrip_symbol_and_extract_bom", side_effect=AssertionError("recomputed")):
+                    second = extract_transactions_simple(SAMPLE_PDF, os.path.join(tmp_dir, "b.xlsx"), symbol_dictionary=dictionary)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertIsInstance(first["Scrip_Symbol"].dtype, pd.CategoricalDtype)
+
+class TestExcelLayout(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({
+            "Scrip_Symbol": ["IDBI", "PNB", "PNB"], "BOM_ID": ["500116", "532461", "532461"],
+            "Company": ["BSE_CASH"] * 3, "Date": ["2024-07-23", "2025-01-29", "2025-04-21"],
+            "Narration": ["x", "y", "z"], "N.Qty": [100.0, 935.0, 265.0], "N.Amt": [-8926.0, -91705.0, -27261.0],
+        })
+        self.portfolio_df = self.df.groupby("Scrip_Symbol").agg({"N.Qty": "sum", "BOM_ID": "first"}).reset_index()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def read_cells(self, df):
+        import openpyxl
+        path = os.path.join(self.tmp_dir.name, "layout.xlsx")
+        footer, layout = ets._sheet_footer(df, self.portfolio_df)
+        ets._write_transactions_workbook(path, df, footer)
+        sheet = openpyxl.load_workbook(path).active
+        return sheet, layout
+    
+    def test_footer_positions(self):
+        """Test that the portfolio block and formulas land on the computed rows."""
+        sheet, layout = self.read_cells(self.df)
+        self.assertEqual(layout["portfolio_value_row"], 5)
+        self.assertEqual(sheet.cell(row=5, column=1).value, "Portfolio_Value")
+        self.assertEqual(sheet.cell(row=5, column=4).value, "=TODAY()")
+        self.assertEqual(sheet.cell(row=5, column=7).value, "=E11")
+        self.assertEqual(sheet.cell(row=7, column=1).value, "PORTFOLIO SUMMARY")
+        self.assertEqual(sheet.cell(row=9, column=2).value, "NSE:IDBI")
+        self.assertEqual(sheet.cell(row=10, column=5).value, "=C10*D10")
+        self.assertEqual(sheet.cell(row=11, column=3).value, "=SUM(C9:C10)")
+        self.assertEqual(sheet.cell(row=13, column=2).value, "=XIRR(G2:G5,D2:D5)")
+        self.assertEqual(sheet.cell(row=14, column=2).value, "=B13*100")
+        self.assertTrue(sheet.cell(row=1, column=1).font.b)
+    
+    def test_layout_describes_written_cells(self):
+        """Test that the returned layout points at the cells the GUI used to look up."""
+        sheet, layout = self.read_cells(self.df)
+        self.assertEqual(layout["portfolio_rows"], [9, 10])
+        self.assertEqual(layout["n_amt_column"], "G")
+        self.assertEqual(sheet[layout["total_value_cell"]].value, "=SUM(E9:E10)")
+        self.assertEqual(sheet[layout["xirr_cell"]].value, "=XIRR(G2:G5,D2:D5)")
+        self.assertEqual(sheet[layout["xirr_pct_cell"]].value, f"={layout['xirr_cell']}*100")
+    
+    def test_footer_overlays_trailing_rows_without_symbol(self):
+        """Test that Portfolio_Value goes right after the last row with a symbol, as before."""
+        df = self.df.copy()
+        df.loc[2, "Scrip_Symbol"] = ""
+        sheet, layout = self.read_cells(df)
+        self.assertEqual(layout["portfolio_value_row"], 4)
+        self.assertEqual(sheet.cell(row=4, column=1).value, "Portfolio_Value")
+        self.assertEqual(sheet.cell(row=4, column=3).value, "BSE_CASH")
+        self.assertEqual(sheet.cell(row=4, column=4).value, "=TODAY()")
 
 if __name__ == '__main__':
     unittest.main()
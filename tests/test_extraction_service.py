@@ -0,0 +1,123 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+from extraction_service import ExtractionService, Job
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+class TestExtractionService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = ExtractionService(workers=1, max_pending=4, max_upload_bytes=256 * 1024)
+        cls.loop = asyncio.new_event_loop()
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        host, port = asyncio.run_coroutine_threadsafe(cls.service.start("127.0.0.1", 0), cls.loop).result(30)
+        cls.base_url = f"http://{host}:{port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.service.close(), cls.loop).result(60)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(10)
+        cls.loop.close()
+
+    def _request(self, path, data=None):
+        with urllib.request.urlopen(urllib.request.Request(self.base_url + path, data=data), timeout=120) as response:
+            return response.status, response.read()
+
+    def test_upload_stream_and_download(self):
+        """Test that an uploaded PDF is converted and its rows are streamed as NDJSON and downloadable as xlsx."""
+        with open(SAMPLE_PDF, "rb") as f:
+            status, body = self._request("/jobs?format=xlsx", f.read())
+        self.assertEqual(status, 202)
+        job_id = json.loads(body)["job_id"]
+
+        # The NDJSON stream ends once the job has finished
+        status, body = self._request(f"/jobs/{job_id}/rows")
+        rows = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+        self.assertEqual(len(rows), 11)
+        self.assertIn("Scrip_Symbol", rows[0])
+
+        deadline = time.time() + 60
+        while True:
+            job = json.loads(self._request(f"/jobs/{job_id}")[1])
+            if job["status"] in ("done", "error") or time.time() > deadline:
+                break
+            time.sleep(0.1)
+        self.assertEqual(job["status"], "done", job["error"])
+        self.assertEqual(job["rows"], 11)
+        status, body = self._request(f"/jobs/{job_id}/result")
+        self.assertTrue(body.startswith(b"PK"))
+
+        metrics = json.loads(self._request("/metrics")[1])
+        self.assertGreaterEqual(metrics["jobs_done"], 1)
+        self.assertEqual(json.loads(self._request("/health")[1])["status"], "ok")
+
+    def _wait(self, job_id):
+        deadline = time.time() + 60
+        while True:
+            job = json.loads(self._request(f"/jobs/{job_id}")[1])
+            if job["status"] in ("done", "error") or time.time() > deadline:
+                return job
+            time.sleep(0.1)
+
+    def test_in_memory_and_spooled_jobs_match(self):
+        """Test that an upload kept in memory gives the same result and portfolio files as one spooled to disk."""
+        with open(SAMPLE_PDF, "rb") as f:
+            pdf = f.read()
+        downloads = []
+        for spool_bytes in (len(pdf), 0):
+            self.service.spool_bytes = spool_bytes
+            try:
+                job_id = json.loads(self._request("/jobs?format=csv", pdf)[1])["job_id"]
+            finally:
+                self.service.spool_bytes = 16 * 1024 * 1024
+            self.assertEqual(self._wait(job_id)["status"], "done")
+            self.assertEqual(self.service.jobs[job_id].dir is None, spool_bytes > 0)
+            downloads.append([self._request(f"/jobs/{job_id}/{table}")[1] for table in ("result", "portfolio")])
+        self.assertEqual(downloads[0], downloads[1])
+        self.assertTrue(downloads[0][0].startswith(b"Scrip_Symbol"))
+
+    def test_rejects_oversized_and_non_pdf_uploads(self):
+        """Test that uploads over the size limit get 413 and uploads that are not PDFs get 415."""
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self._request("/jobs", b"%PDF" + b"0" * (300 * 1024))
+        self.assertEqual(context.exception.code, 413)
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self._request("/jobs", b"not a pdf")
+        self.assertEqual(context.exception.code, 415)
+
+class TestBrokenPool(unittest.TestCase):
+    def test_broken_pool_replaced_once(self):
+        """Test that the jobs of a broken pool fail and the pool is replaced and shut down only once."""
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        service = ExtractionService(workers=1, work_dir=work_dir.name)
+        self.addCleanup(service._events.close)
+        broken, fresh = mock.Mock(), mock.Mock()
+        service._pool = broken
+        jobs = [Job(f"job{i}", None, "csv", "pdfplumber") for i in range(3)]
+        with mock.patch.object(service, "_new_pool", return_value=fresh) as new_pool:
+            for job in jobs:
+                future = Future()
+                future.set_exception(BrokenProcessPool("A worker died"))
+                service._job_returned(job, broken, future)
+
+        new_pool.assert_called_once_with()
+        broken.shutdown.assert_called_once_with(wait=False)
+        self.assertIs(service._pool, fresh)
+        self.assertEqual([job.status for job in jobs], ["error"] * 3)
+        self.assertEqual(service.counters["jobs_failed"], 3)
+
+if __name__ == '__main__':
+    unittest.main()
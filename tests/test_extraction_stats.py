@@ -0,0 +1,50 @@
+import unittest
+import os
+import json
+import tempfile
+import time
+import pandas as pd
+import extract_transactions_simple as ets
+from utils.extraction_stats import ExtractionStats
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+class TestExtractionStats(unittest.TestCase):
+    def test_nested_stages_exclude_inner_time(self):
+        """Test that a stage's time excludes the stages nested in it."""
+        stats = ExtractionStats(trace_memory=True)
+        with stats.stage("outer"):
+            with stats.stage("inner"):
+                time.sleep(0.05)
+                buffer = bytearray(4 * 1024 * 1024)
+            del buffer
+        stats.finish()
+        data = stats.to_dict()
+        self.assertGreaterEqual(data["stages"]["inner"]["wall_s"], 0.05)
+        self.assertLess(data["stages"]["outer"]["wall_s"], 0.05)
+        self.assertGreaterEqual(data["stages"]["inner"]["peak_memory_mib"], 4)
+        self.assertGreaterEqual(data["stages"]["outer"]["peak_memory_mib"], 4)
+
+    def test_conversion_reports_stages(self):
+        """Test that a conversion fills every stage and per-page time, and that results are unchanged."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "out.xlsx")
+            baseline = ets.extract_transactions_simple(SAMPLE_PDF, output_path)
+            stats = ExtractionStats()
+            df = ets.extract_transactions_simple(SAMPLE_PDF, output_path, stats=stats)
+            stats_path = os.path.join(tmp_dir, "stats.json")
+            stats.save_json(stats_path)
+            with open(stats_path) as f:
+                saved = json.load(f)
+
+        self.assertNotIn('stats', baseline.attrs)
+        self.assertEqual(df.attrs['stats'], saved)
+        self.assertEqual(set(saved["stages"]), {"open", "page_filter", "tables", "rows", "clean", "combine", "portfolio", "xirr", "excel"})
+        self.assertEqual(saved["pages"]["count"], 2)
+        self.assertEqual(saved["counters"]["rows"], len(df))
+        df.attrs = {}
+        baseline.attrs = {}
+        pd.testing.assert_frame_equal(baseline, df)
+
+if __name__ == '__main__':
+    unittest.main()
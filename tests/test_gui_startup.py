@@ -0,0 +1,11 @@
+import unittest
+from benchmarks.bench_startup import measure
+
+class TestGuiStartup(unittest.TestCase):
+    def test_heavy_imports_are_deferred(self):
+        """Test that importing the GUI module loads none of pandas, pdfplumber, openpyxl or numpy."""
+        startup = measure("pdf_to_excel_app", repeat=1)
+        self.assertEqual(startup["heavy_modules"], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import os
+import json
+import tempfile
+import zlib
+import pandas as pd
+import extract_transactions_simple as ets
+from benchmarks.synthetic_statement import generate_statement
+from utils.extraction_stats import ExtractionStats
+from utils.incremental_state import STATE_FORMAT, IncrementalState
+
+class TestIncrementalState(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.old_pdf = os.path.join(self.tmp_dir.name, "march.pdf")
+        self.new_pdf = os.path.join(self.tmp_dir.name, "april.pdf")
+        # The same statement reissued with pages appended (the "i of N" footer changes on every page)
+        generate_statement(self.old_pdf, 3)
+        generate_statement(self.new_pdf, 5)
+        self.output_path = os.path.join(self.tmp_dir.name, "out.xlsx")
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_appended_pages_match_full_run(self):
+        """Test that an incremental run only reads the new pages and gives the same rows as a full run."""
+        full = ets.extract_transactions_simple(self.new_pdf, os.path.join(self.tmp_dir.name, "full.xlsx"))
+        ets.extract_transactions_simple(self.old_pdf, self.output_path, incremental=True)
+        self.assertTrue(os.path.exists(self.output_path + ".state"))
+        
+        stats = ExtractionStats()
+        incremental = ets.extract_transactions_simple(self.new_pdf, self.output_path, incremental=True, stats=stats)
+        self.assertEqual(stats.counters["reused_pages"], 3)
+        self.assertEqual(stats.to_dict()["pages"]["count"], 2)
+        full.attrs = {}
+        incremental.attrs = {}
+        pd.testing.assert_frame_equal(full, incremental)
+    
+    def test_changed_page_and_settings(self):
+        """Test that a page with changed tables is re-processed and a sidecar with other settings is ignored."""
+        sidecar = self.output_path + ".state"
+        full = ets.extract_transactions_simple(self.new_pdf, self.output_path, incremental=sidecar)
+        self.assertEqual(IncrementalState(sidecar, {}).previous, [])
+        
+        # Tamper with page 2 as stored: it is read again, and it and every later page are cleaned again
+        with open(sidecar, "rb") as f:
+            data = f.read()
+        state = json.loads(zlib.decompress(data[len(STATE_FORMAT):]))
+        state["pages"][1]["fingerprint"] = "changed"
+        state["pages"][1]["tables"] = []
+        with open(sidecar, "wb") as f:
+            f.write(STATE_FORMAT + zlib.compress(json.dumps(state).encode("utf-8")))
+        
+        stats = ExtractionStats()
+        incremental = ets.extract_transactions_simple(self.new_pdf, self.output_path, incremental=sidecar,
+                                                      stats=stats)
+        self.assertEqual(stats.counters["reused_pages"], 1)
+        self.assertEqual(stats.to_dict()["pages"]["count"], 1)
+        full.attrs = {}
+        incremental.attrs = {}
+        pd.testing.assert_frame_equal(full, incremental)
+
+if __name__ == '__main__':
+    unittest.main()
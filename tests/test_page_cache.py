@@ -0,0 +1,55 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+import pandas as pd
+import extract_transactions_simple as ets
+from utils.page_cache import PageTableCache
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+class TestPageTableCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = PageTableCache(os.path.join(self.tmp_dir, "cache"))
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_round_trip(self):
+        """Test that stored page tables come back unchanged, None cells included."""
+        pages = [[[["Company", None, "N.Amt"], ["BSE_CASH", None, "-25,979"]]], []]
+        self.cache.put("abc", pages)
+        self.assertEqual(self.cache.get("abc"), pages)
+        self.assertIsNone(self.cache.get("missing"))
+    
+    def test_key_depends_on_settings(self):
+        """Test that different table settings give different keys."""
+        self.assertNotEqual(self.cache.key(SAMPLE_PDF), self.cache.key(SAMPLE_PDF, {"snap_tolerance": 5}))
+        self.assertEqual(self.cache.key(SAMPLE_PDF), self.cache.key(SAMPLE_PDF))
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when over the size cap."""
+        pages = [[[[str(i) * 50 for i in range(200)]]]]
+        self.cache.put("old", pages)
+        entry_size = os.path.getsize(os.path.join(self.cache.cache_dir, "old.ptc"))
+        self.cache.max_bytes = entry_size * 2
+        os.utime(os.path.join(self.cache.cache_dir, "old.ptc"), (1, 1))
+        self.cache.put("newer", pages)
+        os.utime(os.path.join(self.cache.cache_dir, "newer.ptc"), (2, 2))
+        self.cache.get("old")  # touch: "newer" is now least recently used
+        self.cache.put("newest", pages)
+        self.assertIsNotNone(self.cache.get("old"))
+        self.assertIsNone(self.cache.get("newer"))
+        self.assertIsNotNone(self.cache.get("newest"))
+    
+    def test_rerun_skips_pdfplumber(self):
+        """Test that a second run on the same PDF is served from the cache with identical rows."""
+        first = ets.extract_transactions_simple(SAMPLE_PDF, os.path.join(self.tmp_dir, "a.xlsx"), cache=self.cache)
+        with mock.patch.object(ets, "_iter_page_tables", side_effect=AssertionError("PDF was parsed")):
+            second = ets.extract_transactions_simple(SAMPLE_PDF, os.path.join(self.tmp_dir, "b.xlsx"), cache=self.cache)
+        pd.testing.assert_frame_equal(first, second)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+import tempfile
+import pandas as pd
+import extract_transactions_simple as ets
+from benchmarks.synthetic_statement import generate_statement
+from utils.extraction_stats import ExtractionStats
+from utils.page_cache import PageTableCache
+from utils.page_filter import PageFilter, page_filter_settings
+from utils.statement_templates import GLOBAL_DETAILS
+
+class TestPageFilter(unittest.TestCase):
+    def test_classify(self):
+        """Test that header, marker and dated numeric lines keep a page, and cover or disclaimer text does not."""
+        page_filter = PageFilter.for_template(GLOBAL_DETAILS)
+        self.assertEqual(page_filter.classify("Company Date Narration B.Qty B.Rate S.Qty S.Rate N.Qty N.Rate N.Amt"),
+                         "header")
+        self.assertEqual(page_filter.classify("Scrip_Symbol : 500116 IDBI - CLIENT"), "marker")
+        self.assertEqual(page_filter.classify("BSE_CASH 2025-04-21 Setl : M-2025613 265 103 0 0 265 103 -27,261"),
+                         "rows")
+        self.assertEqual(page_filter.classify("NSE 28-Jun-2024 1,000 98.20 (98,200.50)"), "rows")
+        self.assertIsNone(page_filter.classify("Global Details As on 26/05/2025\nStatement period: 01/04/2024"))
+        self.assertIsNone(page_filter.classify("Net obligation 1,234,567\nReport any discrepancy within 7 days"))
+        self.assertIsNone(page_filter.classify(""))
+
+    def test_skips_cover_and_summary_pages(self):
+        """Test that pages without transactions skip table detection, are reported, and leave the rows unchanged."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "statement.pdf")
+            generate_statement(pdf_path, 2, cover_page=True, summary_pages=2)
+
+            stats = ExtractionStats()
+            filtered = ets.extract_transactions_simple(pdf_path, False, stats=stats)
+            self.assertEqual(stats.counters["skipped_pages"], 3)
+            self.assertEqual(stats.to_dict()["pages"]["skipped"], [1, 4, 5])
+
+            unfiltered = ets.extract_transactions_simple(pdf_path, False, page_filter=False)
+            filtered.attrs = {}
+            unfiltered.attrs = {}
+            pd.testing.assert_frame_equal(filtered, unfiltered)
+
+            # Skipped pages have no tables, so filtered runs use other cache entries than the one
+            # explore_pdf.py and unfiltered runs read
+            cache = PageTableCache(os.path.join(tmp_dir, "cache"))
+            self.assertEqual(page_filter_settings(None), {})
+            self.assertNotEqual(cache.key(pdf_path),
+                                cache.key(pdf_path, page_filter_settings(PageFilter.for_template(GLOBAL_DETAILS))))
+            self.assertGreater(stats.stages["page_filter"]["calls"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
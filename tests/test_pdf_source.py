@@ -0,0 +1,51 @@
+import unittest
+import io
+import mmap
+import os
+import tempfile
+import extract_transactions_simple as ets
+from utils.columnar_output import portfolio_path
+from utils.pdf_source import describe_source, source_sha256
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+class TestPdfSource(unittest.TestCase):
+    def setUp(self):
+        with open(SAMPLE_PDF, "rb") as f:
+            self.pdf = f.read()
+
+    def test_in_memory_input_and_output(self):
+        """Test that bytes and file-object input written to buffers matches extraction from and to files."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "out.csv")
+            ets.extract_transactions_simple(SAMPLE_PDF, path, output_format="csv")
+            with open(path, "rb") as f:
+                expected = f.read()
+            with open(portfolio_path(path), "rb") as f:
+                expected_portfolio = f.read()
+
+        for source in (self.pdf, io.BytesIO(self.pdf)):
+            output, portfolio = io.BytesIO(), io.BytesIO()
+            df = ets.extract_transactions_simple(source, output, output_format="csv", portfolio_output=portfolio)
+            self.assertEqual(output.getvalue(), expected)
+            self.assertEqual(portfolio.getvalue(), expected_portfolio)
+            self.assertIsNone(df.attrs['layout']['output_path'])
+
+        # False extracts without writing anything; file outputs need a path
+        df = ets.extract_transactions_simple(self.pdf, False)
+        self.assertEqual(len(df), 11)
+        with self.assertRaises(ValueError):
+            ets.extract_transactions_simple(self.pdf, io.BytesIO(), output_format="sqlite")
+
+    def test_mmap_in_parallel(self):
+        """Test that an mmap'ed PDF is extracted by pool workers and hashed like the file."""
+        with open(SAMPLE_PDF, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            output = io.BytesIO()
+            df = ets.extract_transactions_simple(mapped, output, workers=2)
+            self.assertEqual(source_sha256(mapped), source_sha256(SAMPLE_PDF))
+        self.assertEqual(len(df), 11)
+        self.assertTrue(output.getvalue().startswith(b"PK"))
+        self.assertEqual(describe_source(io.BytesIO(self.pdf)), "<in-memory PDF>")
+
+if __name__ == '__main__':
+    unittest.main()
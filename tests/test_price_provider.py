@@ -0,0 +1,94 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from extract_transactions_simple import _sheet_footer
+from utils.price_provider import (CachedPriceProvider, PriceProvider, SnapshotPriceProvider, fill_portfolio_prices,
+                                  open_price_provider)
+
+SNAPSHOT = """Symbol,BOM_ID,Close,Date
+NSE:pnb,532461,110.5,2024-06-27
+IDBI,500116,"1,098.25",2024-06-28
+,544271,80,2024-06-28
+"""
+
+class CountingProvider(PriceProvider):
+    def __init__(self):
+        self.calls = []
+
+    def lookup(self, symbols, bom_ids):
+        self.calls.append(list(symbols))
+        return np.full(len(symbols), 10.0)
+
+class TestPriceProvider(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "prices.csv")
+        with open(self.path, "w") as f:
+            f.write(SNAPSHOT)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_snapshot_lookup(self):
+        """Test lookups by NSE symbol with a BOM_ID fallback, NaN for unknown securities, and the snapshot date."""
+        provider = SnapshotPriceProvider(self.path)
+        prices = provider.lookup(["PNB", "IDBI", "GARUDA", "XYZ"], ["532461", None, "544271", np.nan])
+        np.testing.assert_array_equal(prices, [110.5, 1098.25, 80.0, np.nan])
+        self.assertEqual(str(provider.as_of), "2024-06-28")
+
+        # The snapshot is re-read when the file changes
+        with open(self.path, "w") as f:
+            f.write("nse,ltp\nPNB,120\n")
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(provider.lookup(["PNB"], [None])[0], 120.0)
+        self.assertIsNone(provider.as_of)
+
+    def test_cache_ttl(self):
+        """Test that cached prices are reused until their TTL expires and misses are fetched in one call."""
+        now = [0.0]
+        inner = CountingProvider()
+        provider = CachedPriceProvider(inner, ttl=60, clock=lambda: now[0])
+        provider.lookup(["A", "B"], [None, "1"])
+        provider.lookup(["B", "C", "A"], ["1", None, None])
+        self.assertEqual(inner.calls, [["A", "B"], ["C"]])
+        now[0] = 61.0
+        provider.lookup(["A"], [None])
+        self.assertEqual(inner.calls[-1], ["A"])
+
+    def test_open_by_path(self):
+        """Test that a snapshot path is opened once, and again after the file changes or with another ttl."""
+        provider = open_price_provider(self.path)
+        self.assertIs(open_price_provider(self.path), provider)
+        self.assertIsNot(open_price_provider(self.path, ttl=60), open_price_provider(self.path))
+
+        with open(self.path, "w") as f:
+            f.write("nse,ltp\nPNB,120\n")
+        os.utime(self.path, ns=(0, 0))
+        reopened = open_price_provider(self.path)
+        self.assertIsNot(reopened, provider)
+        self.assertEqual(reopened.lookup(["PNB"], [None])[0], 120.0)
+        with self.assertRaises(TypeError):
+            PriceProvider()
+
+    def test_priced_footer(self):
+        """Test that a priced portfolio writes numbers (blank where unknown) instead of GOOGLEFINANCE formulas."""
+        df = pd.DataFrame({"Scrip_Symbol": ["PNB", "XYZ"], "Date": ["2024-06-28"] * 2, "N.Qty": [10.0, 5.0],
+                           "N.Amt": [-1000.0, -50.0]})
+        portfolio_df = pd.DataFrame({"Scrip_Symbol": ["PNB", "XYZ"], "N.Qty": [10.0, 5.0], "BOM_ID": ["532461", None]})
+        portfolio_df, priced = fill_portfolio_prices(portfolio_df, SnapshotPriceProvider(self.path))
+        self.assertEqual(priced, 1)
+
+        footer, layout = _sheet_footer(df, portfolio_df, priced=True)
+        first, last = layout['portfolio_rows']
+        self.assertEqual(footer[first][4], 110.5)
+        self.assertEqual(footer[first][5], 1105.0)
+        self.assertIsNone(footer[last][4])
+        self.assertIsNone(footer[last][5])
+
+        footer, _ = _sheet_footer(df, portfolio_df)
+        self.assertTrue(footer[first][4].startswith("=IFERROR("))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import os
+import tempfile
+import threading
+import time
+import extract_transactions_simple as ets
+from benchmarks.synthetic_statement import generate_statement
+from utils.progress import CancellationToken, ExtractionCancelled
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+class TestProgress(unittest.TestCase):
+    def test_progress_events(self):
+        """Test that progress is reported after every page and at each stage, ending with done."""
+        events = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            df = ets.extract_transactions_simple(SAMPLE_PDF, os.path.join(tmp_dir, "out.xlsx"), progress=events.append)
+        self.assertEqual([event.stage for event in events],
+                         ["open", "page", "page", "combine", "portfolio", "write", "done"])
+        self.assertEqual([(event.page, event.page_count) for event in events if event.stage == "page"], [(1, 2), (2, 2)])
+        self.assertEqual(events[-1].rows, len(df))
+
+    def test_cancel_between_pages(self):
+        """Test that cancelling stops the conversion after the current page and leaves no output behind."""
+        token = CancellationToken()
+        pages = []
+
+        def on_progress(event):
+            if event.stage == "page":
+                pages.append(event.page)
+                token.cancel()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for output in ("out.xlsx", "out.csv"):
+                pages.clear()
+                token = CancellationToken()
+                output_path = os.path.join(tmp_dir, output)
+                with self.assertRaises(ExtractionCancelled):
+                    ets.extract_transactions_simple(SAMPLE_PDF, output_path, progress=on_progress, cancel_token=token)
+                self.assertEqual(pages, [1])
+                self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_cancel_stops_worker_pool(self):
+        """Test that a cancelled parallel conversion returns without waiting for the workers to finish."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "long.pdf")
+            generate_statement(pdf_path, 40)
+            token = CancellationToken()
+            timer = threading.Timer(0.5, token.cancel)
+            timer.start()
+            start = time.perf_counter()
+            with self.assertRaises(ExtractionCancelled):
+                ets.extract_transactions_simple(pdf_path, os.path.join(tmp_dir, "out.xlsx"), workers=2,
+                                                cancel_token=token)
+            self.assertLess(time.perf_counter() - start, 2)
+
+if __name__ == '__main__':
+    unittest.main()
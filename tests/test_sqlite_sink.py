@@ -0,0 +1,37 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+import extract_transactions_simple as ets
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+class TestSqliteSink(unittest.TestCase):
+    def test_reimport_is_upsert(self):
+        """Test that transactions and portfolio land in SQLite and importing the same PDF twice adds nothing."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database_path = os.path.join(tmp_dir, "statements.sqlite")
+            df = ets.extract_transactions_simple(SAMPLE_PDF, database_path)
+            self.assertEqual(df.attrs['layout']['format'], 'sqlite')
+            
+            conn = sqlite3.connect(database_path)
+            try:
+                hashes = [row[0] for row in conn.execute("SELECT row_hash FROM transactions ORDER BY row_hash")]
+                self.assertEqual(len(hashes), len(df))
+                amounts = [row[0] for row in conn.execute("SELECT n_amt FROM transactions ORDER BY row_num")]
+                self.assertEqual(amounts, df['N.Amt'].tolist())
+                
+                ets.extract_transactions_simple(SAMPLE_PDF, database_path)
+                self.assertEqual([row[0] for row in conn.execute("SELECT row_hash FROM transactions ORDER BY row_hash")],
+                                 hashes)
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM statements").fetchone()[0], 1)
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM portfolio").fetchone()[0],
+                                 df['Scrip_Symbol'].nunique())
+                indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+                self.assertTrue({"idx_transactions_scrip_symbol", "idx_transactions_bom_id",
+                                 "idx_transactions_date"} <= indexes)
+            finally:
+                conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
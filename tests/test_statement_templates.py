@@ -0,0 +1,98 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest import mock
+import extract_transactions_simple as ets
+from benchmarks.synthetic_statement import write_pages
+from utils import statement_templates
+from utils.statement_templates import (GLOBAL_DETAILS, STATEMENT_TEMPLATES, StatementTemplate, TemplateRegistry,
+                                       resolve_statement_template)
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+# A layout with its own marker, symbol cell, column names and numeric columns
+CONTRACT_NOTES = StatementTemplate(
+    "contract_notes",
+    fingerprint=["Segment", "Trade Date", "Qty", "Net Amount"],
+    symbol_marker=r"Security\s*:",
+    symbol_column=1,
+    column_map={"Trade Date": "Date", "Qty": "N.Qty", "Rate": "N.Rate", "Net Amount": "N.Amt"},
+    numeric_columns=["N.Qty", "N.Rate", "N.Amt"],
+    repeated_header_columns=["Segment"],
+    min_filled_cells=4,
+)
+
+# A contract note: header, one security row and its trades
+NOTE_COLUMNS = [14, 120, 260, 380, 520]
+SECURITY_COLUMNS = [14, 120, 520]
+CONTRACT_NOTE_ROWS = [
+    (NOTE_COLUMNS, ["Segment", "Trade Date", "Qty", "Net Amount"]),
+    (SECURITY_COLUMNS, ["Security :", "500116 IDBI - CLIENT"]),
+    (NOTE_COLUMNS, ["NSE", "28/06/2024", "1,000", "-98,200.50"]),
+    (NOTE_COLUMNS, ["NSE", "01/07/2024", "-500", "51,000"]),
+]
+
+class TestStatementTemplates(unittest.TestCase):
+    def test_detection(self):
+        """Test that the header fingerprint picks the matching (most specific) template, or none."""
+        registry = TemplateRegistry([GLOBAL_DETAILS, CONTRACT_NOTES])
+        self.assertIs(registry.match("Company Date Narration B.Qty B.Rate S.Qty S.Rate N.Qty N.Rate N.Amt"),
+                      GLOBAL_DETAILS)
+        self.assertIs(registry.match("ACME BROKING\nSegment Trade Date Qty Rate Net Amount"), CONTRACT_NOTES)
+        self.assertIsNone(registry.match("Segment Trade Date Qty"))
+        specific = registry.register(StatementTemplate("contract_notes_v2", CONTRACT_NOTES.fingerprint + ["Brokerage"]))
+        self.assertIs(registry.match("Segment Trade Date Qty Brokerage Net Amount"), specific)
+
+        self.assertEqual(resolve_statement_template(None, SAMPLE_PDF, registry), (GLOBAL_DETAILS, True))
+        # A single registered template is used without reading the PDF
+        self.assertEqual(resolve_statement_template(None, "missing.pdf", TemplateRegistry([GLOBAL_DETAILS])),
+                         (GLOBAL_DETAILS, False))
+        with self.assertRaises(ValueError):
+            resolve_statement_template("unknown", SAMPLE_PDF, registry)
+
+    def test_template_drives_parsing(self):
+        """Test that rows are classified and cleaned with the template's marker, columns and numeric columns."""
+        header = ["Segment", "Trade Date", "Qty", "Net Amount"]
+        tables = [[header, ["Security :", "500116 IDBI - CLIENT", None, None],
+                   ["NSE", "28/06/2024", "1,000", "-98,200.50"], header, ["NSE", "01/07/2024", "-500", "51,000"]]]
+        state = {'column_names': None, 'last_valid_symbol': None, 'statement_template': CONTRACT_NOTES}
+        rows = ets._table_rows_to_transactions(0, tables, state)
+        self.assertEqual(state['column_names'], ["Scrip_Symbol", "Segment", "Date", "N.Qty", "N.Amt"])
+
+        df = ets._clean_transactions(rows.to_frame(range(len(rows))), state)
+        self.assertEqual(list(df['Scrip_Symbol']), ["IDBI", "IDBI"])
+        self.assertEqual(list(df['Date']), ["2024-06-28", "2024-07-01"])
+        self.assertEqual(list(df['N.Amt']), [-98200.5, 51000.0])
+
+    def test_detects_second_layout(self):
+        """Test that a registered second layout is detected over the default, read once, and parsed with its template."""
+        # Only the real layout ships, so detection reads nothing by default
+        self.assertEqual([template.name for template in STATEMENT_TEMPLATES], ["global_details"])
+        registry = TemplateRegistry([GLOBAL_DETAILS, CONTRACT_NOTES])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "contract_note.pdf")
+            write_pages(pdf_path, [CONTRACT_NOTE_ROWS])
+            self.assertEqual(resolve_statement_template(None, pdf_path, registry), (CONTRACT_NOTES, True))
+
+            header = mock.Mock(wraps=statement_templates.first_page_header)
+            with mock.patch.object(statement_templates, "first_page_header", header), \
+                    mock.patch.object(statement_templates, "STATEMENT_TEMPLATES", registry):
+                df = ets.extract_transactions_simple(pdf_path, False)
+            self.assertEqual(header.call_count, 1)
+        self.assertEqual(list(df['Scrip_Symbol']), ["IDBI", "IDBI"])
+        self.assertEqual(list(df['N.Amt']), [-98200.5, 51000.0])
+
+    def test_json_round_trip(self):
+        """Test that a template saved as JSON loads with the same settings and compiled marker."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "contract_notes.json")
+            with open(path, "w") as f:
+                json.dump(CONTRACT_NOTES.to_dict(), f)
+            loaded, detected = resolve_statement_template(path, SAMPLE_PDF)
+        self.assertFalse(detected)
+        self.assertEqual(loaded.to_dict(), CONTRACT_NOTES.to_dict())
+        self.assertEqual(loaded.symbol_of(["Security:", "500116 IDBI"]), "500116 IDBI")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+import pdfplumber
+import pandas as pd
+import extract_transactions_simple as ets
+from utils.table_template import TableTemplate
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+class TestTableTemplate(unittest.TestCase):
+    def learn_template(self, pdf):
+        page = pdf.pages[0]
+        found = page.find_tables()
+        template = TableTemplate()
+        self.assertTrue(template.learn(page, found, [table.extract() for table in found]))
+        return template
+
+    def test_matches_full_detection(self):
+        """Test that every page read against the learned grid gives the same tables as extract_tables()."""
+        with pdfplumber.open(SAMPLE_PDF) as pdf:
+            template = self.learn_template(pdf)
+            self.assertEqual(len(template.columns), 12)
+            self.assertEqual(template.header[0], "Company")
+            for page in pdf.pages:
+                self.assertEqual(template.extract_tables(page), page.extract_tables())
+
+    def test_off_grid_page_falls_back(self):
+        """Test that a page whose rulings are not on the template columns is rejected."""
+        with pdfplumber.open(SAMPLE_PDF) as pdf:
+            template = self.learn_template(pdf)
+            template.columns = [x + 20 for x in template.columns]
+            self.assertIsNone(template.extract_tables(pdf.pages[0]))
+
+    def test_explicit_settings(self):
+        """Test that the template reads pages with the learned columns as explicit vertical lines."""
+        with pdfplumber.open(SAMPLE_PDF) as pdf:
+            template = self.learn_template(pdf)
+            settings = template.table_settings(pdf.pages[1])
+            self.assertEqual(settings["vertical_strategy"], "explicit")
+            self.assertTrue({line["x0"] for line in settings["explicit_vertical_lines"]} <= set(template.columns))
+
+    def test_failing_template_falls_back(self):
+        """Test that a page the template raises on is read with full detection."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "out.xlsx")
+            baseline = ets.extract_transactions_simple(SAMPLE_PDF, output_path)
+            with mock.patch.object(TableTemplate, "extract_tables", side_effect=AttributeError("boom")):
+                fallback = ets.extract_transactions_simple(SAMPLE_PDF, output_path, template=True)
+            pd.testing.assert_frame_equal(baseline, fallback)
+
+    def test_saved_template_is_reused(self):
+        """Test that a template path is learned and saved once, then reused with identical results."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            template_path = os.path.join(tmp_dir, "broker.json")
+            output_path = os.path.join(tmp_dir, "out.xlsx")
+            baseline = ets.extract_transactions_simple(SAMPLE_PDF, output_path)
+            learned = ets.extract_transactions_simple(SAMPLE_PDF, output_path, template=template_path)
+            self.assertTrue(os.path.exists(template_path))
+            reused = ets.extract_transactions_simple(SAMPLE_PDF, output_path, template=template_path)
+            pd.testing.assert_frame_equal(baseline, learned)
+            pd.testing.assert_frame_equal(baseline, reused)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import os
+import tempfile
+import pdfplumber
+import pandas as pd
+import extract_transactions_simple as ets
+from utils import words_engine
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sample_Data", "Main.PDF")
+
+class TestWordsEngine(unittest.TestCase):
+    def test_same_tables_as_pdfplumber(self):
+        """Test that the words engine rebuilds the raw tables of every page, merged cells and marker rows included."""
+        with pdfplumber.open(SAMPLE_PDF) as pdf:
+            for page in pdf.pages:
+                self.assertEqual(words_engine.extract_tables(page), page.extract_tables())
+
+    def test_same_dataframe(self):
+        """Test that both engines give identical DataFrames."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "out.xlsx")
+            expected = ets.extract_transactions_simple(SAMPLE_PDF, output_path)
+            result = ets.extract_transactions_simple(SAMPLE_PDF, output_path, engine="words")
+            pd.testing.assert_frame_equal(expected, result)
+
+    def test_unknown_engine(self):
+        """Test that an unknown engine raises ValueError before any extraction starts."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(ValueError):
+                ets.extract_transactions_simple(SAMPLE_PDF, os.path.join(tmp_dir, "out.xlsx"), engine="camelot")
+            self.assertEqual(os.listdir(tmp_dir), [])
+        with self.assertRaises(ValueError):
+            ets.iter_transactions(SAMPLE_PDF, engine="camelot")
+
+if __name__ == '__main__':
+    unittest.main()
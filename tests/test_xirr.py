@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.xirr import grouped_xirr, portfolio_xirr, xirr
+
+class TestXirr(unittest.TestCase):
+    def test_matches_excel(self):
+        """Test the rate of Excel's documented XIRR example and of a one-year 10% return."""
+        self.assertAlmostEqual(xirr([-10000, 2750, 4250, 3250, 2750],
+                                    ["2008-01-01", "2008-03-01", "2008-10-30", "2009-02-15", "2009-04-01"]),
+                               0.373362535, places=8)
+        self.assertAlmostEqual(xirr([-100, 110], ["2023-01-01", "2024-01-01"]), 0.1, places=12)
+    
+    def test_batched_groups_match_single_calls(self):
+        """Test that one batched call gives each group's own XIRR, including ones Newton alone cannot reach."""
+        rng = np.random.default_rng(0)
+        groups = np.repeat(np.arange(200), 20)
+        dates = np.datetime64("2015-01-01") + rng.integers(0, 3650, len(groups)).astype("timedelta64[D]")
+        amounts = -rng.uniform(100, 1000, len(groups))
+        last = np.arange(200) * 20
+        dates[last] = np.datetime64("2025-06-30")
+        amounts[last] = 0
+        amounts[last] = rng.uniform(0.3, 3, 200) * -np.bincount(groups, amounts)
+        rates = xirr(amounts, dates, groups)
+        self.assertFalse(np.isnan(rates).any())
+        for group in range(0, 200, 17):
+            mask = groups == group
+            self.assertAlmostEqual(rates[group], xirr(amounts[mask], dates[mask]), places=10)
+        # A 30-year 99% loss: Newton from 10% diverges, the bracket still finds it
+        self.assertAlmostEqual(xirr([-100, 1], ["2023-01-01", "2053-01-01"]), 0.01 ** (365 / 10958) - 1, places=12)
+    
+    def test_no_rate(self):
+        """Test that flows without a sign change, or all on one day, have no XIRR."""
+        rates = xirr([-100, -5, 100, -100], ["2023-01-01", "2024-01-01", "2023-01-01", "2023-01-01"], [0, 0, 1, 1])
+        self.assertTrue(np.isnan(rates).all())
+    
+    def test_grouped_xirr(self):
+        """Test that a DataFrame grouped by one or more columns gets each group's own scalar XIRR."""
+        rng = np.random.default_rng(1)
+        n = 300
+        # Buys in the first 1000 days, sells after; GARUDA is never sold and has no rate
+        symbols = rng.choice(["IDBI", "PNB", "BSE", "GARUDA"], n)
+        sell = (rng.random(n) < 0.5) & (symbols != "GARUDA")
+        df = pd.DataFrame({"Source": rng.choice(["march.pdf", "april.pdf"], n),
+                           "Scrip_Symbol": pd.Categorical(symbols),
+                           "Date": (pd.Timestamp("2020-01-01") + pd.to_timedelta(
+                               np.where(sell, rng.integers(1000, 1500, n), rng.integers(0, 1000, n)), unit="D")
+                                    ).strftime("%Y-%m-%d"),
+                           "N.Amt": np.where(sell, rng.uniform(150, 1300, n), -rng.uniform(100, 1000, n))})
+        df.loc[5, "Scrip_Symbol"] = np.nan
+
+        rates = grouped_xirr(df)
+        self.assertEqual(list(rates.index), ["BSE", "GARUDA", "IDBI", "PNB"])
+        self.assertTrue(np.isnan(rates["GARUDA"]))
+        self.assertFalse(np.isnan(rates.drop("GARUDA")).any())
+        for symbol, rate in rates.drop("GARUDA").items():
+            group = df[df["Scrip_Symbol"] == symbol]
+            self.assertAlmostEqual(rate, xirr(group["N.Amt"], group["Date"]), places=10)
+
+        rates = grouped_xirr(df, by=["Source", "Scrip_Symbol"])
+        self.assertEqual(len(rates), 8)
+        for (source, symbol), rate in rates.drop("GARUDA", level=1).items():
+            group = df[(df["Source"] == source) & (df["Scrip_Symbol"] == symbol)]
+            self.assertAlmostEqual(rate, xirr(group["N.Amt"], group["Date"]), places=10)
+
+    def test_portfolio_xirr(self):
+        """Test per-scrip and portfolio XIRR: closed positions need no value, open ones do."""
+        df = pd.DataFrame({"Scrip_Symbol": ["A", "A", "B"], "Date": ["2023-01-01", "2024-01-01", "2023-01-01"],
+                           "N.Qty": [10, -10, 5], "N.Amt": [-100.0, 110.0, -200.0]})
+        result = portfolio_xirr(df, as_of="2024-01-01")
+        self.assertAlmostEqual(result["scrips"]["A"], 0.1)
+        self.assertIsNone(result["scrips"]["B"])
+        self.assertIsNone(result["portfolio"])
+        
+        result = portfolio_xirr(df, values={"B": 240.0}, as_of="2024-01-01")
+        self.assertAlmostEqual(result["scrips"]["B"], 0.2)
+        self.assertAlmostEqual(result["portfolio"], 350 / 300 - 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+"""
+Columnar output formats: Parquet, Arrow IPC and CSV.
+
+Analytics jobs read these far faster than xlsx. Transactions are written
+while pages are extracted: batches are buffered into row groups of
+ROW_GROUP_ROWS rows (Parquet row groups, Arrow record batches, CSV chunks)
+so memory stays bounded by one row group. Numeric columns are stored as
+float64 and the Date column as a date, whatever their dtype in a given
+page's batch, so every row group has the same schema.
+
+The portfolio summary is written as its own table next to the
+transactions ('<name>_portfolio.<ext>') instead of cells under them.
+
+Tables can also be written to a binary file-like object (e.g. io.BytesIO)
+instead of a path, so nothing touches the disk.
+
+Parquet and Arrow need pyarrow, which is optional; CSV only needs pandas.
+The "sqlite" output format is handled by utils.sqlite_sink.
+"""
+import io
+import os
+
+import pandas as pd
+
+OUTPUT_FORMATS = ("xlsx", "parquet", "arrow", "csv", "sqlite")
+FORMAT_EXTENSIONS = {"xlsx": ".xlsx", "parquet": ".parquet", "arrow": ".arrow", "csv": ".csv", "sqlite": ".sqlite"}
+_FORMATS_BY_EXTENSION = {".xlsx": "xlsx", ".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow",
+                         ".feather": "arrow", ".ipc": "arrow", ".csv": "csv", ".sqlite": "sqlite", ".sqlite3": "sqlite",
+                         ".db": "sqlite"}
+ROW_GROUP_ROWS = 64 * 1024
+
+
+def output_format_for(path, output_format=None):
+    """
+    Pick the output format: the one given, else the one matching the path's extension, else xlsx.
+
+    Raises:
+        ValueError: For an unknown format name
+    """
+    if output_format is None:
+        extension = os.path.splitext(path)[1].lower() if path else ""
+        return _FORMATS_BY_EXTENSION.get(extension, "xlsx")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}; expected one of {', '.join(OUTPUT_FORMATS)}")
+    return output_format
+
+
+def portfolio_path(path):
+    """Path of the portfolio table written next to a transactions file."""
+    root, extension = os.path.splitext(path)
+    return f"{root}_portfolio{extension}"
+
+
+def _import_pyarrow(output_format):
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(f"Writing {output_format} output requires pyarrow; install it with 'pip install pyarrow'"
+                          ) from None
+    return pyarrow
+
+
+class TableWriter:
+    """
+    Streams DataFrame batches into one Parquet, Arrow IPC or CSV file.
+
+    The file is written under a temporary name and moved into place by
+    close(), so readers never see a partial table. The first batch fixes
+    the columns, unless set_columns() gave them before it; later batches are
+    aligned to them.
+
+    Args:
+        path (str | file-like): Output file, or a writable binary stream that is written directly
+            (abort() truncates a seekable stream back to where the table started)
+        output_format (str): "parquet", "arrow" or "csv"
+        numeric_columns (list): Columns stored as float64
+        date_columns (list): Columns stored as dates (YYYY-MM-DD strings or datetimes)
+        row_group_rows (int): Rows buffered per row group
+    """
+
+    def __init__(self, path, output_format, numeric_columns=(), date_columns=(), row_group_rows=ROW_GROUP_ROWS):
+        if output_format not in ("parquet", "arrow", "csv"):
+            raise ValueError(f"TableWriter cannot write {output_format!r}")
+        self.pa = _import_pyarrow(output_format) if output_format != "csv" else None
+        self.path = path
+        self.output_format = output_format
+        self.numeric_columns = list(numeric_columns)
+        self.date_columns = list(date_columns)
+        self.row_group_rows = row_group_rows
+        self.rows = 0
+        self.columns = None
+        self._pending = []
+        self._pending_rows = 0
+        self._schema = None
+        self._writer = None
+        self._stream = None if isinstance(path, (str, os.PathLike)) else path
+        if self._stream is None:
+            self._tmp_path = f"{path}.tmp"
+        else:
+            self._tmp_path = None
+            self._start = self._stream.tell() if self._stream.seekable() else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def set_columns(self, columns):
+        """
+        Fix the table's columns before the first batch is written, e.g. to a document's full header
+        when early batches leave out trailing columns no row has reached yet.
+        """
+        if self._pending or self._writer is not None:
+            raise ValueError("Columns must be set before the first batch is written")
+        self.columns = list(columns)
+
+    def _normalize(self, df):
+        """Align a batch to the table's columns and storage dtypes."""
+        if self.columns is None:
+            self.columns = list(df.columns)
+        extra = [name for name in df.columns if name not in self.columns]
+        if extra:
+            raise ValueError(f"Columns {extra} appeared after the first batch was written")
+        df = df.reindex(columns=self.columns)
+        updates = {}
+        for name in self.columns:
+            if name in self.numeric_columns:
+                updates[name] = pd.to_numeric(df[name], errors='coerce').astype('float64')
+            elif name in self.date_columns and not pd.api.types.is_datetime64_any_dtype(df[name]):
+                updates[name] = pd.to_datetime(df[name], format='%Y-%m-%d', errors='coerce')
+            elif isinstance(df[name].dtype, pd.CategoricalDtype):
+                updates[name] = df[name].astype(object)
+        return df.assign(**updates) if updates else df
+
+    def _to_arrow(self, df):
+        pa = self.pa
+        if self._schema is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            for name in self.columns:
+                index = schema.get_field_index(name)
+                if name in self.date_columns:
+                    schema = schema.set(index, pa.field(name, pa.date32()))
+                elif pa.types.is_null(schema.field(index).type) or pa.types.is_large_string(schema.field(index).type):
+                    # Text columns are plain strings, also when a batch has no values to infer them from
+                    schema = schema.set(index, pa.field(name, pa.string()))
+            self._schema = schema.remove_metadata()
+        return pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+
+    def write(self, df, page_num=None):
+        """
+        Add a batch of rows; a row group is written whenever enough rows are buffered.
+
+        Args:
+            df (pd.DataFrame): Rows to add
+            page_num (int, optional): Page the rows come from (not stored; SqliteSink.write takes the same arguments)
+        """
+        if len(df) == 0 and self.columns is not None:
+            return
+        self._pending.append(self._normalize(df))
+        self._pending_rows += len(df)
+        if self._pending_rows >= self.row_group_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        df = pd.concat(self._pending) if len(self._pending) > 1 else self._pending[0]
+        self._pending = []
+        self._pending_rows = 0
+
+        target = self._tmp_path or self._stream
+        if self.output_format == "csv":
+            first = self._writer is None
+            if first:
+                if self._stream is None:
+                    self._writer = open(self._tmp_path, "w", encoding="utf-8", newline="")
+                else:
+                    self._writer = io.TextIOWrapper(self._stream, encoding="utf-8", newline="", write_through=True)
+            df.to_csv(self._writer, header=first, index=False, date_format='%Y-%m-%d', float_format='%.15g')
+        else:
+            table = self._to_arrow(df)
+            if self._writer is None:
+                if self.output_format == "parquet":
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(target, self._schema)
+                else:
+                    self._writer = self.pa.ipc.new_file(target, self._schema)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        """Write the last row group and move the file into place."""
+        self._flush()
+        if self._writer is None:
+            # Nothing was written: still produce an (empty) file
+            if self.columns is None:
+                self.columns = []
+            self._pending = [pd.DataFrame(columns=self.columns)]
+            self._flush()
+        self._close_writer()
+        if self._stream is None:
+            os.replace(self._tmp_path, self.path)
+
+    def _close_writer(self):
+        if self._stream is not None and self.output_format == "csv":
+            # Leave the caller's stream open
+            self._writer.flush()
+            self._writer.detach()
+        else:
+            self._writer.close()
+        self._writer = None
+
+    def abort(self):
+        """Drop the partial file."""
+        if self._writer is not None:
+            self._close_writer()
+        if self._stream is not None:
+            if self._start is not None:
+                self._stream.seek(self._start)
+                self._stream.truncate()
+        elif os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def write_table(path, df, output_format, numeric_columns=(), date_columns=()):
+    """Write a whole DataFrame as one table with TableWriter."""
+    with TableWriter(path, output_format, numeric_columns, date_columns) as writer:
+        writer.write(df)
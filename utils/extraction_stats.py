@@ -0,0 +1,230 @@
+"""
+Per-stage timing and memory statistics for a conversion.
+
+The extractor marks its stages (PDF open, table finding, row
+classification, cleaning, portfolio aggregation, Excel writing) with
+stats.stage(name) and reports how long table finding took on every page.
+An ExtractionStats collects:
+
+- wall (perf_counter) and CPU (process_time) seconds per stage; stages may
+  nest, and a stage's time excludes the stages nested in it, so the stage
+  totals add up to the measured time,
+- optionally, the peak traced memory per stage via tracemalloc (this slows
+  the conversion down noticeably, so it is off by default),
+- per-page table-finding seconds and a few counters (pages, rows, ...),
+- the pages the text-layer pre-filter kept out of table finding.
+
+When statistics are not requested the extractor uses NULL_STATS, whose
+methods do nothing, so the disabled overhead is a method call per stage.
+"""
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+STATS_FORMAT = 1
+_MIB = 1024 * 1024
+
+
+class ExtractionStats:
+    """
+    Collects per-stage timings, per-page table-finding times and counters.
+
+    Args:
+        trace_memory (bool): Also record the peak traced memory of each stage with tracemalloc.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.page_times = {}
+        self.skipped_pages = []
+        self.counters = {}
+        self.peak_memory = None
+        # One [name, wall_start, cpu_start, nested_peak] frame per open stage
+        self._stack = []
+        self._started_tracing = False
+
+    def _entry(self, name):
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0, "peak_bytes": None}
+        return entry
+
+    def _charge(self, frame, wall, cpu):
+        """Add the time since the frame (re)started to its stage."""
+        entry = self._entry(frame[0])
+        entry["wall_s"] += wall - frame[1]
+        entry["cpu_s"] += cpu - frame[2]
+
+    def _read_peak(self):
+        """Peak traced memory since the last reset; starts the next measurement window."""
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        return peak
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time the enclosed block as stage `name`.
+
+        Args:
+            name (str): Stage name; repeated stages accumulate
+        """
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            peak = self._read_peak()
+            if self._stack:
+                self._stack[-1][3] = max(self._stack[-1][3], peak)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        if self._stack:
+            # Pause the enclosing stage
+            self._charge(self._stack[-1], wall, cpu)
+        frame = [name, wall, cpu, 0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter(), time.process_time()
+            self._charge(frame, wall, cpu)
+            self._stack.pop()
+            entry = self._entry(name)
+            entry["calls"] += 1
+            if self._stack:
+                # Resume the enclosing stage
+                self._stack[-1][1], self._stack[-1][2] = wall, cpu
+
+            if self.trace_memory and tracemalloc.is_tracing():
+                peak = max(self._read_peak(), frame[3])
+                entry["peak_bytes"] = max(entry["peak_bytes"] or 0, peak)
+                self.peak_memory = max(self.peak_memory or 0, peak)
+                if self._stack:
+                    self._stack[-1][3] = max(self._stack[-1][3], peak)
+
+    def record_page(self, page_num, seconds):
+        """Record how long table finding took on one page (0-based page number)."""
+        self.page_times[page_num] = seconds
+
+    def skip_page(self, page_num):
+        """Record a page the pre-filter skipped (0-based page number); counted as "skipped_pages"."""
+        self.skipped_pages.append(page_num)
+        self.count("skipped_pages")
+
+    def count(self, name, n=1):
+        """Add `n` to counter `name`."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def finish(self):
+        """Stop tracemalloc if this object started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def to_dict(self, slowest=5):
+        """
+        Describe the statistics as JSON-serialisable data.
+
+        Args:
+            slowest (int): Number of slowest pages to list
+
+        Returns:
+            dict: {"format", "stages", "total_wall_s", "total_cpu_s", "peak_memory_mib", "pages", "counters"}
+        """
+        stages = {}
+        for name, entry in self.stages.items():
+            stages[name] = {"wall_s": round(entry["wall_s"], 6), "cpu_s": round(entry["cpu_s"], 6),
+                            "calls": entry["calls"]}
+            if entry["peak_bytes"] is not None:
+                stages[name]["peak_memory_mib"] = round(entry["peak_bytes"] / _MIB, 3)
+
+        times = [self.page_times[page_num] for page_num in sorted(self.page_times)]
+        pages = {"count": len(times), "table_s_total": round(sum(times), 6),
+                 "table_s_mean": round(sum(times) / len(times), 6) if times else None,
+                 "table_s_max": round(max(times), 6) if times else None,
+                 "slowest": [{"page": page_num + 1, "table_s": round(seconds, 6)} for page_num, seconds in
+                             sorted(self.page_times.items(), key=lambda item: -item[1])[:slowest]],
+                 "table_s": [round(seconds, 6) for seconds in times],
+                 "skipped": [page_num + 1 for page_num in sorted(self.skipped_pages)]}
+
+        return {"format": STATS_FORMAT, "stages": stages,
+                "total_wall_s": round(sum(entry["wall_s"] for entry in self.stages.values()), 6),
+                "total_cpu_s": round(sum(entry["cpu_s"] for entry in self.stages.values()), 6),
+                "peak_memory_mib": round(self.peak_memory / _MIB, 3) if self.peak_memory is not None else None,
+                "pages": pages, "counters": dict(self.counters)}
+
+    def save_json(self, path):
+        """Write to_dict() to `path` atomically."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def log(self, logger=None, level=logging.INFO):
+        """
+        Emit one line per stage plus a summary through a logger.
+
+        Args:
+            logger (logging.Logger, optional): Defaults to this module's logger; pass
+                utils.logger.setup_logger() to write into the application log.
+            level (int): Logging level of the lines
+        """
+        logger = logger or logging.getLogger(__name__)
+        data = self.to_dict()
+        for name, entry in data["stages"].items():
+            memory = f" peak {entry['peak_memory_mib']} MiB" if "peak_memory_mib" in entry else ""
+            logger.log(level, f"stage {name}: wall {entry['wall_s']:.3f}s cpu {entry['cpu_s']:.3f}s "
+                              f"calls {entry['calls']}{memory}")
+        pages = data["pages"]
+        if pages["count"]:
+            logger.log(level, f"table finding: {pages['count']} pages, mean {pages['table_s_mean']:.4f}s, "
+                              f"max {pages['table_s_max']:.4f}s")
+        if pages["skipped"]:
+            logger.log(level, f"page filter skipped pages: {', '.join(str(page) for page in pages['skipped'])}")
+        counters = " ".join(f"{name} {value}" for name, value in data["counters"].items())
+        logger.log(level, f"total: wall {data['total_wall_s']:.3f}s cpu {data['total_cpu_s']:.3f}s {counters}".rstrip())
+
+
+class _NullStats:
+    """Stand-in used when statistics are off: every method is a no-op."""
+
+    enabled = False
+    _context = nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def record_page(self, page_num, seconds):
+        pass
+
+    def skip_page(self, page_num):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_STATS = _NullStats()
+
+
+def resolve_stats(stats):
+    """
+    Normalise a `stats` argument: None/False disables, True creates an ExtractionStats.
+
+    Returns:
+        ExtractionStats | _NullStats
+    """
+    if stats is None or stats is False:
+        return NULL_STATS
+    if stats is True:
+        return ExtractionStats()
+    return stats
@@ -0,0 +1,200 @@
+"""
+Sidecar state for incremental re-extraction of growing statements.
+
+Custodians reissue the same cumulative statement every month with new pages
+appended. Next to the output, a sidecar file keeps for every page of the
+last run:
+
+- a fingerprint of the page's drawing instructions (read from the raw
+  content stream, without pdfminer's layout analysis),
+- its raw tables,
+- its cleaned transaction rows,
+- the extraction state carried into the next page (column names, last
+  valid scrip symbol, row count, detected date format).
+
+On the next run only pages whose fingerprint changed go through table
+detection. As long as every page so far gave the same tables as last time,
+its stored rows and carry-over state are reused as they are; from the first
+page that differs on, rows are classified and cleaned again (from the
+stored tables where the fingerprint still matches).
+
+Page numbering ("3 of 120") changes on every page when pages are appended,
+so it is blanked out before hashing (see VOLATILE_TEXT). Other text that
+changes every month, such as an "as on" date in the page header, makes that
+page's fingerprint differ; the page is then re-read and, when its tables
+are unchanged, still counts as unchanged.
+
+The sidecar is a zlib-compressed JSON file written atomically at the end of
+a successful run. A sidecar written with other settings (table engine, date
+type, pdfplumber or normalizer version) is ignored.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import zlib
+
+import pandas as pd
+from pdfminer.pdftypes import resolve1
+
+STATE_FORMAT = b"PIS1"
+
+# State keys carried from one page to the next (see iter_transaction_batches)
+CARRY_KEYS = ("column_names", "last_valid_symbol", "row_count", "max_width", "date_format", "date_formats")
+
+# Page-number text blanked out of content streams before hashing: "1 of 12" or "Page 1 of 12" shown as
+# one string, or "1 of" followed by the page count shown as the next string
+VOLATILE_TEXT = [
+    re.compile(rb"\((?:Page\s*)?\d+\s*of\)\s*Tj([^()]*?)\(\d+\)\s*Tj"),
+    re.compile(rb"\((?:Page\s*)?\d+\s*of\s*\d*\)\s*Tj"),
+]
+
+
+def page_fingerprint(page):
+    """
+    Hash what a page draws: its size, its content streams (page numbering
+    blanked out) and the data of the XObjects it uses.
+
+    Args:
+        page (pdfplumber.page.Page): Page to fingerprint; its layout is not parsed
+
+    Returns:
+        str: Hex digest
+    """
+    page_obj = page.page_obj
+    digest = hashlib.sha256(repr((page_obj.mediabox, page.rotation)).encode("ascii"))
+
+    contents = page_obj.contents if isinstance(page_obj.contents, list) else [page_obj.contents]
+    for stream in contents:
+        data = resolve1(stream).get_data()
+        for pattern in VOLATILE_TEXT:
+            data = pattern.sub(b"(#) Tj", data)
+        digest.update(data)
+
+    xobjects = resolve1((page_obj.resources or {}).get("XObject")) or {}
+    for name in sorted(xobjects):
+        digest.update(str(name).encode("utf-8"))
+        digest.update(resolve1(xobjects[name]).get_rawdata() or b"")
+    return digest.hexdigest()
+
+
+def encode_batch(df):
+    """
+    Describe a cleaned batch as JSON-serialisable data.
+
+    Args:
+        df (pd.DataFrame): Cleaned rows of one page
+
+    Returns:
+        dict: {"index", "columns"} where columns holds [name, dtype, values] lists
+    """
+    columns = []
+    for name in df.columns:
+        values = df[name]
+        data = values
+        if pd.api.types.is_datetime64_any_dtype(values):
+            data = values.dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+        if not pd.api.types.is_numeric_dtype(values):
+            # Missing values become null; numbers keep NaN, which json round-trips
+            data = data.astype(object).where(values.notna(), None)
+        columns.append([name, str(values.dtype), data.tolist()])
+    return {"index": df.index.tolist(), "columns": columns}
+
+
+def decode_batch(data):
+    """Rebuild the DataFrame described by encode_batch()."""
+    return pd.DataFrame({name: pd.Series(values, dtype=dtype) for name, dtype, values in data["columns"]}
+                        ).set_axis(pd.Index(data["index"]))
+
+
+class IncrementalState:
+    """
+    Per-page fingerprints, tables, rows and carry-over state of the previous run of one output.
+
+    Args:
+        path (str): Sidecar file
+        settings (dict): Everything besides the PDF that the stored rows depend on; a sidecar
+            saved with different settings is ignored
+    """
+
+    def __init__(self, path, settings):
+        self.path = path
+        self.settings = settings
+        self.previous = self._load()
+        self.fingerprints = []
+        self.pages = []
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return []
+        if not data.startswith(STATE_FORMAT):
+            return []
+        try:
+            state = json.loads(zlib.decompress(data[len(STATE_FORMAT):]).decode("utf-8"))
+        except (zlib.error, ValueError):
+            return []
+        if state.get("settings") != self.settings:
+            return []
+        return state["pages"]
+
+    def fingerprint(self, pdf):
+        """
+        Fingerprint every page of the open PDF for this run.
+
+        Returns:
+            list: Page numbers whose fingerprint differs from the previous run (they need table detection)
+        """
+        self.fingerprints = [page_fingerprint(page) for page in pdf.pages]
+        return [page_num for page_num in range(len(self.fingerprints)) if self.stored_tables(page_num) is None]
+
+    def previous_page(self, page_num):
+        """The previous run's entry for a page, or None."""
+        return self.previous[page_num] if page_num < len(self.previous) else None
+
+    def stored_tables(self, page_num):
+        """The previous run's tables for a page whose fingerprint is unchanged, else None."""
+        entry = self.previous_page(page_num)
+        if entry is not None and entry["fingerprint"] == self.fingerprints[page_num]:
+            return entry["tables"]
+        return None
+
+    def reusable_page(self, page_num, tables):
+        """The previous run's entry for a page if it had exactly these tables, else None."""
+        entry = self.previous_page(page_num)
+        if entry is not None and entry["tables"] == tables:
+            return entry
+        return None
+
+    def record(self, page_num, tables, batch, state):
+        """
+        Remember a processed page for the next run.
+
+        Args:
+            page_num (int): Zero-based page number (pages are recorded in order)
+            tables (list): The page's raw tables
+            batch (pd.DataFrame | dict | None): Its cleaned rows (or an already encoded batch)
+            state (dict): Extraction state after the page; CARRY_KEYS are stored
+        """
+        if isinstance(batch, pd.DataFrame):
+            batch = encode_batch(batch) if len(batch) > 0 else None
+        self.pages.append({"fingerprint": self.fingerprints[page_num], "tables": tables, "batch": batch,
+                           "state": {key: state[key] for key in CARRY_KEYS}})
+
+    def save(self):
+        """Write the recorded pages to the sidecar atomically."""
+        payload = json.dumps({"settings": self.settings, "pages": self.pages}, separators=(",", ":"))
+        data = STATE_FORMAT + zlib.compress(payload.encode("utf-8"), 6)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
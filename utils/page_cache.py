@@ -0,0 +1,145 @@
+"""
+On-disk cache of raw page tables.
+
+Table finding is by far the most expensive part of a conversion, so the raw
+output of page.extract_tables() for every page is stored under a key made of
+the PDF's content hash and the table settings. Re-running a conversion on an
+unchanged statement (for example after changing a cleaning rule or the output
+path) then skips pdfplumber entirely.
+
+Entries are zlib-compressed JSON files. The cache directory is kept under a
+size cap by evicting the least recently used entries.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+import pdfplumber
+
+from utils.pdf_source import source_sha256
+
+CACHE_FORMAT = b"PTC1"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Return the cache directory from $PDF_TABLE_CACHE_DIR or the per-user default."""
+    return os.environ.get("PDF_TABLE_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "pdf_table_extractor", "page_tables")
+
+
+class PageTableCache:
+    """
+    Content-addressed store of per-page extract_tables() output.
+
+    Args:
+        cache_dir (str, optional): Directory for cache entries. Defaults to default_cache_dir().
+        max_bytes (int, optional): Size cap for the whole directory; least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, pdf_path, table_settings=None):
+        """
+        Build the cache key for a PDF (a path, or bytes, a stream or an mmap).
+
+        The key covers the file content, the table settings and the pdfplumber
+        version, since any of them can change what extract_tables() returns.
+        """
+        settings = json.dumps(table_settings or {}, sort_keys=True, default=str)
+        key_source = "|".join([source_sha256(pdf_path), settings, pdfplumber.__version__])
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.ptc")
+
+    def get(self, key):
+        """
+        Look up the page tables stored under `key`.
+
+        Returns:
+            list: One extract_tables() result per page, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if not data.startswith(CACHE_FORMAT):
+            return None
+        try:
+            pages = json.loads(zlib.decompress(data[len(CACHE_FORMAT):]).decode("utf-8"))
+        except (zlib.error, ValueError):
+            # Corrupt or truncated entry - treat as a miss and let put() replace it
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return pages
+
+    def put(self, key, pages):
+        """
+        Store the page tables of one PDF and evict old entries if over the size cap.
+
+        Args:
+            key (str): Cache key from key()
+            pages (list): One extract_tables() result per page
+        """
+        payload = CACHE_FORMAT + zlib.compress(
+            json.dumps(pages, separators=(",", ":")).encode("utf-8"), 6)
+
+        # Write to a temporary file and rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the directory is under max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".ptc"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".ptc"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
@@ -0,0 +1,112 @@
+"""
+Text-layer pre-filter that keeps pages without transactions out of table detection.
+
+Cover pages, disclaimers and summary pages have no transaction rows, but
+page.extract_tables() (or the words engine) still searched them for tables.
+A PageFilter looks at the page's text instead: pdfplumber has already
+parsed the characters to build the page, and joining them into lines costs
+a fraction of the table search. A page is kept when its text has
+
+- the statement layout's column header (all fingerprint keywords),
+- a scrip-row marker ("Scrip_Symbol :"), or
+- enough transaction-like lines: a date plus a few numbers.
+
+The test is deliberately generous, since a page it skips loses its rows;
+continuation pages without a header or marker still have dated numeric
+rows. Skipped pages are counted and listed (see ExtractionStats.skip_page),
+and explore_pdf.py shows the verdict for every page.
+"""
+import re
+
+# A date in any of the usual statement formats: 2024-06-28, 28/06/2024, 28.06.24, 28-Jun-2024
+DATE_TOKEN = re.compile(r"\b\d{1,4}[-/.](?:\d{1,2}|[A-Za-z]{3})[-/.]\d{2,4}\b")
+# An amount or quantity: 10, -25,979, 2598.50, (1,000)
+NUMBER_TOKEN = re.compile(r"[-+(]?\d[\d,]*(?:\.\d+)?\)?")
+
+
+class PageFilter:
+    """
+    Decides from a page's text whether it can hold transaction rows.
+
+    Args:
+        keywords (iterable): Header words that all appear on a page with the column header
+        symbol_marker (str, optional): Regex found on a page with a scrip row
+        min_numbers (int): Numbers a dated line needs to count as a transaction row
+        min_rows (int): Transaction rows that keep a page without a header or marker
+    """
+
+    def __init__(self, keywords=(), symbol_marker=None, min_numbers=3, min_rows=1):
+        self.keywords = frozenset(keywords)
+        self.symbol_marker = symbol_marker
+        self.min_numbers = min_numbers
+        self.min_rows = min_rows
+        self._marker = re.compile(symbol_marker) if symbol_marker else None
+
+    @classmethod
+    def for_template(cls, statement_template, **options):
+        """The filter for a statement layout (utils.statement_templates)."""
+        return cls(statement_template.keywords, statement_template.symbol_marker, **options)
+
+    def classify(self, text):
+        """
+        Why a page's text can hold transactions.
+
+        Returns:
+            str: "header", "marker" or "rows", or None when the page can be skipped
+        """
+        if not text:
+            return None
+        if self.keywords and self.keywords <= set(text.split()):
+            return "header"
+        if self._marker is not None and self._marker.search(text):
+            return "marker"
+        rows = 0
+        for line in text.splitlines():
+            if DATE_TOKEN.search(line) and sum(1 for token in line.split()
+                                               if NUMBER_TOKEN.fullmatch(token)) >= self.min_numbers:
+                rows += 1
+                if rows >= self.min_rows:
+                    return "rows"
+        return None
+
+    def check(self, page):
+        """classify() for a pdfplumber page."""
+        # extract_text_simple() only groups characters into lines (pdfplumber >= 0.10)
+        extract_text = getattr(page, "extract_text_simple", page.extract_text)
+        return self.classify(extract_text())
+
+    def keep(self, page):
+        return self.check(page) is not None
+
+    def to_dict(self):
+        return {"keywords": sorted(self.keywords), "symbol_marker": self.symbol_marker,
+                "min_numbers": self.min_numbers, "min_rows": self.min_rows}
+
+    def __repr__(self):
+        return f"PageFilter({len(self.keywords)} keywords, marker={self.symbol_marker!r})"
+
+
+def page_filter_settings(page_filter):
+    """
+    What a page filter adds to page-cache keys and incremental settings, since it changes which pages have tables.
+
+    Reading every page adds nothing, so that key holds every page's tables:
+    it is the one explore_pdf.py reads, and cache entries and sidecars
+    written before the filter existed stay valid. A filtered run stores its
+    empty skipped pages under a key of its own.
+    """
+    if page_filter is None:
+        return {}
+    return {"page_filter": page_filter.to_dict()}
+
+
+def resolve_page_filter(page_filter, statement_template):
+    """
+    Normalise a `page_filter` argument: True builds the statement layout's filter, None/False disables it.
+
+    Returns:
+        PageFilter: The filter, or None
+    """
+    if page_filter is True:
+        return PageFilter.for_template(statement_template)
+    return page_filter or None
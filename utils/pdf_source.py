@@ -0,0 +1,87 @@
+"""
+Statement inputs that are not files on disk.
+
+The extractor takes a PDF as a path, as bytes, as a binary file-like object
+(e.g. an uploaded file or io.BytesIO) or as an mmap. Anything other than a
+path is handed to pdfplumber as a stream without being copied: bytes are
+wrapped in io.BytesIO (which shares the bytes object), and file objects and
+mmaps are read in place.
+
+Pool workers cannot share a stream, so for parallel extraction an in-memory
+PDF is sent to each worker once as bytes (see worker_source).
+"""
+import hashlib
+import io
+import mmap
+import os
+
+import pdfplumber
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def _check_stream(source):
+    if not all(hasattr(source, name) for name in ("read", "seek")):
+        raise TypeError(f"Expected a PDF path, bytes, a binary file-like object or an mmap, "
+                        f"not {type(source).__name__}")
+    if hasattr(source, "seekable") and not source.seekable():
+        raise ValueError("PDF streams must be seekable")
+
+
+def open_pdf(source):
+    """pdfplumber.open() for a path, bytes, a binary file-like object or an mmap (streams are left open)."""
+    if is_path(source):
+        return pdfplumber.open(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pdfplumber.open(io.BytesIO(source))
+    _check_stream(source)
+    return pdfplumber.open(source)
+
+
+def source_name(source):
+    """The source's path or file name, or None for unnamed in-memory data."""
+    if is_path(source):
+        return os.fspath(source)
+    name = getattr(source, "name", None)
+    return name if isinstance(name, str) else None
+
+
+def describe_source(source):
+    """Name of a source for messages."""
+    return source_name(source) or "<in-memory PDF>"
+
+
+def source_sha256(source):
+    """Hash a source's content (files and streams in chunks, buffers in place)."""
+    digest = hashlib.sha256()
+    if is_path(source):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+    elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        digest.update(source)
+    else:
+        _check_stream(source)
+        position = source.tell()
+        source.seek(0)
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+def worker_source(source):
+    """What pool workers open: the path itself, or the whole PDF as bytes."""
+    if is_path(source) or isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview, mmap.mmap)):
+        return bytes(source)
+    position = source.tell()
+    source.seek(0)
+    data = source.read()
+    source.seek(position)
+    return data
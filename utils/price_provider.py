@@ -0,0 +1,207 @@
+"""
+Current prices for the portfolio summary.
+
+By default the workbook gets a GOOGLEFINANCE formula per security, which
+only evaluates in Google Sheets and looks every security up remotely. A
+price provider fills Current_Price and Value with numbers instead:
+
+- SnapshotPriceProvider reads a local price file (CSV or Parquet) with a
+  price column and an NSE symbol and/or BSE scrip code (BOM_ID) column.
+  It is indexed by both keys once, and a portfolio is priced with two
+  vectorized index lookups (symbol first, then BOM_ID, like the formula).
+- CachedPriceProvider memoizes any provider's prices per security for a
+  time-to-live, so a long-lived process (a batch worker, the HTTP service)
+  does not repeat lookups for every statement.
+
+Providers implement lookup(symbols, bom_ids) and return one price per
+security (NaN where unknown); as_of is the date the prices are valid for.
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TTL = 15 * 60
+
+# Accepted (lower-cased) column names in a snapshot file
+SNAPSHOT_COLUMNS = {
+    "symbol": ("symbol", "nse", "nse_symbol", "scrip_symbol", "tradingsymbol"),
+    "bom_id": ("bom_id", "bom", "bse", "bse_code", "scrip_code"),
+    "price": ("price", "close", "ltp", "last_price", "current_price"),
+    "date": ("date", "as_of", "timestamp"),
+}
+
+
+def _normalize_symbols(values):
+    """Upper-case symbols without an exchange prefix ("NSE:pnb" -> "PNB")."""
+    return (pd.Series(values, dtype=object).astype("string").str.strip().str.upper()
+            .str.replace(r"^(?:NSE|BOM|BSE):", "", regex=True))
+
+
+def _normalize_bom_ids(values):
+    """BSE scrip codes as digit strings ("BOM:500116", 500116 and 500116.0 -> "500116")."""
+    return (pd.Series(values, dtype=object).astype("string").str.strip().str.upper()
+            .str.replace(r"^(?:BOM|BSE):", "", regex=True).str.replace(r"\.0$", "", regex=True))
+
+
+class PriceProvider(ABC):
+    """Base class: current prices for securities identified by NSE symbol and BOM_ID."""
+
+    as_of = None
+
+    @abstractmethod
+    def lookup(self, symbols, bom_ids):
+        """
+        Args:
+            symbols (list): NSE symbols
+            bom_ids (list): BSE scrip codes (None where unknown), aligned with symbols
+
+        Returns:
+            np.ndarray: Price per security, NaN where the provider has none
+        """
+
+
+class SnapshotPriceProvider(PriceProvider):
+    """
+    Prices from a local CSV or Parquet snapshot, reloaded when the file changes.
+
+    Args:
+        path (str): Snapshot file (.csv, or .parquet/.pq which needs pyarrow)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._load()
+
+    def _load(self):
+        extension = os.path.splitext(self.path)[1].lower()
+        self._mtime = os.stat(self.path).st_mtime_ns
+        if extension in (".parquet", ".pq"):
+            data = pd.read_parquet(self.path)
+        else:
+            data = pd.read_csv(self.path, dtype=str)
+        columns = {}
+        lower = {str(name).strip().lower(): name for name in data.columns}
+        for key, aliases in SNAPSHOT_COLUMNS.items():
+            columns[key] = next((lower[alias] for alias in aliases if alias in lower), None)
+        if columns["price"] is None or (columns["symbol"] is None and columns["bom_id"] is None):
+            raise ValueError(f"Price snapshot {self.path} needs a price column and a symbol or BOM_ID column")
+
+        prices = pd.to_numeric(data[columns["price"]].astype(str).str.replace(",", "", regex=False),
+                               errors="coerce").to_numpy(dtype=np.float64)
+        self._by_symbol = self._index(data, columns["symbol"], _normalize_symbols, prices)
+        self._by_bom_id = self._index(data, columns["bom_id"], _normalize_bom_ids, prices)
+        self.as_of = None
+        if columns["date"] is not None:
+            dates = pd.to_datetime(data[columns["date"]], errors="coerce").dropna()
+            self.as_of = dates.max().date() if len(dates) else None
+
+    @staticmethod
+    def _index(data, column, normalize, prices):
+        """Price by key; the last row wins for a repeated key."""
+        if column is None:
+            return pd.Series(dtype=np.float64)
+        keys = normalize(data[column]).to_numpy(dtype=object)
+        known = ~pd.isna(keys) & ~np.isnan(prices)
+        index = pd.Series(prices[known], index=keys[known])
+        return index[~index.index.duplicated(keep="last")]
+
+    def lookup(self, symbols, bom_ids):
+        if os.stat(self.path).st_mtime_ns != self._mtime:
+            self._load()
+        prices = self._by_symbol.reindex(_normalize_symbols(symbols).to_numpy(dtype=object)).to_numpy()
+        missing = np.isnan(prices)
+        if missing.any() and len(self._by_bom_id):
+            by_bom_id = self._by_bom_id.reindex(_normalize_bom_ids(bom_ids).to_numpy(dtype=object)).to_numpy()
+            prices = np.where(missing, by_bom_id, prices)
+        return prices.astype(np.float64)
+
+
+class CachedPriceProvider(PriceProvider):
+    """
+    Memoizes another provider's prices per (symbol, BOM_ID) for `ttl` seconds.
+
+    Misses are fetched from the wrapped provider in one lookup call. Unknown
+    prices are cached too, so a missing security is not looked up again
+    until its entry expires.
+    """
+
+    def __init__(self, provider, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.provider = provider
+        self.ttl = ttl
+        self.clock = clock
+        self._cache = {}
+
+    @property
+    def as_of(self):
+        return self.provider.as_of
+
+    def lookup(self, symbols, bom_ids):
+        now = self.clock()
+        keys = list(zip((str(symbol) for symbol in symbols), (None if pd.isna(b) else str(b) for b in bom_ids)))
+        prices = np.full(len(keys), np.nan)
+        misses = []
+        for i, key in enumerate(keys):
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] > now:
+                prices[i] = entry[0]
+            else:
+                misses.append(i)
+        if misses:
+            fetched = self.provider.lookup([keys[i][0] for i in misses], [keys[i][1] for i in misses])
+            expires = now + self.ttl
+            for i, price in zip(misses, fetched):
+                self._cache[keys[i]] = (price, expires)
+                prices[i] = price
+        return prices
+
+
+# Providers opened by path in this process, keyed by (path, mtime, ttl) (see open_price_provider)
+_providers = {}
+
+
+def open_price_provider(prices, ttl=DEFAULT_TTL):
+    """
+    The provider for a `prices` argument: a PriceProvider as it is, or a snapshot path.
+
+    A path is opened once per process and wrapped in a CachedPriceProvider, so
+    converting many statements in one process reads the snapshot once.
+    Another ttl gets its own provider, and a rewritten snapshot gets a new
+    one (with an empty price cache) that replaces those of the old file.
+    """
+    if prices is None or isinstance(prices, PriceProvider):
+        return prices
+    path = os.path.abspath(prices)
+    key = (path, os.stat(path).st_mtime_ns, ttl)
+    if key not in _providers:
+        for stale in [other for other in _providers if other[0] == path and other[1] != key[1]]:
+            del _providers[stale]
+        _providers[key] = CachedPriceProvider(SnapshotPriceProvider(path), ttl)
+    return _providers[key]
+
+
+def fill_portfolio_prices(portfolio_df, provider):
+    """
+    Fill Current_Price and Value (N.Qty x price) of a portfolio summary.
+
+    Args:
+        portfolio_df (pd.DataFrame): Portfolio summary with Scrip_Symbol, BOM_ID and N.Qty
+        provider (PriceProvider): Where prices come from
+
+    Returns:
+        tuple: (portfolio DataFrame with numeric Current_Price and Value, number of securities priced)
+    """
+    bom_ids = portfolio_df['BOM_ID'] if 'BOM_ID' in portfolio_df.columns else [None] * len(portfolio_df)
+    prices = provider.lookup(portfolio_df['Scrip_Symbol'].astype(object).tolist(), list(bom_ids))
+    portfolio_df = portfolio_df.assign(Current_Price=prices,
+                                       Value=pd.to_numeric(portfolio_df['N.Qty'], errors='coerce') * prices)
+    return portfolio_df, int(np.count_nonzero(~np.isnan(prices)))
+
+
+def price_date(provider):
+    """The date a provider's prices are valid for, defaulting to today."""
+    return provider.as_of or date.today()
@@ -0,0 +1,71 @@
+"""
+Progress reporting and cooperative cancellation for a conversion.
+
+Callers such as the GUI pass extract_transactions_simple a progress
+callback and a CancellationToken instead of reading its printed output.
+The callback receives an ExtractionProgress after every page and at each
+later stage; the token is checked between pages and stages (and, with a
+worker pool, while waiting for the workers), so cancel() stops a long
+conversion within about one page. The conversion then raises
+ExtractionCancelled after dropping any partial output, and leaves caches,
+templates and incremental state untouched.
+
+Both are safe to use from another thread. The callback runs on the
+thread doing the conversion, so a GUI must hand updates to its own thread
+(e.g. with Tk's after()).
+"""
+import threading
+from collections import namedtuple
+
+# stage is "open", "page", "combine", "portfolio", "write", "done" or "failed"; page is the number of
+# pages processed so far (1-based), page_count is None until the PDF has been opened, rows counts the
+# cleaned rows so far, and message explains a "failed" stage
+ExtractionProgress = namedtuple("ExtractionProgress", ["stage", "page", "page_count", "rows", "message"],
+                                defaults=[None])
+
+# How often (seconds) a wait on the worker pool checks for cancellation
+POLL_INTERVAL = 0.1
+
+
+class ExtractionCancelled(Exception):
+    """Raised by the extractor when its CancellationToken was cancelled."""
+
+
+class CancellationToken:
+    """A flag one thread sets to stop a conversion running on another."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Ask the conversion to stop at its next check."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            ExtractionCancelled: If cancel() has been called
+        """
+        if self._event.is_set():
+            raise ExtractionCancelled("Extraction cancelled")
+
+
+class _NeverCancelled:
+    """Stand-in token used when no cancellation was requested."""
+
+    cancelled = False
+
+    def raise_if_cancelled(self):
+        pass
+
+
+NEVER_CANCELLED = _NeverCancelled()
+
+
+def resolve_cancel_token(cancel_token):
+    """The token to check: the one given, or NEVER_CANCELLED for None."""
+    return NEVER_CANCELLED if cancel_token is None else cancel_token
@@ -0,0 +1,237 @@
+"""
+SQLite output target for transactions and portfolio summaries.
+
+Many statements accumulate in one database file, ready to query:
+
+- statements:   one row per imported PDF (keyed by the hash of its content)
+- transactions: one row per transaction, keyed by a deterministic hash of
+                the source PDF, page and row, with indexes on scrip_symbol,
+                bom_id and date
+- portfolio:    net quantity per scrip for each statement
+
+Column names are the DataFrame's, lower-cased with punctuation replaced by
+underscores ("B.Qty" -> b_qty). Rows are buffered while pages are
+extracted and written by close() with executemany inside one transaction,
+so the database is locked only briefly and a failed conversion leaves it
+untouched. Importing the same PDF again upserts its rows (and drops rows
+the new import no longer produces) instead of duplicating them.
+
+merge_database() copies the statements of one such database into another,
+so that parallel conversions can each write a database of their own and a
+single process merges them into the shared one.
+"""
+import hashlib
+import re
+import sqlite3
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from utils.pdf_source import describe_source, source_sha256
+
+_INDEXED_COLUMNS = ("scrip_symbol", "bom_id", "date")
+
+# Key and bookkeeping columns of each table; the data columns are added as statements bring them
+_TABLES = {
+    "statements": "source_id TEXT PRIMARY KEY, source_path TEXT, rows INTEGER, imported_at TEXT",
+    "transactions": "row_hash TEXT PRIMARY KEY, source_id TEXT NOT NULL, page_num INTEGER, row_num INTEGER, "
+                    "import_id TEXT",
+    "portfolio": "source_id TEXT NOT NULL, scrip_symbol TEXT NOT NULL, import_id TEXT, "
+                 "PRIMARY KEY (source_id, scrip_symbol)",
+}
+
+
+def sql_column_name(name):
+    """Column name used in the database for a DataFrame column."""
+    return re.sub(r"\W+", "_", str(name)).strip("_").lower()
+
+
+def row_hash(source_id, page_num, row):
+    """Deterministic id of one transaction row."""
+    return hashlib.sha256(f"{source_id}:{page_num}:{row}".encode("utf-8")).hexdigest()
+
+
+def _column_values(values):
+    """A column as plain Python values: None for missing, ISO strings for dates."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.dt.strftime("%Y-%m-%d")
+    array = values.to_numpy(dtype=object, copy=True)
+    array[pd.isna(array)] = None
+    return array.tolist()
+
+
+def _ensure_table(conn, table, columns=None):
+    """
+    Create the table in the main database, or add the data columns it does not have yet.
+
+    Args:
+        columns (dict, optional): Column name -> SQL type ("REAL" or "TEXT")
+
+    Returns:
+        set: The table's column names
+    """
+    conn.execute(f"CREATE TABLE IF NOT EXISTS main.{table} ({_TABLES[table]})")
+    existing = {row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")}
+    for name, kind in (columns or {}).items():
+        if name not in existing:
+            conn.execute(f'ALTER TABLE main.{table} ADD COLUMN "{name}" {kind}')
+            existing.add(name)
+    if table == "transactions":
+        for name in ("source_id",) + _INDEXED_COLUMNS:
+            if name in existing:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS main.idx_transactions_{name} ON transactions ("{name}")')
+    return existing
+
+
+def merge_database(source_path, path, timeout=30.0):
+    """
+    Copy every statement of another SqliteSink database into `path`, in one transaction.
+
+    A statement already in `path` is replaced, as if it had been imported there again.
+
+    Args:
+        source_path (str): Database written by SqliteSink (left unchanged)
+        path (str): Database to merge into (created if missing)
+        timeout (float): Seconds to wait for another process holding the write lock
+
+    Returns:
+        int: Transactions copied
+    """
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS source", (source_path,))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            copied = 0
+            for table in _TABLES:
+                columns = {row[1]: row[2] for row in conn.execute(f"PRAGMA source.table_info({table})")}
+                if not columns:
+                    continue
+                _ensure_table(conn, table, columns)
+                names = ", ".join(f'"{name}"' for name in columns)
+                conn.execute(f"DELETE FROM main.{table} WHERE source_id IN (SELECT source_id FROM source.statements)")
+                cursor = conn.execute(f"INSERT INTO main.{table} ({names}) SELECT {names} FROM source.{table}")
+                if table == "transactions":
+                    copied = cursor.rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return copied
+    finally:
+        conn.close()
+
+
+class SqliteSink:
+    """
+    Collects one statement's rows and upserts them into a SQLite database.
+
+    Args:
+        path (str): Database file (created if missing)
+        source_path (str): The PDF being imported (or its bytes, stream or mmap); its content hash identifies
+            the statement
+        numeric_columns (list): Columns stored as REAL
+        timeout (float): Seconds to wait for another process holding the write lock
+    """
+
+    def __init__(self, path, source_path, numeric_columns=(), timeout=30.0):
+        self.path = path
+        self.source_path = describe_source(source_path)
+        self.source_id = source_sha256(source_path)
+        self.numeric_columns = {sql_column_name(name) for name in numeric_columns}
+        self.timeout = timeout
+        self.rows = 0
+        self._batches = []
+        self._portfolio = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, df, page_num=None):
+        """
+        Buffer the cleaned rows of one page.
+
+        Args:
+            df (pd.DataFrame): Cleaned transactions; the index is the row number within the statement
+            page_num (int): Zero-based page the rows come from
+        """
+        if len(df) > 0:
+            self._batches.append((page_num, df))
+
+    def write_portfolio(self, df):
+        """Buffer the statement's portfolio summary (one row per scrip)."""
+        self._portfolio = df
+
+    def _column_types(self, columns):
+        return {name: "REAL" if name in self.numeric_columns else "TEXT" for name in columns}
+
+    def _upsert(self, conn, table, key, columns, rows):
+        """executemany an INSERT ... ON CONFLICT DO UPDATE over all rows."""
+        names = ", ".join(f'"{name}"' for name in columns)
+        placeholders = ", ".join("?" * len(columns))
+        updates = ", ".join(f'"{name}" = excluded."{name}"' for name in columns if name not in key)
+        conn.executemany(f"INSERT INTO {table} ({names}) VALUES ({placeholders}) "
+                         f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}", rows)
+
+    def close(self):
+        """Write everything in one transaction and close the connection."""
+        import_id = uuid.uuid4().hex
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            # Take the write lock up front so the schema check and the writes see the same database
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _ensure_table(conn, "statements")
+                self._write_transactions(conn, import_id)
+                self._write_portfolio(conn, import_id)
+                self._upsert(conn, "statements", ["source_id"], ["source_id", "source_path", "rows", "imported_at"],
+                             [(self.source_id, self.source_path, self.rows,
+                               datetime.now().isoformat(timespec="seconds"))])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+            self._batches = []
+
+    def _write_transactions(self, conn, import_id):
+        columns = list(dict.fromkeys(sql_column_name(name) for _, df in self._batches for name in df.columns))
+        _ensure_table(conn, "transactions", self._column_types(columns))
+
+        # One executemany per distinct column set (normally one for the whole statement)
+        records = {}
+        for page_num, df in self._batches:
+            values = [_column_values(df[name]) for name in df.columns]
+            records.setdefault(tuple(sql_column_name(name) for name in df.columns), []).extend(
+                (row_hash(self.source_id, page_num, row), self.source_id, page_num + 1, row, import_id) + cells
+                for row, cells in zip(df.index.tolist(), zip(*values)))
+        meta = ["row_hash", "source_id", "page_num", "row_num", "import_id"]
+        self.rows = 0
+        for batch_columns, rows in records.items():
+            self._upsert(conn, "transactions", ["row_hash"], meta + list(batch_columns), rows)
+            self.rows += len(rows)
+        # Rows an earlier import of this statement produced but this one did not
+        conn.execute("DELETE FROM transactions WHERE source_id = ? AND import_id != ?", (self.source_id, import_id))
+
+    def _write_portfolio(self, conn, import_id):
+        if self._portfolio is None:
+            return
+        columns = [sql_column_name(name) for name in self._portfolio.columns]
+        _ensure_table(conn, "portfolio", self._column_types(columns))
+        values = [_column_values(self._portfolio[name].astype(object)) for name in self._portfolio.columns]
+        records = [(self.source_id, import_id) + cells for cells in zip(*values)]
+        self._upsert(conn, "portfolio", ["source_id", "scrip_symbol"], ["source_id", "import_id"] + columns, records)
+        conn.execute("DELETE FROM portfolio WHERE source_id = ? AND import_id != ?", (self.source_id, import_id))
+
+    def abort(self):
+        """Drop the buffered rows without touching the database."""
+        self._batches = []
+        self._portfolio = None
@@ -0,0 +1,230 @@
+"""
+Statement templates: what a broker statement layout looks like to the parser.
+
+The row parser used to hard-code one layout: the 'Scrip_Symbol :' marker in
+the first cell with the symbol in the third, the column header on the first
+row of the first table, and a fixed list of numeric columns. A
+StatementTemplate declares those things instead, together with the
+pdfplumber table settings the layout needs, and a TemplateRegistry holds the
+known layouts.
+
+Detection reads the header text at the top of the first page (no table
+finding) and picks the template whose fingerprint keywords all appear in it.
+The registry keeps an inverted index from keyword to template, so the header
+is scanned once however many templates are registered; no template is ever
+tried by parsing the document with it. With a single registered template
+nothing is read at all.
+
+Templates are plain JSON-compatible data (see to_dict() and load()); their
+regexes are compiled once, when the template is created.
+"""
+import json
+import re
+
+from utils.pdf_source import open_pdf
+
+TEMPLATE_FORMAT = 1
+
+# Share of the first page (from the top) whose text is used for detection
+HEADER_FRACTION = 0.25
+
+
+class StatementTemplate:
+    """
+    One statement layout.
+
+    Column names are the canonical ones used after extraction (e.g. 'N.Qty',
+    'Date'); column_map renames header cells of this layout to them.
+
+    Args:
+        name (str): Unique name of the layout
+        fingerprint (list): Keywords that all appear in the layout's first-page header text
+        symbol_marker (str): Regex that the marker cell of a scrip row matches in full
+        marker_column (int): Cell of a scrip row holding the marker
+        symbol_column (int): Cell of a scrip row holding the raw symbol ("500116 IDBI - NAME")
+        column_map (dict, optional): {header text: canonical column name}
+        numeric_columns (list): Canonical columns holding amounts/quantities with thousands separators
+        date_columns (list): Canonical columns holding dates; 'Date' is the transaction date
+        repeated_header_columns (list): Canonical columns that, all holding their own name, mark a header row
+            repeated inside the data
+        min_filled_cells (int): Filled cells a row needs to be a transaction of the current scrip
+        table_settings (dict, optional): pdfplumber table settings for this layout (None for the defaults)
+    """
+
+    def __init__(self, name, fingerprint, symbol_marker=r"Scrip_Symbol :", marker_column=0, symbol_column=2,
+                 column_map=None, numeric_columns=(), date_columns=("Date",), repeated_header_columns=(),
+                 min_filled_cells=8, table_settings=None):
+        self.name = name
+        self.fingerprint = list(fingerprint)
+        self.symbol_marker = symbol_marker
+        self.marker_column = marker_column
+        self.symbol_column = symbol_column
+        self.column_map = dict(column_map or {})
+        self.numeric_columns = list(numeric_columns)
+        self.date_columns = list(date_columns)
+        self.repeated_header_columns = list(repeated_header_columns)
+        self.min_filled_cells = min_filled_cells
+        self.table_settings = dict(table_settings) if table_settings else None
+        self._marker = re.compile(symbol_marker)
+        # Multi-word keywords need each of their words in the header
+        self.keywords = frozenset(word for keyword in self.fingerprint for word in keyword.split())
+
+    def symbol_of(self, row):
+        """The raw scrip symbol if the table row is this layout's scrip row, else None."""
+        if (len(row) > max(self.marker_column, self.symbol_column) and row[self.symbol_column] is not None
+                and row[self.marker_column] is not None and self._marker.fullmatch(row[self.marker_column])):
+            return row[self.symbol_column]
+        return None
+
+    def column_names(self, header_row):
+        """Canonical column names from the header row: Scrip_Symbol, then the non-empty header cells."""
+        return ["Scrip_Symbol"] + [self.column_map.get(col, col) for col in header_row if col is not None and col.strip()]
+
+    def to_dict(self):
+        return {"format": TEMPLATE_FORMAT, "name": self.name, "fingerprint": self.fingerprint,
+                "symbol_marker": self.symbol_marker, "marker_column": self.marker_column,
+                "symbol_column": self.symbol_column, "column_map": self.column_map,
+                "numeric_columns": self.numeric_columns, "date_columns": self.date_columns,
+                "repeated_header_columns": self.repeated_header_columns,
+                "min_filled_cells": self.min_filled_cells, "table_settings": self.table_settings}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != TEMPLATE_FORMAT:
+            raise ValueError(f"Unsupported statement template format: {data.get('format')}")
+        options = {key: value for key, value in data.items() if key != "format"}
+        return cls(**options)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def __repr__(self):
+        return f"StatementTemplate({self.name!r})"
+
+
+class TemplateRegistry:
+    """
+    Known statement templates, in registration order.
+
+    The first registered template is the fallback when detection finds no
+    match, so the registry always yields a template.
+    """
+
+    def __init__(self, templates=()):
+        self._templates = []
+        self._by_name = {}
+        # keyword -> indexes of the templates whose fingerprint contains it
+        self._index = {}
+        for template in templates:
+            self.register(template)
+
+    def register(self, template):
+        """Add a template (a StatementTemplate or a JSON template path)."""
+        if isinstance(template, str):
+            template = StatementTemplate.load(template)
+        if template.name in self._by_name:
+            raise ValueError(f"A statement template named {template.name!r} is already registered")
+        position = len(self._templates)
+        self._templates.append(template)
+        self._by_name[template.name] = template
+        for keyword in template.keywords:
+            self._index.setdefault(keyword, []).append(position)
+        return template
+
+    def __len__(self):
+        return len(self._templates)
+
+    def __iter__(self):
+        return iter(self._templates)
+
+    def get(self, name):
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise ValueError(f"Unknown statement template {name!r}; expected one of "
+                             f"{', '.join(self._by_name)}") from None
+
+    @property
+    def default(self):
+        return self._templates[0]
+
+    def match(self, header_text):
+        """
+        The template whose fingerprint keywords all appear in the header text.
+
+        When several match, the one with the most keywords (the most specific) wins,
+        then the earliest registered.
+
+        Returns:
+            StatementTemplate: The matching template, or None
+        """
+        hits = [0] * len(self._templates)
+        for word in set(header_text.split()):
+            for position in self._index.get(word, ()):
+                hits[position] += 1
+        best = None
+        for position, template in enumerate(self._templates):
+            if template.keywords and hits[position] == len(template.keywords):
+                if best is None or len(template.keywords) > len(best.keywords):
+                    best = template
+        return best
+
+    def detect(self, pdf_path):
+        """
+        Pick the template for a PDF from its first page's header text.
+
+        Returns:
+            tuple: (StatementTemplate, detected) where detected is False when the
+            default template was used without a match (or without reading the PDF)
+        """
+        if len(self._templates) == 1:
+            return self.default, False
+        template = self.match(first_page_header(pdf_path))
+        return (template, True) if template is not None else (self.default, False)
+
+
+def first_page_header(pdf_path, fraction=HEADER_FRACTION):
+    """Text of the top `fraction` of the PDF's first page (a path, bytes, a stream or an mmap)."""
+    with open_pdf(pdf_path) as pdf:
+        if not pdf.pages:
+            return ""
+        page = pdf.pages[0]
+        return page.crop((0, 0, page.width, page.height * fraction)).extract_text() or ""
+
+
+# The Global Details ledger this tool was written for
+GLOBAL_DETAILS = StatementTemplate(
+    "global_details",
+    fingerprint=["Company", "Date", "Narration", "B.Qty", "B.Rate", "S.Qty", "S.Rate", "N.Qty", "N.Rate", "N.Amt"],
+    numeric_columns=["B.Qty", "B.Rate", "S.Qty", "S.Rate", "N.Qty", "N.Rate", "N.Amt"],
+    repeated_header_columns=["Company", "Date"],
+)
+
+# Templates used when none is given (the first is the fallback). Register a layout here only once a real
+# statement in it has been checked; until then load it from JSON. With one template detection reads nothing.
+STATEMENT_TEMPLATES = TemplateRegistry([GLOBAL_DETAILS])
+
+
+def resolve_statement_template(statement_template, pdf_path, registry=None):
+    """
+    Resolve the `statement_template` argument of the extraction functions.
+
+    Args:
+        statement_template (StatementTemplate | str, optional): A template, a registered
+            name, a JSON template path, or None to detect it from the PDF
+        pdf_path (str): The statement (only read when detecting)
+        registry (TemplateRegistry, optional): Defaults to STATEMENT_TEMPLATES
+
+    Returns:
+        tuple: (StatementTemplate, detected)
+    """
+    registry = registry or STATEMENT_TEMPLATES
+    if isinstance(statement_template, StatementTemplate):
+        return statement_template, False
+    if statement_template is None:
+        return registry.detect(pdf_path)
+    if statement_template.lower().endswith(".json"):
+        return StatementTemplate.load(statement_template), False
+    return registry.get(statement_template), False
@@ -0,0 +1,88 @@
+"""
+Persistent dictionary of normalized scrip symbols.
+
+Raw symbol strings such as "500116 IDBI - MITHIL DEEPAK KOTWAL" recur across
+every statement, so the result of normalizing them (cleaned symbol + BOM ID)
+is kept in a small SQLite file. Runs and batch workers share the file, and
+normalizing a known symbol becomes a lookup.
+
+Entries are tagged with the normalizer version that produced them, so
+changing the normalization rules never serves stale results.
+"""
+import sqlite3
+
+# SQLite's default limit on host parameters per statement is 999
+_LOOKUP_CHUNK = 500
+
+
+class SymbolDictionary:
+    """
+    Raw symbol -> (symbol, bom_id) mapping stored in SQLite.
+
+    Args:
+        path (str): Database file (created if missing). ":memory:" keeps it in memory only.
+        timeout (float): Seconds to wait for another process holding the write lock
+    """
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS symbols ("
+            " raw TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " symbol TEXT NOT NULL,"
+            " bom_id TEXT,"
+            " PRIMARY KEY (raw, version))"
+        )
+        self._conn.commit()
+
+    def lookup(self, raw_symbols, version):
+        """
+        Fetch the known normalizations for some raw symbols.
+
+        Args:
+            raw_symbols (iterable): Raw Scrip_Symbol strings
+            version (int): Normalizer version the entries must come from
+
+        Returns:
+            dict: raw -> (symbol, bom_id) for the raw symbols that are in the dictionary
+        """
+        raw_symbols = list(raw_symbols)
+        found = {}
+        for start in range(0, len(raw_symbols), _LOOKUP_CHUNK):
+            chunk = raw_symbols[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT raw, symbol, bom_id FROM symbols WHERE version = ? AND raw IN ({placeholders})",
+                [version] + chunk)
+            for raw, symbol, bom_id in rows:
+                found[raw] = (symbol, bom_id)
+        return found
+
+    def add(self, normalized, version):
+        """
+        Store new normalizations.
+
+        Args:
+            normalized (dict): raw -> (symbol, bom_id)
+            version (int): Normalizer version that produced them
+        """
+        if not normalized:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO symbols (raw, version, symbol, bom_id) VALUES (?, ?, ?, ?)",
+                [(raw, version, symbol, bom_id) for raw, (symbol, bom_id) in normalized.items()])
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
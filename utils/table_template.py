@@ -0,0 +1,219 @@
+"""
+Column templates learned from a statement's first page.
+
+Every page of a broker statement is ruled on the same column grid, yet
+page.extract_tables() redoes the full edge detection on each page. A
+TableTemplate records the column boundaries and header row found on the
+first page; later pages (and later statements from the same broker, via the
+saved JSON file) are then read with explicit table settings:
+
+- the vertical lines are the learned columns (vertical_strategy="explicit"),
+  each drawn over the stretch of the page that is ruled at that column, so
+  cells merged across a column boundary (symbol and date cells) stay merged,
+- the horizontal lines are the page's own rulings, and
+- characters are bucketed by row once instead of re-scanning the page for
+  every row.
+
+The result is the same as page.extract_tables(). A page that fails the quick
+consistency check (different page size, a ruling off the grid, a table with a
+different column count or header) returns None, and the caller falls back to
+full detection for that page.
+"""
+import json
+import os
+from bisect import bisect_left
+
+from pdfplumber import utils
+
+TEMPLATE_FORMAT = 1
+
+
+def _cluster_positions(values, tolerance):
+    """Collapse positions within `tolerance` of each other into their mean."""
+    clusters = []
+    for value in sorted(values):
+        if clusters and value - clusters[-1][-1] <= tolerance:
+            clusters[-1].append(value)
+        else:
+            clusters.append([value])
+    return [round(sum(cluster) / len(cluster), 2) for cluster in clusters]
+
+
+def _char_in_bbox(char, bbox):
+    v_mid = (char["top"] + char["bottom"]) / 2
+    h_mid = (char["x0"] + char["x1"]) / 2
+    x0, top, x1, bottom = bbox
+    return (h_mid >= x0) and (h_mid < x1) and (v_mid >= top) and (v_mid < bottom)
+
+
+class _CharIndex:
+    """Page characters sorted by vertical midpoint, for cheap row lookups."""
+
+    def __init__(self, chars):
+        order = sorted(range(len(chars)), key=lambda i: (chars[i]["top"] + chars[i]["bottom"]) / 2)
+        self.chars = chars
+        self.order = order
+        self.v_mids = [(chars[i]["top"] + chars[i]["bottom"]) / 2 for i in order]
+
+    def in_bbox(self, bbox):
+        """Characters whose midpoint lies in `bbox`, in page order."""
+        start = bisect_left(self.v_mids, bbox[1])
+        stop = bisect_left(self.v_mids, bbox[3])
+        hits = sorted(self.order[start:stop])
+        return [self.chars[i] for i in hits if _char_in_bbox(self.chars[i], bbox)]
+
+
+def _extract_table(table, char_index):
+    """Table.extract() with default text settings, reading row characters from an index."""
+    table_arr = []
+    for row in table.rows:
+        row_chars = char_index.in_bbox(row.bbox)
+        arr = []
+        for cell in row.cells:
+            if cell is None:
+                arr.append(None)
+                continue
+            cell_chars = [char for char in row_chars if _char_in_bbox(char, cell)]
+            arr.append(utils.extract_text(cell_chars) if cell_chars else "")
+        table_arr.append(arr)
+    return table_arr
+
+
+class TableTemplate:
+    """
+    Column grid and header row shared by every page of a statement layout.
+
+    A template created without columns is empty; the extractor fills it in
+    from the first page that has tables (see learn()).
+
+    Args:
+        columns (list, optional): x positions of the column boundaries, left to right
+        header (list, optional): Text of the header row, as extracted from the first table
+        page_size (tuple, optional): (width, height) of the page the template was learned from
+        tolerance (float): How far (in points) a ruling may sit from a learned column
+    """
+
+    def __init__(self, columns=None, header=None, page_size=None, tolerance=3.0):
+        self.columns = list(columns) if columns else None
+        self.header = list(header) if header else None
+        self.page_size = tuple(page_size) if page_size else None
+        self.tolerance = tolerance
+
+    def learn(self, page, tables, extracted):
+        """
+        Take the column grid and header from a page's full table detection.
+
+        Args:
+            page (pdfplumber.page.Page): The page the tables were found on
+            tables (list): pdfplumber Table objects from page.find_tables()
+            extracted (list): table.extract() of each table
+
+        Returns:
+            bool: True if the page had a single consistent grid to learn from
+        """
+        if not tables:
+            return False
+
+        grids = []
+        for table in tables:
+            xs = {cell[0] for cell in table.cells} | {cell[2] for cell in table.cells}
+            grids.append(_cluster_positions(xs, self.tolerance))
+        if any(len(grid) != len(grids[0]) for grid in grids):
+            return False
+
+        self.columns = _cluster_positions([x for grid in grids for x in grid], self.tolerance)
+        if len(self.columns) != len(grids[0]):
+            self.columns = None
+            return False
+        self.header = extracted[0][0] if extracted[0] else None
+        self.page_size = (round(page.width, 2), round(page.height, 2))
+        return True
+
+    def _column_at(self, x):
+        """The learned column within `tolerance` of x, or None if x is off the grid."""
+        position = bisect_left(self.columns, x)
+        neighbours = self.columns[max(0, position - 1):position + 1]
+        column = min(neighbours, key=lambda c: abs(x - c))
+        return column if abs(x - column) <= self.tolerance else None
+
+    def table_settings(self, page):
+        """
+        pdfplumber table settings that read the page against the template grid.
+
+        Returns:
+            dict: Settings for page.find_tables()/extract_tables(), or None if the page does not fit the template
+        """
+        if not self.columns:
+            return None
+        if self.page_size and (abs(page.width - self.page_size[0]) > self.tolerance
+                               or abs(page.height - self.page_size[1]) > self.tolerance):
+            return None
+
+        # Each vertical ruling becomes an explicit line on its learned column; one off the grid means
+        # a different layout
+        lines = []
+        for edge in page.edges:
+            if edge["orientation"] != "v":
+                continue
+            column = self._column_at(edge["x0"])
+            if column is None:
+                return None
+            lines.append({"object_type": "line", "x0": column, "x1": column, "width": 0,
+                          "top": edge["top"], "bottom": edge["bottom"], "height": edge["bottom"] - edge["top"]})
+        if len(lines) < 2:
+            return None
+        return {"vertical_strategy": "explicit", "explicit_vertical_lines": lines, "horizontal_strategy": "lines"}
+
+    def extract_tables(self, page):
+        """
+        Extract the page's tables against the template grid.
+
+        Returns:
+            list: Same as page.extract_tables(), or None if the page does not fit the template
+        """
+        settings = self.table_settings(page)
+        if settings is None:
+            return None
+        found = page.find_tables(settings)
+        if not found:
+            return None
+
+        char_index = _CharIndex(page.chars)
+        n_columns = len(self.columns) - 1
+        tables = []
+        for table in found:
+            table = _extract_table(table, char_index)
+            if any(len(row) != n_columns for row in table):
+                return None
+            if self.header and table and table[0][0] == self.header[0] and table[0] != self.header:
+                return None
+            tables.append(table)
+        return tables
+
+    def to_dict(self):
+        return {"format": TEMPLATE_FORMAT, "columns": self.columns, "header": self.header,
+                "page_size": list(self.page_size) if self.page_size else None,
+                "tolerance": self.tolerance}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != TEMPLATE_FORMAT:
+            raise ValueError(f"Unsupported table template format: {data.get('format')}")
+        return cls(data.get("columns"), data.get("header"), data.get("page_size"),
+                   data.get("tolerance", 3.0))
+
+    def save(self, path):
+        """Write the template as JSON so later statements with the same layout can reuse it."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file and rename so batch workers sharing the path never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,213 @@
+"""
+Vectorized XIRR for transaction cash flows.
+
+The workbook only carries an =XIRR(...) formula, so batch and API callers
+never see a number. This module computes XIRR in NumPy for many groups of
+cash flows at once (every scrip of a statement plus the whole portfolio,
+or thousands of statements), using Excel's definition:
+
+    sum(amount_i / (1 + rate) ** ((date_i - date_0) / 365)) = 0
+
+Newton's method runs on all groups together, on log(1 + rate). Each group
+keeps a bracket on which its NPV changes sign, and a Newton step that
+would leave the bracket (Newton diverges easily on XIRR) is replaced by a
+bisection step, so every bracketed group converges. The NPV is evaluated
+with each group's largest discount factor divided out, so rates close to
+-100% or flows decades apart do not overflow. Groups whose NPV has the
+same sign over the whole search range (e.g. flows that are all outflows)
+have no XIRR and give NaN, where Excel gives #NUM!.
+
+grouped_xirr() solves one rate per group of a transactions DataFrame (per
+scrip, per statement and scrip, ...) and portfolio_xirr() the per-scrip
+and whole-portfolio rates of a statement, each in a single solver call.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+DAYS_PER_YEAR = 365.0
+# Rates are searched in [MIN_RATE, MAX_RATE]
+MIN_RATE = -1 + 1e-12
+MAX_RATE = 1e6
+
+
+def _scaled_npv(amounts, times, groups, span, log_growth):
+    """
+    NPV per group and its derivative with respect to log(1 + rate), both divided by
+    the group's largest discount factor (which keeps their signs and their ratio).
+
+    Args:
+        log_growth (np.ndarray): log(1 + rate) per group
+    """
+    # The largest factor exp(-t * log_growth) is at t = 0 for growth >= 0 and at t = span otherwise
+    peak = np.where(log_growth < 0, -span * log_growth, 0.0)
+    terms = amounts * np.exp(-times * log_growth[groups] - peak[groups])
+    npv = np.bincount(groups, terms, len(log_growth))
+    slope = np.bincount(groups, -times * terms, len(log_growth))
+    return npv, slope
+
+
+def xirr(amounts, dates, groups=None, n_groups=None, guess=0.1, tol=1e-12, max_iter=100):
+    """
+    XIRR of one or many groups of cash flows.
+
+    Args:
+        amounts (array-like): Cash flows; outflows negative, inflows positive
+        dates (array-like): Date of each flow (datetime64, Timestamps or YYYY-MM-DD strings)
+        groups (array-like, optional): Group number (0 .. n_groups - 1) of each flow. None treats
+            all flows as one group.
+        n_groups (int, optional): Number of groups; defaults to max(groups) + 1
+        guess (float): Starting rate for Newton's method
+        tol (float): Convergence tolerance on log(1 + rate)
+        max_iter (int): Iteration limit (bisection alone needs about 50 at the default tolerance)
+
+    Returns:
+        float | np.ndarray: Annual rate (0.1 is 10%) per group, NaN where there is none
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    days = pd.to_datetime(np.asarray(dates)).to_numpy().astype("datetime64[D]")
+    single = groups is None
+    groups = np.zeros(len(amounts), dtype=np.intp) if single else np.asarray(groups, dtype=np.intp)
+    if n_groups is None:
+        n_groups = 1 if single else int(groups.max()) + 1 if len(groups) else 0
+
+    # Flows without an amount or a date are left out
+    valid = np.isfinite(amounts) & ~np.isnat(days)
+    amounts, groups = amounts[valid], groups[valid]
+    days = days[valid].astype(np.int64)
+
+    # Years since each group's first flow
+    first = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(first, groups, days)
+    times = (days - first[groups]) / DAYS_PER_YEAR
+
+    rates = _solve(amounts, times, groups, n_groups, guess, tol, max_iter)
+    return float(rates[0]) if single else rates
+
+
+def _solve(amounts, times, groups, n_groups, guess, tol, max_iter):
+    """Safeguarded Newton's method on x = log(1 + rate) for all groups at once."""
+    span = np.zeros(n_groups)
+    np.maximum.at(span, groups, times)
+    low = np.full(n_groups, np.log1p(MIN_RATE))
+    high = np.full(n_groups, np.log1p(MAX_RATE))
+    with np.errstate(all="ignore"):
+        sign_low = np.sign(_scaled_npv(amounts, times, groups, span, low)[0])
+        sign_high = np.sign(_scaled_npv(amounts, times, groups, span, high)[0])
+    active = sign_low * sign_high < 0
+    x = np.where(active, np.clip(np.log1p(guess), low, high), np.nan)
+    done = ~active
+    previous_step = high - low
+
+    # Only the rows of unfinished groups are evaluated; they are re-selected as groups converge
+    rows = np.flatnonzero(active[groups])
+    with np.errstate(all="ignore"):
+        for _ in range(max_iter):
+            if not rows.size:
+                break
+            npv, slope = _scaled_npv(amounts[rows], times[rows], groups[rows], span, x)
+            # Narrow each bracket to the side of x that still holds the sign change
+            same_as_low = np.sign(npv) == sign_low
+            low = np.where(active & same_as_low, x, low)
+            high = np.where(active & ~same_as_low, x, high)
+            step = npv / slope
+            candidate = x - step
+            # Bisect instead when Newton would leave the bracket or is not at least halving its steps
+            # (far from the root one flow dominates the NPV and Newton crawls)
+            bisect = (~np.isfinite(candidate) | (candidate <= low) | (candidate >= high)
+                      | (2 * np.abs(step) > np.abs(previous_step)))
+            candidate = np.where(npv == 0, x, np.where(bisect, (low + high) / 2, candidate))
+            previous_step = np.where(active, candidate - x, previous_step)
+            finished = active & ((npv == 0) | (np.abs(candidate - x) <= tol) | (high - low <= tol))
+            x = np.where(active, candidate, x)
+            done |= finished
+            active &= ~finished
+            if 2 * np.count_nonzero(active[groups[rows]]) < len(rows):
+                rows = rows[active[groups[rows]]]
+    rates = np.expm1(x)
+    rates[~done] = np.nan
+    return rates
+
+
+def _flows(df, amount_column, date_column):
+    """Amounts as floats and dates as datetime64[D] (NaN/NaT where missing) of a transactions DataFrame."""
+    amounts = pd.to_numeric(df[amount_column], errors="coerce").to_numpy(dtype=np.float64)
+    dates = df[date_column]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%Y-%m-%d", errors="coerce")
+    return amounts, dates.to_numpy("datetime64[D]")
+
+
+def grouped_xirr(df, by="Scrip_Symbol", amount_column="N.Amt", date_column="Date"):
+    """
+    XIRR of every group of a transactions DataFrame, solved together in one call.
+
+    Each group's flows are taken as they are: an open position needs its
+    current value as a row of its own (see portfolio_xirr for that).
+
+    Args:
+        df (pd.DataFrame): Transactions with amounts and dates (YYYY-MM-DD strings or datetimes)
+        by (str | list): Column(s) to group by, as for DataFrame.groupby; rows with a missing key are left out
+        amount_column, date_column (str): Column names
+
+    Returns:
+        pd.Series: Annual rate per group (indexed by the group keys, sorted), NaN where there is none
+    """
+    grouper = df.groupby(by, sort=True, observed=True)
+    codes = grouper.ngroup().to_numpy()
+    index = grouper.size().index
+    amounts, dates = _flows(df, amount_column, date_column)
+    keep = codes >= 0
+    rates = xirr(amounts[keep], dates[keep], codes[keep], len(index))
+    return pd.Series(rates, index=index, name="xirr")
+
+
+def portfolio_xirr(df, values=None, as_of=None, symbol_column="Scrip_Symbol", amount_column="N.Amt",
+                   date_column="Date", quantity_column="N.Qty"):
+    """
+    Per-scrip and whole-portfolio XIRR of a statement's transactions, in one solver call.
+
+    A scrip whose net quantity is zero is closed and its flows are complete.
+    An open scrip needs its current market value (a final inflow on `as_of`);
+    without one its XIRR is None, and so is the portfolio's.
+
+    Args:
+        df (pd.DataFrame): Cleaned transactions
+        values (dict, optional): {symbol: current market value} of open positions
+        as_of (date | str, optional): Date of the current values. Defaults to today.
+        symbol_column, amount_column, date_column, quantity_column (str): Column names
+
+    Returns:
+        dict: {"as_of": "YYYY-MM-DD", "portfolio": rate or None, "scrips": {symbol: rate or None}}
+    """
+    as_of = pd.Timestamp(as_of if as_of is not None else date.today()).normalize()
+    values = values or {}
+    amounts, dates = _flows(df, amount_column, date_column)
+    codes, symbols = pd.factorize(df[symbol_column].astype(object), sort=True)
+    keep = codes >= 0
+    amounts, dates, codes = amounts[keep], dates[keep], codes[keep]
+
+    # Net quantity per scrip decides whether it needs a current value
+    quantities = pd.to_numeric(df[quantity_column], errors="coerce").to_numpy(dtype=np.float64)[keep]
+    net = np.bincount(codes, np.nan_to_num(quantities), len(symbols))
+    current = np.array([values.get(symbol, np.nan) for symbol in symbols], dtype=np.float64)
+    open_position = ~np.isclose(net, 0)
+    valued = ~open_position | np.isfinite(current)
+    current = np.where(open_position, current, 0.0)
+
+    # Groups 0 .. n-1 are the scrips and group n the whole portfolio; current values are final inflows
+    n = len(symbols)
+    terminal = np.flatnonzero(open_position & valued)
+    all_amounts = np.concatenate([amounts, current[terminal], amounts, [current[terminal].sum()]])
+    all_dates = np.concatenate([dates, np.full(len(terminal), as_of.to_datetime64()), dates,
+                                [as_of.to_datetime64()]]).astype("datetime64[D]")
+    all_groups = np.concatenate([codes, terminal, np.full(len(amounts) + 1, n)])
+    rates = xirr(all_amounts, all_dates, all_groups, n + 1)
+
+    def rate(value, ok):
+        return float(value) if ok and np.isfinite(value) else None
+
+    return {"as_of": as_of.strftime("%Y-%m-%d"),
+            "portfolio": rate(rates[n], n > 0 and valued.all()),
+            "scrips": {str(symbol): rate(rates[i], valued[i]) for i, symbol in enumerate(symbols)}}